@@ -0,0 +1,597 @@
+"""
+フルスタック学習プログラム - Googleカレンダー 疑似APIサーバー
+
+【このモジュールの目的】
+Googleにアクセスせずに同期処理の性能を測るため、
+sync-to-calendar.py が使うCalendar API v3のエンドポイントを
+メモリ上のデータで再現するローカルHTTPサーバーです。
+
+【対応しているエンドポイント】
+- GET    /calendar/v3/users/me/calendarList          カレンダー一覧
+- POST   /calendar/v3/calendars                      カレンダー作成
+- GET    /calendar/v3/calendars/{calendarId}         カレンダー取得
+- GET    /calendar/v3/calendars/{calendarId}/events  イベント一覧（ページング・syncToken）
+- POST   /calendar/v3/calendars/{calendarId}/events  イベント作成
+- GET/PUT/PATCH/DELETE .../events/{eventId}          イベント取得・更新・削除
+- POST   /batch/calendar/v3                          バッチリクエスト（最大50件）
+- GET    /_fake/stats                                呼び出し回数（計測用、DELETEでリセット）
+
+【再現するAPIの動作】
+- fields= マスク（'items(id,etag),nextPageToken' や 'start/date' の形式）でレスポンスを絞る
+- patch は送られたフィールドだけを書き換え、update はイベント全体を置き換える
+
+【再現できる状況】
+- latency: 1回のHTTPリクエストごとに待つ秒数（ネットワークの往復時間の代わり）
+- quota_per_second: 1秒あたりに受け付けるAPI呼び出し数（超えたら403 rateLimitExceeded）
+- error_rate: 一時的なサーバーエラー（503）を返す確率
+
+【使い方】
+# 単体で起動（別のターミナルから同期スクリプトを向ける場合）
+python settings/calendar-sync/benchmarks/fake_calendar_server.py --port 8765 --latency 0.05
+
+# Pythonから起動（ベンチマーク用）
+server = FakeCalendarServer(latency=0.05).start()
+print(server.root_url)  # 'http://127.0.0.1:xxxxx/'
+server.stop()
+
+【主な変数の依存関係】
+FakeCalendarServer → handle_api_request(method, path, query, body) → (status, payload)
+"""
+
+# ============================================================
+# ライブラリのインポート
+# ============================================================
+
+import argparse  # コマンドライン引数を解析
+import itertools  # ID・etag・同期トークンの連番
+import json  # リクエスト・レスポンス本文
+import random  # エラー注入
+import re  # バッチリクエストの分割
+import threading  # サーバースレッド・排他制御
+import time  # 遅延・レート制限
+import uuid  # カレンダーID・イベントIDの生成
+from email.parser import BytesParser  # バッチリクエスト（multipart/mixed）の解析
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote, urlsplit
+
+# ============================================================
+# グローバル設定
+# ============================================================
+
+API_PREFIX = '/calendar/v3'
+BATCH_PATH = '/batch/calendar/v3'
+STATS_PATH = '/_fake/stats'
+
+# Calendar APIの上限に合わせた値
+MAX_BATCH_SIZE = 50
+MAX_LIST_RESULTS = 2500
+DEFAULT_LIST_RESULTS = 250
+
+HTTP_REASONS = {
+    200: 'OK', 204: 'No Content', 400: 'Bad Request', 403: 'Forbidden',
+    404: 'Not Found', 410: 'Gone', 503: 'Service Unavailable',
+}
+
+
+# ============================================================
+# 関数定義
+# ============================================================
+
+def error_payload(status, reason, message):
+    """
+    Calendar APIと同じ形式のエラーレスポンス本文を作成
+
+    calendar_retry.get_error_reasons() が reason を読み取れる形にする
+    """
+    return {'error': {
+        'code': status,
+        'message': message,
+        'errors': [{'domain': 'global', 'reason': reason, 'message': message}],
+    }}
+
+
+def parse_batch_body(content_type, body):
+    """
+    バッチリクエスト（multipart/mixed）を個々のリクエストに分解
+
+    【引数】
+    content_type: Content-Typeヘッダー（boundaryを含む）
+    body: リクエスト本文（bytes）
+
+    【戻り値】
+    parts: [(content_id, method, path, query, body), ...] のリスト
+    """
+    message = BytesParser().parsebytes(
+        b'Content-Type: ' + content_type.encode() + b'\r\n\r\n' + body)
+
+    parts = []
+    for part in message.get_payload():
+        payload = part.get_payload()
+        if isinstance(payload, list):  # 入れ子のmultipartは使われない
+            continue
+        head, part_body = (re.split(r'\r?\n\r?\n', payload, maxsplit=1) + [''])[:2]
+        request_line = head.splitlines()[0]
+        method, target, _ = request_line.split(' ', 2)
+        url = urlsplit(target)
+        parts.append((part.get('Content-ID', ''), method, url.path,
+                      parse_qs(url.query), part_body.strip()))
+    return parts
+
+
+def parse_fields_mask(mask):
+    """
+    fields= パラメータを木構造にする
+
+    【例】
+    'items(id,start/date),nextPageToken'
+        → {'items': {'id': {}, 'start': {'date': {}}}, 'nextPageToken': {}}
+    （空の辞書 = そのフィールドを丸ごと返す）
+    """
+    root = {}
+    stack = [root]
+    token = ''
+    last = root
+
+    def add(path):
+        node = stack[-1]
+        for name in path.split('/'):
+            node = node.setdefault(name, {})
+        return node
+
+    for char in mask + ',':
+        if char in ',()':
+            if token.strip():
+                last = add(token.strip())
+            token = ''
+            if char == '(':
+                stack.append(last)
+            elif char == ')' and len(stack) > 1:
+                stack.pop()
+        else:
+            token += char
+    return root
+
+
+def apply_fields_mask(value, mask):
+    """レスポンス本文をフィールドマスク（parse_fields_mask()の戻り値）で絞る"""
+    if not mask:
+        return value
+    if isinstance(value, list):
+        return [apply_fields_mask(element, mask) for element in value]
+    if isinstance(value, dict):
+        return {name: apply_fields_mask(value[name], child)
+                for name, child in mask.items() if name in value}
+    return value
+
+
+def format_batch_response(boundary, responses):
+    """
+    個々のレスポンスをバッチレスポンス（multipart/mixed）にまとめる
+
+    【引数】
+    boundary: 区切り文字列
+    responses: [(content_id, status, payload), ...] のリスト
+
+    【戻り値】
+    body: レスポンス本文（bytes）
+    """
+    chunks = []
+    for content_id, status, payload in responses:
+        text = '' if payload is None else json.dumps(payload, ensure_ascii=False)
+        # googleapiclientはリクエストの Content-ID に 'response-' を付けたものを期待する
+        response_id = '<response-' + content_id[1:] if content_id.startswith('<') else content_id
+        chunks.append(
+            f'--{boundary}\r\n'
+            'Content-Type: application/http\r\n'
+            f'Content-ID: {response_id}\r\n\r\n'
+            f'HTTP/1.1 {status} {HTTP_REASONS.get(status, "")}\r\n'
+            'Content-Type: application/json; charset=UTF-8\r\n\r\n'
+            f'{text}\r\n'
+        )
+    chunks.append(f'--{boundary}--\r\n')
+    return ''.join(chunks).encode('utf-8')
+
+
+# ============================================================
+# クラス定義
+# ============================================================
+
+class FakeCalendarServer:
+    """
+    Calendar API v3の一部を再現する疑似サーバー
+
+    【保持するデータ】
+    calendars: {カレンダーID: カレンダー}
+    events: {カレンダーID: {イベントID: イベント}}（作成順）
+    stats: {'http_requests': HTTP数, 'api_calls': {メソッド名: 回数},
+            'throttled': レート制限した回数, 'errors': 注入したエラー数,
+            'bytes_received': 受信した本文のバイト数, 'bytes_sent': 送信した本文のバイト数}
+    """
+
+    def __init__(self, host='127.0.0.1', port=0, latency=0.0, quota_per_second=None,
+                 error_rate=0.0, seed=None):
+        self.host = host
+        self.port = port
+        self.latency = latency
+        self.quota_per_second = quota_per_second
+        self.error_rate = error_rate
+        self.random = random.Random(seed)
+
+        self.lock = threading.Lock()
+        self.calendars = {}
+        self.events = {}
+        self.sequence = itertools.count(1)  # etag・同期トークン用の連番
+        self.last_sequence = 0
+        self.tokens = float(quota_per_second or 0)  # レート制限の残り（トークンバケット）
+        self.tokens_updated = time.monotonic()
+        self.reset_stats()
+
+        self.httpd = None
+        self.thread = None
+
+    # ------------------------------------------------------------
+    # サーバーの起動・停止
+    # ------------------------------------------------------------
+
+    @property
+    def root_url(self):
+        """ディスカバリードキュメントの rootUrl に設定するURL"""
+        host, port = self.httpd.server_address[:2]
+        return f'http://{host}:{port}/'
+
+    def start(self):
+        """別スレッドでサーバーを起動して自分自身を返す"""
+        handler = type('Handler', (FakeCalendarHandler,), {'fake': self})
+        self.httpd = ThreadingHTTPServer((self.host, self.port), handler)
+        self.httpd.daemon_threads = True
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        """サーバーを停止"""
+        if self.httpd is not None:
+            self.httpd.shutdown()
+            self.httpd.server_close()
+            self.httpd = None
+
+    def reset_stats(self):
+        """呼び出し回数をリセット（ベンチマークのシナリオごと）"""
+        with self.lock:
+            self.stats = {'http_requests': 0, 'api_calls': {}, 'throttled': 0, 'errors': 0,
+                          'bytes_received': 0, 'bytes_sent': 0}
+
+    def snapshot_stats(self):
+        """呼び出し回数のコピーを返す"""
+        with self.lock:
+            return dict(self.stats, api_calls=dict(self.stats['api_calls']))
+
+    # ------------------------------------------------------------
+    # レート制限・エラー注入
+    # ------------------------------------------------------------
+
+    def take_quota(self):
+        """
+        API呼び出し1回分のクォータを消費（トークンバケット）
+
+        【戻り値】
+        True: 受け付ける、False: レート制限する
+        """
+        if not self.quota_per_second:
+            return True
+        now = time.monotonic()
+        self.tokens = min(float(self.quota_per_second),
+                          self.tokens + (now - self.tokens_updated) * self.quota_per_second)
+        self.tokens_updated = now
+        if self.tokens < 1:
+            return False
+        self.tokens -= 1
+        return True
+
+    def handle_api_request(self, method, path, query, body):
+        """
+        API呼び出し1回分を処理（通常のリクエストとバッチ内の各リクエストで共通）
+
+        【処理フロー】
+        1. 呼び出し回数を記録
+        2. レート制限・エラー注入の対象なら、そのエラーを返す
+        3. パスに対応する処理を呼び出す
+
+        【引数】
+        method: HTTPメソッド
+        path: パス（例: '/calendar/v3/calendars/xxx/events'）
+        query: クエリパラメータ（parse_qsの戻り値）
+        body: リクエスト本文（文字列、なければ空）
+
+        【戻り値】
+        (status, payload): ステータスコードとレスポンス本文（辞書、204ならNone）
+        """
+        segments = [unquote(segment) for segment in path[len(API_PREFIX):].strip('/').split('/')]
+        params = {name: values[-1] for name, values in query.items()}
+        try:
+            data = json.loads(body) if body else {}
+        except ValueError:
+            return 400, error_payload(400, 'parseError', 'Parse Error')
+
+        with self.lock:
+            name = self.method_name(method, segments)
+            self.stats['api_calls'][name] = self.stats['api_calls'].get(name, 0) + 1
+
+            if not self.take_quota():
+                self.stats['throttled'] += 1
+                return 403, error_payload(403, 'rateLimitExceeded', 'Rate Limit Exceeded')
+            if self.error_rate and self.random.random() < self.error_rate:
+                self.stats['errors'] += 1
+                return 503, error_payload(503, 'backendError', 'Backend Error')
+
+            status, payload = self.route(method, segments, params, data)
+
+        if status == 200 and params.get('fields'):
+            payload = apply_fields_mask(payload, parse_fields_mask(params['fields']))
+        return status, payload
+
+    @staticmethod
+    def method_name(method, segments):
+        """パスからAPIメソッド名を求める（例: 'calendar.events.insert'）"""
+        if segments[:3] == ['users', 'me', 'calendarList']:
+            return 'calendar.calendarList.list'
+        if len(segments) >= 3 and segments[0] == 'calendars' and segments[2] == 'events':
+            if len(segments) == 3:
+                action = {'GET': 'list', 'POST': 'insert'}.get(method, method.lower())
+            else:
+                action = {'GET': 'get', 'PUT': 'update', 'PATCH': 'patch',
+                          'DELETE': 'delete'}.get(method, method.lower())
+            return f'calendar.events.{action}'
+        if segments[0] == 'calendars':
+            action = 'insert' if len(segments) == 1 else {'GET': 'get'}.get(method, method.lower())
+            return f'calendar.calendars.{action}'
+        return 'unknown'
+
+    # ------------------------------------------------------------
+    # 各エンドポイントの処理（self.lock を取得した状態で呼ぶ）
+    # ------------------------------------------------------------
+
+    def route(self, method, segments, params, data):
+        """パスとメソッドから処理を選ぶ"""
+        if segments[:3] == ['users', 'me', 'calendarList'] and method == 'GET':
+            return self.list_calendars(params)
+        if segments[0] != 'calendars':
+            return 404, error_payload(404, 'notFound', 'Not Found')
+
+        if len(segments) == 1 and method == 'POST':
+            return self.insert_calendar(data)
+
+        calendar_id = segments[1] if len(segments) > 1 else ''
+        if calendar_id not in self.calendars:
+            return 404, error_payload(404, 'notFound', 'Not Found')
+        if len(segments) == 2 and method == 'GET':
+            return 200, self.calendars[calendar_id]
+
+        if len(segments) == 3 and segments[2] == 'events':
+            if method == 'GET':
+                return self.list_events(calendar_id, params)
+            if method == 'POST':
+                return self.insert_event(calendar_id, data)
+        if len(segments) == 4 and segments[2] == 'events':
+            return self.modify_event(method, calendar_id, segments[3], data)
+        return 404, error_payload(404, 'notFound', 'Not Found')
+
+    def list_calendars(self, params):
+        """calendarList.list（1ページで全件を返す）"""
+        items = [{'id': calendar['id'], 'summary': calendar['summary']}
+                 for calendar in self.calendars.values()]
+        return 200, {'kind': 'calendar#calendarList', 'items': items}
+
+    def insert_calendar(self, data):
+        """calendars.insert"""
+        calendar_id = f'{uuid.uuid4().hex}@group.calendar.google.com'
+        calendar = dict(data, id=calendar_id, kind='calendar#calendar',
+                        etag=f'"{next(self.sequence)}"')
+        self.calendars[calendar_id] = calendar
+        self.events[calendar_id] = {}
+        return 200, calendar
+
+    def list_events(self, calendar_id, params):
+        """
+        events.list
+
+        【対応するパラメータ】
+        maxResults / pageToken: ページング（pageTokenは先頭からの位置）
+        showDeleted: 削除済み（status 'cancelled'）を含めるか
+        syncToken: このトークン以降に変更されたイベントだけ（削除済みも含む）
+        privateExtendedProperty: 'キー=値' が一致するイベントだけ
+        """
+        events = self.events[calendar_id].values()
+
+        sync_token = params.get('syncToken')
+        if sync_token:
+            if not sync_token.isdigit():
+                return 410, error_payload(410, 'fullSyncRequired', 'Sync token is no longer valid')
+            since = int(sync_token)
+            events = [event for event in events if event['_sequence'] > since]
+        elif params.get('showDeleted', 'false') != 'true':
+            events = [event for event in events if event['status'] != 'cancelled']
+
+        extended = params.get('privateExtendedProperty')
+        if extended:
+            key, _, value = extended.partition('=')
+            events = [event for event in events
+                      if event.get('extendedProperties', {}).get('private', {}).get(key) == value]
+
+        events = list(events)
+        max_results = min(int(params.get('maxResults', DEFAULT_LIST_RESULTS)), MAX_LIST_RESULTS)
+        start = int(params.get('pageToken') or 0)
+        page = events[start:start + max_results]
+
+        result = {'kind': 'calendar#events',
+                  'items': [self.public_event(event) for event in page]}
+        if start + max_results < len(events):
+            result['nextPageToken'] = str(start + max_results)
+        else:
+            # 最後のページにだけ次回の差分取得用のトークンを付ける
+            result['nextSyncToken'] = str(self.last_sequence)
+        return 200, result
+
+    def insert_event(self, calendar_id, data):
+        """events.insert"""
+        if 'start' not in data or 'end' not in data:
+            return 400, error_payload(400, 'required', 'Missing end time.')
+        event_id = uuid.uuid4().hex
+        event = dict(data, id=event_id, status='confirmed')
+        self.touch(event)
+        self.events[calendar_id][event_id] = event
+        return 200, self.public_event(event)
+
+    def modify_event(self, method, calendar_id, event_id, data):
+        """events.get / update / patch / delete"""
+        event = self.events[calendar_id].get(event_id)
+        if event is None:
+            return 404, error_payload(404, 'notFound', 'Not Found')
+        if event['status'] == 'cancelled' and method != 'GET':
+            return 410, error_payload(410, 'deleted', 'Resource has been deleted')
+
+        if method == 'GET':
+            return 200, self.public_event(event)
+        if method == 'DELETE':
+            event['status'] = 'cancelled'
+            self.touch(event)
+            return 204, None
+        if method == 'PUT':
+            # updateはイベント全体を置き換える
+            event = dict(data, id=event_id, status='confirmed')
+        elif method == 'PATCH':
+            # patchは送られたフィールドだけを書き換える
+            event = dict(event, **data)
+        else:
+            return 404, error_payload(404, 'notFound', 'Not Found')
+        self.touch(event)
+        self.events[calendar_id][event_id] = event
+        return 200, self.public_event(event)
+
+    def touch(self, event):
+        """変更されたイベントのetagと変更番号を更新"""
+        sequence = next(self.sequence)
+        self.last_sequence = sequence
+        event['_sequence'] = sequence
+        event['etag'] = f'"{sequence}"'
+
+    @staticmethod
+    def public_event(event):
+        """内部用のフィールドを除いたイベント"""
+        return {name: value for name, value in event.items() if not name.startswith('_')}
+
+
+class FakeCalendarHandler(BaseHTTPRequestHandler):
+    """
+    HTTPリクエストを FakeCalendarServer に渡すハンドラー
+
+    httplib2 は接続を使い回すため、HTTP/1.1（keep-alive）で応答する
+    """
+
+    protocol_version = 'HTTP/1.1'
+    fake = None  # FakeCalendarServer.start() で設定される
+
+    def log_message(self, format, *args):
+        """アクセスログは出さない（ベンチマークの出力を汚さないため）"""
+
+    def handle_request(self):
+        """全メソッド共通の処理"""
+        length = int(self.headers.get('Content-Length') or 0)
+        body = self.rfile.read(length) if length else b''
+        url = urlsplit(self.path)
+
+        # 計測用のエンドポイントは遅延・呼び出し回数の対象外
+        if url.path == STATS_PATH and self.command == 'DELETE':
+            self.fake.reset_stats()
+            self.send_json(204, None)
+            return
+        if url.path == STATS_PATH:
+            self.send_json(200, self.fake.snapshot_stats())
+            return
+
+        with self.fake.lock:
+            self.fake.stats['http_requests'] += 1
+            self.fake.stats['bytes_received'] += len(body)
+        if self.fake.latency:
+            time.sleep(self.fake.latency)
+
+        if url.path == BATCH_PATH and self.command == 'POST':
+            self.handle_batch(body)
+        elif url.path.startswith(API_PREFIX + '/'):
+            status, payload = self.fake.handle_api_request(
+                self.command, url.path, parse_qs(url.query), body.decode('utf-8'))
+            self.send_json(status, payload)
+        else:
+            self.send_json(404, error_payload(404, 'notFound', 'Not Found'))
+
+    def handle_batch(self, body):
+        """バッチリクエストを1件ずつ処理して、まとめて返す"""
+        parts = parse_batch_body(self.headers.get('Content-Type', ''), body)
+        if len(parts) > MAX_BATCH_SIZE:
+            self.send_json(400, error_payload(400, 'tooManyRequests',
+                                              f'Batch size is limited to {MAX_BATCH_SIZE}'))
+            return
+
+        responses = []
+        for content_id, method, path, query, part_body in parts:
+            status, payload = self.fake.handle_api_request(method, path, query, part_body)
+            responses.append((content_id, status, payload))
+
+        boundary = f'batch_{uuid.uuid4().hex}'
+        self.send_body(200, format_batch_response(boundary, responses),
+                       f'multipart/mixed; boundary={boundary}')
+
+    def send_json(self, status, payload):
+        """JSONレスポンスを返す（payloadがNoneなら本文なし）"""
+        body = b'' if payload is None else json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        self.send_body(status, body, 'application/json; charset=UTF-8')
+
+    def send_body(self, status, body, content_type):
+        """レスポンスを送信（計測用のエンドポイント以外は送信バイト数を記録）"""
+        if urlsplit(self.path).path != STATS_PATH:
+            with self.fake.lock:
+                self.fake.stats['bytes_sent'] += len(body)
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    do_GET = do_POST = do_PUT = do_PATCH = do_DELETE = handle_request
+
+
+# ============================================================
+# メイン処理
+# ============================================================
+
+def main():
+    parser = argparse.ArgumentParser(description='Google Calendar API v3 の疑似サーバーを起動')
+    parser.add_argument('--host', default='127.0.0.1', help='待ち受けるアドレス')
+    parser.add_argument('--port', type=int, default=8765, help='待ち受けるポート')
+    parser.add_argument('--latency', type=float, default=0.0,
+                        help='HTTPリクエストごとの遅延（秒）')
+    parser.add_argument('--quota', type=float, default=None,
+                        help='1秒あたりのAPI呼び出し上限（超えたら403 rateLimitExceeded）')
+    parser.add_argument('--error-rate', type=float, default=0.0,
+                        help='503エラーを返す確率（0〜1）')
+    parser.add_argument('--seed', type=int, default=None, help='エラー注入の乱数シード')
+    args = parser.parse_args()
+
+    server = FakeCalendarServer(args.host, args.port, args.latency, args.quota,
+                                args.error_rate, args.seed).start()
+    print(f"🧪 疑似Calendar APIサーバーを起動しました: {server.root_url}")
+    print(f"   呼び出し回数: {server.root_url}{STATS_PATH.lstrip('/')}")
+    print("   Ctrl+C で終了")
+    try:
+        server.thread.join()
+    except KeyboardInterrupt:
+        server.stop()
+        print("\n👋 サーバーを終了しました")
+
+
+# ============================================================
+# スクリプトのエントリーポイント
+# ============================================================
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,399 @@
+#!/usr/bin/env python3
+"""
+フルスタック学習プログラム - カレンダー同期ベンチマーク
+
+【このスクリプトの目的】
+Googleにアクセスせずに、カレンダー同期の性能を測ります。
+疑似Calendar APIサーバー（fake_calendar_server.py）を別プロセスで起動し、
+生成したスケジュール（10行・1,000行・100,000行など）で次のシナリオを実行して、
+経過時間・API呼び出し数・送受信バイト数・ピークメモリを表にします。
+
+- initial_sync:  空のカレンダーに全行を同期（カレンダー作成を含む）
+- resync:        変更なしで再同期（同期状態ストアだけで判断できるか）
+- reschedule:    後半の行を1週間ずらして（shift_schedule）、移動した行だけ同期
+
+【性能の劣化を見つける】
+--json で結果を保存し、次回 --baseline で比較すると、
+経過時間が許容範囲（--tolerance）を超えて増えたシナリオや、
+API呼び出し数が増えたシナリオを報告して終了コード1で終わります。
+
+【使い方】
+python settings/calendar-sync/benchmarks/run-benchmarks.py
+python settings/calendar-sync/benchmarks/run-benchmarks.py --sizes 10,1000,100000,250000 --latency 0.05
+python settings/calendar-sync/benchmarks/run-benchmarks.py --json baseline.json
+python settings/calendar-sync/benchmarks/run-benchmarks.py --baseline baseline.json
+python settings/calendar-sync/benchmarks/run-benchmarks.py --lean  # 軽量モード（--lean）で同期
+
+【必要なもの】
+google-api-python-client と httplib2（実際の同期と同じライブラリでリクエストを送るため）
+"""
+
+# ============================================================
+# ライブラリのインポート
+# ============================================================
+
+import argparse  # コマンドライン引数を解析
+import contextlib  # 同期処理の出力を抑える
+import csv  # スケジュールの生成
+import importlib.util  # ファイルパスからモジュールを読み込む
+import io  # 同期処理の出力の捨て先
+import json  # 結果の保存・比較
+import multiprocessing  # 疑似サーバーを別プロセスで動かす
+import sys
+import tempfile  # 生成したスケジュール・同期状態の置き場所
+import time  # 経過時間の計測
+import tracemalloc  # ピークメモリの計測
+import urllib.request  # 疑似サーバーの呼び出し回数の取得
+from pathlib import Path  # ファイルパス操作用
+
+BENCHMARK_DIR = Path(__file__).parent
+SCRIPTS_DIR = BENCHMARK_DIR.parent / 'scripts'
+sys.path.insert(0, str(SCRIPTS_DIR))
+
+from fake_calendar_server import STATS_PATH, FakeCalendarServer  # noqa: E402
+from sync_state import SyncState  # noqa: E402
+
+# リスケジュールのスクリプトを読み込む（同期スクリプトも一緒に読み込まれる）
+# ファイル名にハイフンが含まれるため、importlibでファイルパスを指定して読み込む
+_spec = importlib.util.spec_from_file_location(
+    'reschedule_learning', SCRIPTS_DIR / 'reschedule-learning.py')
+reschedule_learning = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(reschedule_learning)
+sync_to_calendar = reschedule_learning.sync_to_calendar
+
+# ============================================================
+# グローバル設定
+# ============================================================
+
+# 生成するスケジュールの行数
+DEFAULT_SIZES = [10, 1000, 100000]
+
+# 生成するスケジュールの各行の内容は、実際のスケジュールから順番に借りる
+TEMPLATE_CSV_PATH = BENCHMARK_DIR.parent.parent / 'learning-program' / 'data' / 'dev-schedule.csv'
+
+# 生成するスケジュールの開始月（各月の第1〜4週を順番に使う）
+START_YEAR = 2025
+START_MONTH = 12
+WEEKS_PER_MONTH = 4
+
+# --baseline で比較するときの経過時間の許容範囲（0.2 = 20%増まで）
+DEFAULT_TOLERANCE = 0.2
+
+
+# ============================================================
+# 関数定義
+# ============================================================
+
+def generate_schedule_csv(csv_path, rows):
+    """
+    ベンチマーク用のスケジュールCSVを生成
+
+    【ロジック】
+    - 学習内容などの列は dev-schedule.csv の行を順番に繰り返す
+    - 年・月・週は START_YEAR/START_MONTH の第1週から1週ずつ進める
+    - ID列には実際の行IDと同じ形式（'2025-12-1'）を入れる
+
+    【引数】
+    csv_path: 出力先のパス
+    rows: 行数
+    """
+    with open(TEMPLATE_CSV_PATH, 'r', encoding='utf-8') as f:
+        reader = csv.DictReader(f)
+        fieldnames = reader.fieldnames
+        templates = list(reader)
+
+    with open(csv_path, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=fieldnames)
+        writer.writeheader()
+        for index in range(rows):
+            month_index = START_MONTH - 1 + index // WEEKS_PER_MONTH
+            year = START_YEAR + month_index // 12
+            month = month_index % 12 + 1
+            week = index % WEEKS_PER_MONTH + 1
+            writer.writerow(dict(templates[index % len(templates)], **{
+                '年度': year, '月': month, '週': week,
+                sync_to_calendar.ROW_ID_COLUMN: f"{year}-{month}-{week}",
+            }))
+
+
+def serve_fake_calendar(connection, options):
+    """別プロセスで疑似サーバーを動かし、URLを親プロセスに返す"""
+    server = FakeCalendarServer(**options).start()
+    connection.send(server.root_url)
+    server.thread.join()
+
+
+def start_fake_calendar(options):
+    """
+    疑似サーバーを別プロセスで起動
+
+    同じプロセスで動かすと、サーバーが保持するイベントのメモリや
+    リクエスト処理のCPU時間が同期処理の計測値に混ざるため、プロセスを分ける
+
+    【戻り値】
+    (process, root_url)
+    """
+    parent, child = multiprocessing.Pipe()
+    process = multiprocessing.Process(target=serve_fake_calendar, args=(child, options), daemon=True)
+    process.start()
+    return process, parent.recv()
+
+
+def fake_stats(root_url, reset=False):
+    """疑似サーバーの呼び出し回数を取得（reset=Trueならリセット）"""
+    request = urllib.request.Request(root_url + STATS_PATH.lstrip('/'),
+                                     method='DELETE' if reset else 'GET')
+    with urllib.request.urlopen(request) as response:
+        return None if reset else json.load(response)
+
+
+def build_fake_service(root_url):
+    """
+    疑似サーバーに接続するAPIクライアントを作成
+
+    実際の同期と同じディスカバリードキュメントを使い、
+    rootUrl（通常のAPI・バッチの両方のURLの元）だけを疑似サーバーに向ける
+
+    【戻り値】
+    service: Google Calendar APIクライアント（認証なし）
+    """
+    google = sync_to_calendar.import_google_libraries()
+    document = dict(sync_to_calendar.load_discovery_document())
+    document['rootUrl'] = root_url
+    document['baseUrl'] = root_url + document['servicePath']
+    return google.build_from_document(document, http=google.httplib2.Http())
+
+
+def measure(scenario, rows, root_url, func, track_memory=True, verbose=False):
+    """
+    シナリオ1つを実行して計測
+
+    【引数】
+    scenario: シナリオ名
+    rows: スケジュールの行数
+    root_url: 疑似サーバーのURL
+    func: 実行する処理（引数なし）
+    track_memory: Trueならtracemallocでピークメモリを測る（処理は少し遅くなる）
+    verbose: Trueなら同期処理の出力をそのまま表示する
+
+    【戻り値】
+    result: {'scenario', 'rows', 'seconds', 'http_requests', 'api_calls',
+             'bytes_sent', 'bytes_received', 'throttled', 'errors', 'peak_memory_bytes'}
+    """
+    fake_stats(root_url, reset=True)
+    if track_memory:
+        tracemalloc.start()
+
+    output = contextlib.nullcontext() if verbose else contextlib.redirect_stdout(io.StringIO())
+    started = time.perf_counter()
+    with output:
+        func()
+    seconds = time.perf_counter() - started
+
+    peak_memory = None
+    if track_memory:
+        _, peak_memory = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    stats = fake_stats(root_url)
+    return {
+        'scenario': scenario,
+        'rows': rows,
+        'seconds': seconds,
+        'http_requests': stats['http_requests'],
+        'api_calls': sum(stats['api_calls'].values()),  # バッチ内の各リクエストも1回と数える
+        'bytes_sent': stats['bytes_received'],  # 同期処理 → サーバー
+        'bytes_received': stats['bytes_sent'],  # サーバー → 同期処理
+        'throttled': stats['throttled'],
+        'errors': stats['errors'],
+        'peak_memory_bytes': peak_memory,
+    }
+
+
+def run_size(rows, root_url, workdir, args):
+    """
+    1つの行数について全シナリオを実行
+
+    【引数】
+    rows: スケジュールの行数
+    root_url: 疑似サーバーのURL
+    workdir: スケジュール・同期状態を置く一時ディレクトリ
+    args: コマンドライン引数
+
+    【戻り値】
+    results: measure()の戻り値のリスト
+    """
+    csv_path = Path(workdir) / f'schedule-{rows}.csv'
+    state_path = Path(workdir) / f'state-{rows}.db'
+    calendar_name = f'benchmark-{rows}'
+    generate_schedule_csv(csv_path, rows)
+
+    service = build_fake_service(root_url)
+
+    def service_factory():
+        return build_fake_service(root_url)
+
+    def sync(schedule, state):
+        calendar_id = sync_to_calendar.get_or_create_calendar(
+            service, state, calendar_name=calendar_name)
+        return sync_to_calendar.sync_events_to_calendar(
+            service, calendar_id, schedule, args.batch_size, args.workers, service_factory, state,
+            lean=args.lean)
+
+    def full_sync():
+        with SyncState(state_path) as state:
+            sync(sync_to_calendar.load_schedule(csv_path), state)
+
+    def reschedule():
+        # reschedule-learning.py --sync と同じく、移動した行だけを同期する
+        moved = reschedule_learning.shift_schedule(csv_path, rows // 2 + 1, shift_weeks=1)
+        moved_keys = {entry['key'] for entry in moved}
+        schedule = sync_to_calendar.load_schedule_by_keys(csv_path, moved_keys)
+        with SyncState(state_path) as state:
+            sync(schedule, state)
+
+    results = []
+    for scenario, func in [('initial_sync', full_sync), ('resync', full_sync),
+                           ('reschedule', reschedule)]:
+        result = measure(scenario, rows, root_url, func, not args.no_memory, args.verbose)
+        print_result(result)
+        results.append(result)
+    return results
+
+
+def format_bytes(value):
+    """バイト数をKB・MB表記にする"""
+    if value is None:
+        return '-'
+    if value < 1024 * 1024:
+        return f"{value / 1024:.1f} KB"
+    return f"{value / (1024 * 1024):.1f} MB"
+
+
+def print_result(result):
+    """結果1件を表の1行として表示"""
+    print(f"  {result['scenario']:<14} {result['rows']:>9,} 行  "
+          f"{result['seconds']:>9.2f} 秒  "
+          f"HTTP {result['http_requests']:>7,}  API {result['api_calls']:>8,}  "
+          f"送信 {format_bytes(result['bytes_sent']):>9}  受信 {format_bytes(result['bytes_received']):>9}  "
+          f"メモリ {format_bytes(result['peak_memory_bytes']):>9}"
+          + (f"  (レート制限 {result['throttled']}, エラー {result['errors']})"
+             if result['throttled'] or result['errors'] else ''))
+
+
+def compare_with_baseline(results, baseline, tolerance):
+    """
+    前回の結果と比べて、性能が悪くなったシナリオを探す
+
+    【判定条件】
+    - 経過時間が前回の (1 + tolerance) 倍を超えた
+    - API呼び出し数（HTTP数・バッチ内を含む数）が前回より増えた
+    - 送受信バイト数・ピークメモリが前回の (1 + tolerance) 倍を超えた
+
+    【引数】
+    results: 今回の結果（measure()の戻り値のリスト）
+    baseline: 前回の結果（--json で保存した内容）
+    tolerance: 許容範囲（0.2 = 20%増まで）
+
+    【戻り値】
+    regressions: 問題の説明文のリスト（なければ空）
+    """
+    previous = {(entry['scenario'], entry['rows']): entry for entry in baseline['results']}
+    regressions = []
+    for result in results:
+        before = previous.get((result['scenario'], result['rows']))
+        if before is None:
+            continue
+        label = f"{result['scenario']} ({result['rows']:,} 行)"
+        if result['seconds'] > before['seconds'] * (1 + tolerance):
+            regressions.append(f"{label}: 経過時間 {before['seconds']:.2f} → {result['seconds']:.2f} 秒")
+        for name in ('http_requests', 'api_calls'):
+            if result[name] > before[name]:
+                regressions.append(f"{label}: {name} {before[name]:,} → {result[name]:,}")
+        for name, title in (('bytes_sent', '送信バイト数'), ('bytes_received', '受信バイト数'),
+                            ('peak_memory_bytes', 'ピークメモリ')):
+            if result[name] and before.get(name) and result[name] > before[name] * (1 + tolerance):
+                regressions.append(f"{label}: {title} {format_bytes(before[name])}"
+                                   f" → {format_bytes(result[name])}")
+    return regressions
+
+
+# ============================================================
+# メイン処理
+# ============================================================
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='疑似Calendar APIサーバーでカレンダー同期の性能を測る')
+    parser.add_argument('--sizes', default=','.join(str(size) for size in DEFAULT_SIZES),
+                        help='スケジュールの行数（カンマ区切り、例: 10,1000,100000）')
+    parser.add_argument('--latency', type=float, default=0.0,
+                        help='疑似サーバーのHTTPリクエストごとの遅延（秒）')
+    parser.add_argument('--quota', type=float, default=None,
+                        help='疑似サーバーの1秒あたりのAPI呼び出し上限')
+    parser.add_argument('--error-rate', type=float, default=0.0,
+                        help='疑似サーバーが503エラーを返す確率（0〜1）')
+    parser.add_argument('--seed', type=int, default=0, help='エラー注入の乱数シード')
+    parser.add_argument('--batch-size', type=int, default=sync_to_calendar.DEFAULT_BATCH_SIZE,
+                        help='1バッチあたりのリクエスト数')
+    parser.add_argument('--workers', type=int, default=1, help='並行実行するワーカー数')
+    parser.add_argument('--lean', action='store_true',
+                        help='軽量モード（変わったフィールドだけpatch、fields=で絞る）で同期')
+    parser.add_argument('--no-memory', action='store_true',
+                        help='ピークメモリを測らない（tracemallocの分だけ速くなる）')
+    parser.add_argument('--json', metavar='PATH', help='結果をJSONで保存')
+    parser.add_argument('--baseline', metavar='PATH', help='前回の結果（--json）と比較')
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE,
+                        help='--baseline で許容する経過時間・メモリの増加率')
+    parser.add_argument('--verbose', action='store_true', help='同期処理の出力を表示')
+    args = parser.parse_args()
+
+    sizes = [int(size) for size in args.sizes.split(',') if size.strip()]
+    options = {'latency': args.latency, 'quota_per_second': args.quota,
+               'error_rate': args.error_rate, 'seed': args.seed}
+
+    print("=" * 60)
+    print("⏱  カレンダー同期ベンチマーク")
+    print("=" * 60)
+    print(f"行数: {', '.join(f'{size:,}' for size in sizes)}  "
+          f"遅延: {args.latency}秒  バッチ: {args.batch_size}件  ワーカー: {args.workers}"
+          + ("  軽量モード" if args.lean else ""))
+
+    process, root_url = start_fake_calendar(options)
+    print(f"🧪 疑似サーバー: {root_url}\n")
+
+    results = []
+    try:
+        with tempfile.TemporaryDirectory(prefix='calendar-benchmark-') as workdir:
+            # コンパイル済みスケジュールも一時ディレクトリに置く（終了時に一緒に消える）
+            sync_to_calendar.COMPILED_SCHEDULE_DIR = Path(workdir) / 'compiled'
+            for rows in sizes:
+                results.extend(run_size(rows, root_url, workdir, args))
+    finally:
+        process.terminate()
+        process.join()
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({'options': dict(options, batch_size=args.batch_size, workers=args.workers,
+                                       lean=args.lean),
+                       'results': results}, f, ensure_ascii=False, indent=2)
+        print(f"\n💾 結果を保存しました: {args.json}")
+
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            regressions = compare_with_baseline(results, json.load(f), args.tolerance)
+        if regressions:
+            print("\n❌ 前回より性能が悪くなりました:")
+            for regression in regressions:
+                print(f"   - {regression}")
+            sys.exit(1)
+        print("\n✅ 前回の結果と比べて性能の劣化はありません")
+
+
+# ============================================================
+# スクリプトのエントリーポイント
+# ============================================================
+
+if __name__ == '__main__':
+    main()
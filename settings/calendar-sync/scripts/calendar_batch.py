@@ -0,0 +1,227 @@
+"""
+フルスタック学習プログラム - Googleカレンダー バッチ実行モジュール
+
+【このモジュールの目的】
+複数のAPIリクエスト（イベントの作成・更新など）を
+multipartのバッチリクエストにまとめて送信します。
+1件ずつ .execute() するとHTTPS往復がリクエスト数だけ発生しますが、
+バッチにまとめると最大50件を1回の往復で送れます。
+
+【処理の流れ】
+1. リクエストをbatch_size件ずつのバッチに分割
+2. バッチを送信し、各リクエストの結果をコールバックで受け取る
+3. バッチ全体が失敗した場合
+   - 大きすぎる（413 など）→ 半分に分割して再送
+   - レート制限・一時的なサーバーエラー（5xx）→ 全項目を再送対象にする
+   - それ以外（接続エラー・401・403 など）→ 分割しても同じ結果になるので、
+     残りのバッチも送らずに全項目をそのエラーとして返す
+4. レート制限（403 rateLimitExceeded / 429）や一時的なサーバーエラー（500/502/503/504）の項目は
+   calendar_retry.execute_with_retry() と同じく、ジッター付き指数バックオフで待ってから
+   MAX_RETRIES回まで再送（レート制限された場合は、バッチサイズも半分にする）
+
+【主な変数の依存関係】
+execute_batched(service, requests) → results（request_id → (response, error)）
+"""
+
+# ============================================================
+# ライブラリのインポート
+# ============================================================
+
+import time  # 再送前の待機用
+
+from calendar_quota import QUOTA
+from calendar_retry import (MAX_RETRIES, backoff_delay, get_error_status, get_method_name,
+                            is_retryable_error, is_throttle_error)
+from sync_metrics import METRICS
+
+# ============================================================
+# グローバル設定
+# ============================================================
+
+# Calendar APIの1バッチあたりの最大リクエスト数
+# （これを超えるとバッチ全体がエラーになる）
+MAX_BATCH_SIZE = 50
+
+# バッチが大きすぎることを表すHTTPステータス（413 Payload Too Large）
+BATCH_TOO_LARGE_STATUSES = {413}
+
+# バッチの件数・サイズの超過を表すエラーメッセージの語句
+# （googleapiclient の BatchError「Exceeded the maximum calls...」や、
+#   バッチエンドポイントの 400「too many requests in a batch」など）
+BATCH_TOO_LARGE_PHRASES = ('exceeded the maximum calls', 'too many', 'too large')
+
+
+# ============================================================
+# 関数定義
+# ============================================================
+
+def is_batch_too_large(error):
+    """
+    バッチ全体のエラーが「大きすぎる」ことによるものかを判定（分割すれば送れるエラー）
+
+    【判定条件】
+    - 413 Payload Too Large
+    - ステータスなし（送信前に googleapiclient が拒否）または 400 で、
+      メッセージが件数・サイズの超過を表す
+
+    【引数】
+    error: 例外オブジェクト
+
+    【戻り値】
+    True: 半分に分割して再送すべきエラー
+    """
+    status = get_error_status(error)
+    if status in BATCH_TOO_LARGE_STATUSES:
+        return True
+    if status not in (None, 400):
+        return False
+    content = getattr(error, 'content', None)
+    if isinstance(content, bytes):
+        content = content.decode('utf-8', 'replace')
+    message = f"{getattr(error, 'reason', '')} {content or ''} {error}".lower()
+    return any(phrase in message for phrase in BATCH_TOO_LARGE_PHRASES)
+
+
+def _run_batch(service, chunk, results, retry, reserved=False):
+    """
+    1つのバッチを送信し、結果をresults / retryに振り分ける
+
+    【処理フロー】
+    1. chunkのリクエストを1つのバッチにまとめて送信
+    2. 各リクエストの結果をコールバックで受け取る
+       - 成功 or 再送しても変わらないエラー → results に格納
+       - レート制限・一時的なサーバーエラー → retry に追加（後で再送）
+    3. バッチ全体が失敗した場合
+       - レート制限・一時的なサーバーエラーならchunk全体を再送対象にする
+       - 大きすぎる場合（is_batch_too_large）は半分に分割して再帰的に送信
+       - それ以外は例外をそのまま投げる（分割しても同じエラーになるため、
+         オフラインや無効なトークンで失敗するリクエストを増やさない）
+
+    【引数】
+    service: Google Calendar APIクライアント
+    chunk: [(request_id, make_request), ...] のリスト
+    results: 結果を格納する辞書（request_id → (response, error)）
+    retry: 再送する項目を追加する辞書（request_id → (make_request, error)、追加した順に再送）
+    reserved: Trueならchunkの予算は呼び出し側が QUOTA.reserve() で確保済み
+              （Falseなら送る前に QUOTA.charge() で記録する。分割・再送した分も数える）
+
+    【例外】
+    バッチ全体のエラー（再送できる場合・大きすぎる場合を除く）
+    """
+    # クォータはバッチ内のリクエストを1件ずつ数える（Calendar APIの数え方）
+    if not reserved:
+        QUOTA.charge(len(chunk))
+    factories = dict(chunk)
+    methods = {}  # request_id → メソッド名（計測用）
+    started = time.perf_counter()
+
+    def callback(request_id, response, error):
+        # バッチ内の各リクエストも1回の呼び出しとして記録（レイテンシはバッチ全体の値）
+        METRICS.record_call(methods[request_id], time.perf_counter() - started, error)
+        if error is not None and is_retryable_error(error):
+            METRICS.record_retry(methods[request_id])
+            retry[request_id] = (factories[request_id], error)
+        else:
+            results[request_id] = (response, error)
+
+    batch = service.new_batch_http_request(callback=callback)
+    for request_id, make_request in chunk:
+        request = make_request()
+        methods[request_id] = get_method_name(request)
+        batch.add(request, request_id=request_id)
+
+    try:
+        batch.execute()
+        METRICS.record_call('batch', time.perf_counter() - started)
+    except Exception as e:
+        METRICS.record_call('batch', time.perf_counter() - started, e)
+        # バッチ全体が失敗した場合、コールバック済みの項目は除いて扱う
+        remaining = [entry for entry in chunk
+                     if entry[0] not in results and entry[0] not in retry]
+
+        if is_retryable_error(e):
+            for request_id, make_request in remaining:
+                retry[request_id] = (make_request, e)
+        elif not is_batch_too_large(e):
+            # 接続エラー・401・403 など → 分割しても同じなのでそのまま投げる
+            raise
+        elif len(remaining) > 1:
+            # バッチが大きすぎる → 半分に分割して再送
+            middle = len(remaining) // 2
+            _run_batch(service, remaining[:middle], results, retry)
+            _run_batch(service, remaining[middle:], results, retry)
+        else:
+            for request_id, _ in remaining:
+                results[request_id] = (None, e)
+
+
+def execute_batched(service, requests, batch_size=MAX_BATCH_SIZE, on_throttle=None, reserved=False):
+    """
+    リクエストのリストをバッチにまとめて実行
+
+    【処理フロー】
+    1. requestsをbatch_size件ずつに分割して送信
+    2. レート制限・一時的なサーバーエラー（5xx）の項目があれば、backoff_delay()だけ待って再送
+       （レート制限された場合は、バッチサイズを半分にする）
+    3. MAX_RETRIES回再送しても失敗する項目は、最後のエラーを記録
+       （execute_with_retry()で1件ずつ送る場合と同じ回数・同じ待ち方）
+    4. バッチ全体が分割しても送れないエラー（接続エラー・401・403 など）で失敗したら、
+       残りのバッチは送らず、結果のない項目をすべてそのエラーとして記録する
+       （呼び出し側は項目ごとのエラーを見て、オフラインかどうかなどを判断できる）
+
+    【なぜファクトリー関数を受け取るのか】
+    再送時には新しいリクエストオブジェクトが必要になるため、
+    リクエストそのものではなく「リクエストを作る関数」を受け取る
+
+    【引数】
+    service: Google Calendar APIクライアント
+    requests: [(request_id, make_request), ...] のリスト
+              make_request() は未実行のAPIリクエストを返す関数
+    batch_size: 1バッチあたりのリクエスト数（最大MAX_BATCH_SIZE）
+    on_throttle: レート制限されたときに呼ぶ関数（同時実行数の調整用）
+    reserved: Trueなら1回目の送信の予算は呼び出し側が QUOTA.reserve() で確保済み
+              （再送・分割した分は、送るたびに QUOTA.charge() で記録する）
+
+    【戻り値】
+    results: {request_id: (response, error)} の辞書
+             成功時はerror=None、失敗時はresponse=None
+    """
+    results = {}
+    pending = list(requests)
+    size = max(1, min(batch_size, MAX_BATCH_SIZE))
+    attempt = 0
+
+    while pending:
+        retry = {}
+        try:
+            for start in range(0, len(pending), size):
+                _run_batch(service, pending[start:start + size], results, retry,
+                           reserved=reserved and not attempt)
+        except Exception as e:
+            # 同じエラーになるだけなので、残りのバッチも再送もしない
+            for request_id, _ in requests:
+                if request_id not in results:
+                    results[request_id] = (None, e)
+            break
+
+        if not retry:
+            break
+
+        throttled = any(is_throttle_error(error) for _, error in retry.values())
+        if throttled and on_throttle:
+            on_throttle()
+
+        attempt += 1
+        if attempt > MAX_RETRIES:
+            # 再送を諦めた項目は、最後に受け取ったエラーとして記録
+            for request_id, (_, error) in retry.items():
+                results[request_id] = (None, error)
+            break
+
+        # 待機してから再送（レート制限された場合はバッチサイズを半分にする）
+        if throttled:
+            size = max(1, size // 2)
+        time.sleep(backoff_delay(attempt))
+        pending = [(request_id, make_request) for request_id, (make_request, _) in retry.items()]
+
+    return results
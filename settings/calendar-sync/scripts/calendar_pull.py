@@ -0,0 +1,93 @@
+"""
+フルスタック学習プログラム - Googleカレンダー 変更取得モジュール
+
+【このモジュールの目的】
+Calendar APIの同期トークン（nextSyncToken）を使って、
+前回の取得以降に変更されたイベントだけを取得します。
+カレンダーがどれだけ大きくなっても、変更がなければ1回の呼び出しで終わります。
+
+【処理の流れ】
+1. 保存済みの同期トークンがあれば、それを使って差分だけ取得
+2. トークンがない、または期限切れ（410 Gone）なら全件取得
+3. 最後のページに含まれる nextSyncToken を次回用に返す
+
+【主な変数の依存関係】
+list_changed_events(service, calendar_id, sync_token)
+    → (events, next_sync_token, full_resync)
+"""
+
+# ============================================================
+# ライブラリのインポート
+# ============================================================
+
+from calendar_retry import execute_with_retry, get_error_status
+
+
+# ============================================================
+# 関数定義
+# ============================================================
+
+def list_events_since(service, calendar_id, sync_token=None):
+    """
+    イベント一覧をページングしながら取得し、次回用の同期トークンを返す
+
+    【引数】
+    service: Google Calendar APIクライアント
+    calendar_id: カレンダーID
+    sync_token: 前回の nextSyncToken（Noneなら全件取得）
+
+    【戻り値】
+    (events, next_sync_token):
+        events: イベントのリスト（差分取得では削除済み=status 'cancelled' も含む）
+        next_sync_token: 次回の差分取得に使うトークン
+    """
+    events = []
+    page_token = None
+
+    while True:
+        # syncTokenを指定するときは、timeMinなど他の絞り込み条件は指定できない
+        params = {'calendarId': calendar_id, 'maxResults': 2500, 'pageToken': page_token}
+        if sync_token:
+            params['syncToken'] = sync_token
+
+        events_result = execute_with_retry(lambda: service.events().list(**params))
+        events.extend(events_result.get('items', []))
+
+        # nextPageTokenがなくなった最後のページに nextSyncToken が入っている
+        page_token = events_result.get('nextPageToken')
+        if not page_token:
+            return events, events_result.get('nextSyncToken')
+
+
+def list_changed_events(service, calendar_id, sync_token=None):
+    """
+    前回の取得以降に変更されたイベントを取得
+
+    【処理フロー】
+    1. sync_tokenがあれば差分取得
+    2. トークンが期限切れ（410 Gone）なら、全件取得にやり直す
+    3. sync_tokenがなければ全件取得
+
+    【引数】
+    service: Google Calendar APIクライアント
+    calendar_id: カレンダーID
+    sync_token: 前回の nextSyncToken（Noneなら全件取得）
+
+    【戻り値】
+    (events, next_sync_token, full_resync):
+        events: 変更されたイベントのリスト
+        next_sync_token: 次回用のトークン
+        full_resync: 全件取得した場合はTrue
+    """
+    if sync_token:
+        try:
+            events, next_sync_token = list_events_since(service, calendar_id, sync_token)
+            return events, next_sync_token, False
+        except Exception as e:
+            # 410 Gone = トークンが期限切れ → 全件取得からやり直す
+            if get_error_status(e) != 410:
+                raise
+            print("⚠️  同期トークンの期限が切れたため、全件を取得し直します")
+
+    events, next_sync_token = list_events_since(service, calendar_id)
+    return events, next_sync_token, True
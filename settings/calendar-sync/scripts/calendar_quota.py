@@ -0,0 +1,250 @@
+"""
+フルスタック学習プログラム - Googleカレンダー クォータ予算・優先度モジュール
+
+【このモジュールの目的】
+大きなスケジュールや複数人の一括同期では、Calendar APIの
+「1分あたり」「1日あたり」のクォータに達してしまうことがあります。
+CSVの順番に書き込むと、何十週も先のイベントが先にクォータを使い切り、
+来週のイベントの更新が届かないことがあります。
+
+- 書き込みを「開始日が近い順」（今週 → 来週 → … → 過ぎた週）に並べる
+- 読み取り（一覧取得・カレンダーの確認）・再送も含め、すべてのAPI呼び出しを予算で数える
+  （書き込みは reserve() で送る前に確保、それ以外は calendar_retry / calendar_batch が
+    送るたびに charge() で記録する）
+- 1分あたりの予算: 上限に達したら、空くまで待ってから送る
+  （サーバーに押し返される前に自分で速度を落とす）
+- 1日あたりの予算: 使い切ったら残りは送らず、次回以降の実行に回す
+  （送らなかった書き込みはアウトボックスに残る）
+
+【予算の共有】
+- 1分あたり: 同じプロセスのスレッド（--workers・--manifest の全員）で共有
+- 1日あたり: settings/credentials/quota-usage.json に使った回数を記録し、
+  ファイルロックで別のプロセス（cronと手動の同期など）とも共有
+  （日付はUTCで区切る）
+
+【主な変数の依存関係】
+QUOTA（モジュール全体で共有）→ configure(per_minute, per_day)
+order_by_urgency(mutations) → 開始日が近い順に並べた書き込み
+QUOTA.reserve(count) → 送ってよい件数（1分あたりの上限に達していれば待つ）
+QUOTA.charge(count) → 予算の残りに関係なく記録（読み取り・再送。1分あたりの上限に達していれば待つ）
+"""
+
+# ============================================================
+# ライブラリのインポート
+# ============================================================
+
+import json  # 1日の使用回数の記録
+import os  # 記録ファイルの置き換え
+import tempfile  # 記録ファイルの一時書き込み
+import threading  # スレッド間の排他制御
+import time  # 1分あたりの予算の計測
+from collections import deque  # 直近1分間の送信記録
+from datetime import date, datetime, timezone  # 開始日の比較・日付の区切り
+from pathlib import Path  # ファイルパス操作用
+
+from credential_broker import file_lock
+
+# ============================================================
+# グローバル設定
+# ============================================================
+
+# 1日の使用回数の記録ファイル（settings/credentials/quota-usage.json）
+DEFAULT_USAGE_PATH = Path(__file__).parent.parent.parent / 'credentials' / 'quota-usage.json'
+
+# 1分あたりの予算を数える期間（単位: 秒）
+MINUTE_SECONDS = 60
+
+
+# ============================================================
+# 関数定義
+# ============================================================
+
+def urgency_key(mutation, today):
+    """
+    書き込みの優先度（小さいほど先に送る）
+
+    【順番】
+    1. 今週・これからの週: 開始日が近い順（今週のイベントは開始日が過去なので最初）
+    2. 過ぎた週: 最近の週から順に
+    3. 日付のない書き込み（削除など）: 最後
+
+    【引数】
+    mutation: 書き込み操作（body の start.date / end.date を使う）
+    today: 基準日（date）
+
+    【戻り値】
+    key: sorted() のキーにするタプル
+    """
+    body = mutation.get('body') or {}
+    start = body.get('start', {}).get('date')
+    end = body.get('end', {}).get('date')
+    if not start or not end:
+        return (2, 0)
+    start_day = date.fromisoformat(start)
+    if date.fromisoformat(end) > today:
+        return (0, (start_day - today).days)
+    return (1, (today - start_day).days)
+
+
+def order_by_urgency(mutations, today=None):
+    """
+    書き込みを開始日が近い順に並べる（urgency_key()を参照）
+
+    同じ優先度の書き込みは元の順番のまま（安定ソート）
+
+    【引数】
+    mutations: 書き込み操作のリスト
+    today: 基準日（テスト用、Noneなら今日）
+
+    【戻り値】
+    ordered: 並べ替えた新しいリスト
+    """
+    today = today or date.today()
+    return sorted(mutations, key=lambda mutation: urgency_key(mutation, today))
+
+
+def utc_today():
+    """1日の予算を区切る日付（UTC）"""
+    return datetime.now(timezone.utc).date().isoformat()
+
+
+# ============================================================
+# クラス定義
+# ============================================================
+
+class QuotaBudget:
+    """
+    書き込みのAPI呼び出し回数の予算
+
+    【保持するデータ】
+    per_minute: 1分あたりの上限（Noneなら制限なし）
+    per_day: 1日あたりの上限（Noneなら制限なし）
+    usage_path: 1日の使用回数の記録ファイル
+    window: 直近1分間に送った (時刻, 件数) の記録
+
+    【使い方】
+    QUOTA.configure(per_minute=500, per_day=50000)
+    granted = QUOTA.reserve(len(chunk))  # 送ってよい件数（必要なら待つ）
+    send(chunk[:granted])                 # 残りは次回に回す
+    """
+
+    def __init__(self, per_minute=None, per_day=None, usage_path=DEFAULT_USAGE_PATH):
+        self.lock = threading.Lock()
+        self.window = deque()
+        self.configure(per_minute, per_day, usage_path)
+
+    def configure(self, per_minute=None, per_day=None, usage_path=None):
+        """
+        予算を設定（0以下はNoneと同じく制限なし）
+
+        【引数】
+        per_minute: 1分あたりの上限
+        per_day: 1日あたりの上限
+        usage_path: 1日の使用回数の記録ファイル（Noneなら変えない）
+        """
+        self.per_minute = per_minute if per_minute and per_minute > 0 else None
+        self.per_day = per_day if per_day and per_day > 0 else None
+        if usage_path is not None:
+            self.usage_path = Path(usage_path)
+
+    def chunk_size(self, size):
+        """1回にまとめて送る件数を、1分あたりの上限以下にする"""
+        return min(size, self.per_minute) if self.per_minute else size
+
+    def reserve(self, count):
+        """
+        count件分の予算を確保する
+
+        【処理フロー】
+        1. 1日の予算の残りから、確保できる件数を決めて記録する
+        2. 確保した件数を送ると1分あたりの上限を超える場合は、空くまで待つ
+
+        【引数】
+        count: 送りたい件数
+
+        【戻り値】
+        granted: 送ってよい件数（0〜count。1日の予算を使い切っていれば0）
+        """
+        if count <= 0:
+            return 0
+        granted = count
+        if self.per_day is not None:
+            granted = self._take_daily(count, limited=True)
+        if granted:
+            self._wait_for_minute(granted)
+        return granted
+
+    def charge(self, count):
+        """
+        予算の残りに関係なく、count件を使ったことを記録する（必要なら待つ）
+
+        読み取り・再送・404で作成し直すなど、reserve()で確保しない呼び出し用
+        （calendar_retry.execute_with_retry() と calendar_batch が送るたびに呼ぶ）
+        """
+        if count <= 0:
+            return
+        if self.per_day is not None:
+            self._take_daily(count, limited=False)
+        self._wait_for_minute(count)
+
+    def remaining_today(self):
+        """
+        1日の予算の残り
+
+        【戻り値】
+        remaining: 残りの件数（1日の上限がなければNone）
+        """
+        if self.per_day is None:
+            return None
+        return max(0, self.per_day - self._read_usage().get('calls', 0))
+
+    def _read_usage(self):
+        # 記録ファイルを読む（日付が変わっていれば0回から数え直す）
+        try:
+            with open(self.usage_path, 'r', encoding='utf-8') as f:
+                usage = json.load(f)
+        except (OSError, ValueError):
+            return {'date': utc_today(), 'calls': 0}
+        if not isinstance(usage, dict) or usage.get('date') != utc_today():
+            return {'date': utc_today(), 'calls': 0}
+        return usage
+
+    def _take_daily(self, count, limited):
+        # 1日の使用回数を、ファイルロックを取って読み・書きする（別のプロセスと共有）
+        with self.lock, file_lock(self.usage_path.with_name(self.usage_path.name + '.lock')):
+            usage = self._read_usage()
+            granted = min(count, max(0, self.per_day - usage['calls'])) if limited else count
+            if granted:
+                usage['calls'] += granted
+                self.usage_path.parent.mkdir(parents=True, exist_ok=True)
+                fd, temp_path = tempfile.mkstemp(dir=self.usage_path.parent,
+                                                 prefix=f'.{self.usage_path.name}.')
+                try:
+                    with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                        json.dump(usage, f)
+                    os.replace(temp_path, self.usage_path)
+                except BaseException:
+                    os.unlink(temp_path)
+                    raise
+        return granted
+
+    def _wait_for_minute(self, count):
+        # 直近1分間の送信件数 + count が上限を超えるなら、古い記録が1分を過ぎるまで待つ
+        # （ロックを持ったまま待つので、他のスレッドも順番に待つ）
+        if self.per_minute is None:
+            return
+        count = min(count, self.per_minute)
+        with self.lock:
+            while True:
+                now = time.monotonic()
+                while self.window and self.window[0][0] <= now - MINUTE_SECONDS:
+                    self.window.popleft()
+                used = sum(sent for _, sent in self.window)
+                if used + count <= self.per_minute:
+                    self.window.append((now, count))
+                    return
+                time.sleep(self.window[0][0] + MINUTE_SECONDS - now)
+
+
+# プロセス全体で共有する予算（sync-to-calendar.py の --quota-per-minute / --quota-per-day で設定）
+QUOTA = QuotaBudget()
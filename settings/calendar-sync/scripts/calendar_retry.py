@@ -0,0 +1,259 @@
+"""
+フルスタック学習プログラム - Googleカレンダー リトライモジュール
+
+【このモジュールの目的】
+Google Calendar APIのレート制限（403 rateLimitExceeded / 429）や
+一時的なサーバーエラー（5xx）を判定し、
+ジッター付き指数バックオフで再送します。
+また、サーバーから押し返されている間は同時実行数を自動的に減らす
+AdaptiveConcurrency を提供します。
+
+【主な変数の依存関係】
+execute_with_retry(make_request) → response（失敗が続けば例外）
+AdaptiveConcurrency(max_workers) → acquire()/release() で同時実行数を制御
+"""
+
+# ============================================================
+# ライブラリのインポート
+# ============================================================
+
+import json  # エラーレスポンスの解析用
+import random  # バックオフのジッター用
+import threading  # 同時実行数の制御用
+import time  # 再送前の待機用
+
+from calendar_quota import QUOTA
+from sync_metrics import METRICS
+
+# ============================================================
+# グローバル設定
+# ============================================================
+
+# レート制限を表すエラー理由（403エラーの reason フィールド）
+THROTTLE_REASONS = {'rateLimitExceeded', 'userRateLimitExceeded'}
+
+# 再送すべき一時的なサーバーエラー
+RETRYABLE_STATUSES = {500, 502, 503, 504}
+
+# バックオフ設定（単位: 秒）
+BACKOFF_BASE_SECONDS = 1.0   # 1回目の待機時間の上限
+BACKOFF_MAX_SECONDS = 32.0   # 待機時間の上限
+
+# 1リクエストあたりの最大再送回数
+MAX_RETRIES = 5
+
+
+# ============================================================
+# 関数定義
+# ============================================================
+
+def get_error_status(error):
+    """
+    APIエラーからHTTPステータスコードを取得
+
+    【引数】
+    error: 例外オブジェクト（googleapiclient.errors.HttpError など）
+
+    【戻り値】
+    status: ステータスコード（整数）、取得できない場合はNone
+    """
+    resp = getattr(error, 'resp', None)
+    status = getattr(resp, 'status', None)
+    return int(status) if status is not None else None
+
+
+def get_error_reasons(error):
+    """
+    APIエラーのレスポンス本文から reason の一覧を取得
+
+    【レスポンス本文の例】
+    {"error": {"errors": [{"reason": "rateLimitExceeded", ...}], ...}}
+
+    【引数】
+    error: 例外オブジェクト
+
+    【戻り値】
+    reasons: reason文字列のセット（解析できない場合は空）
+    """
+    content = getattr(error, 'content', None)
+    if not content:
+        return set()
+
+    try:
+        if isinstance(content, bytes):
+            content = content.decode('utf-8')
+        details = json.loads(content).get('error', {})
+    except (ValueError, AttributeError):
+        return set()
+
+    return {item.get('reason') for item in details.get('errors', []) if item.get('reason')}
+
+
+def is_throttle_error(error):
+    """
+    レート制限エラーかどうかを判定
+
+    【判定条件】
+    - 429 Too Many Requests
+    - 403 で reason が rateLimitExceeded / userRateLimitExceeded
+
+    【引数】
+    error: 例外オブジェクト
+
+    【戻り値】
+    True: 時間をおいて再送すべきエラー
+    """
+    status = get_error_status(error)
+    if status == 429:
+        return True
+    if status == 403:
+        return bool(get_error_reasons(error) & THROTTLE_REASONS)
+    return False
+
+
+def is_retryable_error(error):
+    """
+    再送すれば成功する可能性があるエラーかどうかを判定
+
+    【判定条件】
+    - レート制限エラー（is_throttle_error）
+    - 一時的なサーバーエラー（500, 502, 503, 504）
+
+    【引数】
+    error: 例外オブジェクト
+
+    【戻り値】
+    True: 再送すべきエラー
+    """
+    return is_throttle_error(error) or get_error_status(error) in RETRYABLE_STATUSES
+
+
+def backoff_delay(attempt):
+    """
+    ジッター付き指数バックオフの待機時間を計算
+
+    【ロジック】
+    上限 = BACKOFF_BASE_SECONDS × 2^(attempt-1)（BACKOFF_MAX_SECONDSまで）
+    待機時間 = 0〜上限 のランダムな値（Full Jitter）
+
+    ランダムにすることで、複数のワーカーが同時に再送して
+    再びレート制限される「一斉再送」を防ぐ
+
+    【引数】
+    attempt: 何回目の再送か（1から始まる）
+
+    【戻り値】
+    delay: 待機時間（秒）
+    """
+    ceiling = min(BACKOFF_MAX_SECONDS, BACKOFF_BASE_SECONDS * (2 ** (attempt - 1)))
+    return random.uniform(0, ceiling)
+
+
+def get_method_name(request):
+    """
+    APIリクエストのメソッド名を取得（計測用）
+
+    【例】
+    service.events().list(...) → 'calendar.events.list'
+    """
+    return getattr(request, 'methodId', None) or 'unknown'
+
+
+def execute_with_retry(make_request, max_retries=MAX_RETRIES, on_throttle=None, reserved=False):
+    """
+    APIリクエストを実行し、再送可能なエラーならバックオフして再送
+
+    【処理フロー】
+    1. make_request() でリクエストを作成し、クォータ予算（QUOTA）に1回分を記録して実行
+       （1分あたりの上限に達していれば待つ。再送も1回として数える）
+    2. 成功したらレスポンスを返す
+    3. 再送可能なエラーなら backoff_delay() だけ待って再送
+    4. max_retries回を超えるか、再送不可能なエラーなら例外を投げる
+    （呼び出し回数・レイテンシ・再送回数は METRICS に記録する）
+
+    【引数】
+    make_request: 未実行のAPIリクエストを返す関数
+    max_retries: 最大再送回数
+    on_throttle: レート制限されたときに呼ぶ関数（同時実行数の調整用）
+    reserved: Trueなら1回目の予算は呼び出し側が QUOTA.reserve() で確保済み（再送分だけ記録する）
+
+    【戻り値】
+    response: APIレスポンス
+    """
+    attempt = 0
+    while True:
+        request = make_request()
+        method = get_method_name(request)
+        if attempt or not reserved:
+            QUOTA.charge(1)
+        started = time.perf_counter()
+        try:
+            response = request.execute()
+            METRICS.record_call(method, time.perf_counter() - started)
+            return response
+        except Exception as e:
+            METRICS.record_call(method, time.perf_counter() - started, e)
+            attempt += 1
+            if attempt > max_retries or not is_retryable_error(e):
+                raise
+            if on_throttle and is_throttle_error(e):
+                on_throttle()
+            METRICS.record_retry(method)
+            time.sleep(backoff_delay(attempt))
+
+
+# ============================================================
+# クラス定義
+# ============================================================
+
+class AdaptiveConcurrency:
+    """
+    サーバーの状態に合わせて同時実行数を調整するリミッター
+
+    【ロジック（AIMD: 加算増加・乗算減少）】
+    - レート制限されたら上限を半分にする（最小1）
+    - 上限と同じ回数だけ連続で成功したら上限を1増やす（max_workersまで）
+
+    【使い方】
+    limiter.acquire()  # 上限に空きができるまで待つ
+    try:
+        ...APIリクエスト...
+        limiter.on_success()
+    finally:
+        limiter.release()
+    """
+
+    def __init__(self, max_workers):
+        self.max_workers = max(1, max_workers)
+        self.limit = self.max_workers  # 現在の同時実行数の上限
+        self.active = 0                # 実行中のリクエスト数
+        self.successes = 0             # 上限を増やすまでの成功回数
+        self.condition = threading.Condition()
+
+    def acquire(self):
+        """実行中のリクエスト数が上限未満になるまで待つ"""
+        with self.condition:
+            while self.active >= self.limit:
+                self.condition.wait()
+            self.active += 1
+
+    def release(self):
+        """リクエストの実行が終わったことを通知"""
+        with self.condition:
+            self.active -= 1
+            self.condition.notify_all()
+
+    def on_success(self):
+        """成功を記録し、必要なら上限を1増やす"""
+        with self.condition:
+            self.successes += 1
+            if self.successes >= self.limit and self.limit < self.max_workers:
+                self.limit += 1
+                self.successes = 0
+                self.condition.notify_all()
+
+    def on_throttle(self):
+        """レート制限を記録し、上限を半分にする"""
+        with self.condition:
+            self.limit = max(1, self.limit // 2)
+            self.successes = 0
@@ -0,0 +1,81 @@
+"""
+フルスタック学習プログラム - Googleカレンダー 並行実行モジュール
+
+【このモジュールの目的】
+APIリクエストを複数のワーカースレッドで並行して実行します。
+
+【スレッドごとにAPIクライアントを作る理由】
+Google APIクライアントが内部で使う httplib2 はスレッドセーフではないため、
+1つのクライアントを複数スレッドで共有すると通信が壊れることがある。
+そこで各ワーカースレッドが service_factory() で自分専用の
+クライアント（＝自分専用のHTTP接続）を作って使う。
+
+【処理の流れ】
+1. ThreadPoolExecutorでworkers個のスレッドを起動
+2. 各スレッドは初回だけservice_factory()でクライアントを作成
+3. AdaptiveConcurrencyで同時実行数を制御しながらタスクを実行
+4. 結果をタスクと同じ順番で返す
+
+【主な変数の依存関係】
+run_in_workers(tasks, run_task, service_factory, workers) → results
+"""
+
+# ============================================================
+# ライブラリのインポート
+# ============================================================
+
+import threading  # スレッドごとのクライアント保持用
+from concurrent.futures import ThreadPoolExecutor  # ワーカースレッド
+
+from calendar_retry import AdaptiveConcurrency
+
+
+# ============================================================
+# 関数定義
+# ============================================================
+
+def run_in_workers(tasks, run_task, service_factory, workers):
+    """
+    タスクを複数のワーカースレッドで並行実行
+
+    【処理フロー】
+    1. スレッドごとのクライアントを保持する thread_local を用意
+    2. 各タスクについて
+       - リミッターの空きを待つ
+       - run_task(service, task, limiter) を実行
+       - 成功/失敗を (response, error) として記録
+    3. すべてのタスクの完了を待って結果を返す
+
+    【引数】
+    tasks: 実行するタスクのリスト
+    run_task: タスクを実行する関数 run_task(service, task, limiter) → response
+              レート制限を受けたら limiter.on_throttle() を呼ぶ
+    service_factory: 新しいAPIクライアントを作る関数（スレッドごとに1回呼ばれる）
+    workers: ワーカースレッド数（同時実行数の上限）
+
+    【戻り値】
+    results: [(response, error), ...] のリスト（tasksと同じ順番）
+    """
+    thread_local = threading.local()
+    limiter = AdaptiveConcurrency(workers)
+
+    def get_service():
+        # このスレッド専用のクライアントがなければ作成
+        if not hasattr(thread_local, 'service'):
+            thread_local.service = service_factory()
+        return thread_local.service
+
+    def worker(task):
+        limiter.acquire()
+        try:
+            response = run_task(get_service(), task, limiter)
+            limiter.on_success()
+            return (response, None)
+        except Exception as e:
+            return (None, e)
+        finally:
+            limiter.release()
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        # executor.map() はタスクと同じ順番で結果を返す
+        return list(executor.map(worker, tasks))
@@ -0,0 +1,313 @@
+"""
+フルスタック学習プログラム - コンパイル済みスケジュール（バイナリスナップショット）
+
+【このモジュールの目的】
+dev-schedule.csvを読むたびに、文字列 → 整数の変換と週の日付計算を全行やり直すのをやめ、
+型付きの値・週の開始日/終了日・イベントのキーを計算済みのバイナリファイルに保存します。
+CSVが変わっていなければ、同期もリスケジュールもこのファイルを読むだけで済みます。
+
+【ファイル形式】（リトルエンディアン、mmapでそのまま読める）
+1. ヘッダー: マジック・バージョン・列数・行数、CSVの更新時刻・サイズ・SHA-256
+2. 列名: UTF-8の文字列を NUL（\\0）でつないだもの
+3. レコード: 1行16バイトの固定長
+   （年・月・週、開始日・終了日の通し日数、文字列領域での位置）
+4. キーの索引: キーの昇順に並べた行番号（二分探索でキーから行を引く）
+5. 文字列領域: 全行の各列の値と、行末にキーを NUL でつないだUTF-8
+
+【キャッシュの判定】
+- CSVの更新時刻とサイズがヘッダーと同じ → そのまま使う
+- 更新時刻だけ違う（保存し直しただけ、git checkout など）→ SHA-256を比べ、
+  同じならヘッダーの更新時刻を書き換えて使う
+- それ以外 → 呼び出し側が作り直す
+
+【主な変数の依存関係】
+open_compiled(path, csv_path) → CompiledSchedule（古ければNone）
+write_compiled(path, fieldnames, rows, csv_stat, digest)
+CompiledSchedule.rows() / .find(key) / .values(row) / .record(row)
+"""
+
+# ============================================================
+# ライブラリのインポート
+# ============================================================
+
+import hashlib  # CSVのハッシュ
+import mmap  # ファイルをメモリに割り当てて読む
+import os  # ファイルの置き換え・更新時刻
+import struct  # バイナリの読み書き
+import tempfile  # 一時ファイルへの書き出し
+from array import array  # キーの索引
+from pathlib import Path  # ファイルパス操作用
+
+# ============================================================
+# グローバル設定
+# ============================================================
+
+# ファイルの先頭8バイト（このモジュールのファイルかどうかの確認）
+MAGIC = b'FSLSCHED'
+
+# 形式のバージョン（形式やキーの決め方を変えたら上げる → 古いファイルは作り直される）
+FORMAT_VERSION = 2
+
+# ヘッダー: マジック, バージョン, 列数, CSVの更新時刻(ns), CSVのサイズ, SHA-256,
+#           行数, 列名の長さ, 文字列領域の長さ
+HEADER = struct.Struct('<8sHHqq32sIIQ')
+
+# ヘッダーのうち、CSVの更新時刻とサイズの位置（ハッシュが同じときに書き換える）
+STAT_OFFSET = 12
+STAT = struct.Struct('<qq')
+
+# レコード: 年, 月, 週, 開始日の通し日数, 終了日の通し日数, 文字列領域での位置
+RECORD = struct.Struct('<HBBiiI')
+
+# 値の区切り文字（CSVの値には含まれない前提。含まれる場合は書き出さない）
+SEPARATOR = '\0'
+
+# ハッシュ計算で一度に読み込むサイズ（単位: バイト）
+READ_CHUNK_BYTES = 64 * 1024
+
+
+# ============================================================
+# 関数定義
+# ============================================================
+
+def file_digest(csv_path):
+    """
+    CSVファイルのSHA-256を計算（少しずつ読むので大きなファイルでもメモリを使わない）
+
+    【戻り値】
+    digest: 32バイトのハッシュ
+    """
+    digest = hashlib.sha256()
+    with open(csv_path, 'rb') as f:
+        for block in iter(lambda: f.read(READ_CHUNK_BYTES), b''):
+            digest.update(block)
+    return digest.digest()
+
+
+def write_compiled(path, fieldnames, rows, csv_stat, digest):
+    """
+    コンパイル済みスケジュールを書き出す
+
+    【処理フロー】
+    1. 各行の値とキーを NUL でつないで文字列領域を作り、行ごとの位置を記録
+    2. キーの昇順に行番号を並べて索引を作る
+    3. 一時ファイルにヘッダー・列名・レコード・索引・文字列領域を書き、path と置き換える
+       （読み込み中の別のプロセスは古いファイルを最後まで読める）
+
+    【引数】
+    path: 出力先のパス
+    fieldnames: CSVの列名のリスト
+    rows: [(year, month, week, start_ordinal, end_ordinal, values, key), ...]
+          values は fieldnames と同じ順番・同じ数の文字列のリスト
+    csv_stat: 元のCSVの os.stat() の結果
+    digest: 元のCSVの file_digest()
+
+    【例外】
+    ValueError: 値に NUL 文字が含まれる（この形式では保存できない）
+    """
+    # ステップ1: 文字列領域とレコード
+    records = bytearray()
+    chunks = []
+    offset = 0
+    for year, month, week, start_ordinal, end_ordinal, values, key in rows:
+        text = SEPARATOR.join([*values, key])
+        if text.count(SEPARATOR) != len(values):
+            raise ValueError('値にNUL文字が含まれています')
+        encoded = text.encode('utf-8')
+        records += RECORD.pack(year, month, week, start_ordinal, end_ordinal, offset)
+        chunks.append(encoded)
+        offset += len(encoded) + 1
+    blob = SEPARATOR.encode('utf-8').join(chunks)
+
+    # ステップ2: キーの索引
+    order = sorted(range(len(rows)), key=lambda row: rows[row][6])
+    key_index = array('I', order)
+
+    names = SEPARATOR.join(fieldnames).encode('utf-8')
+    header = HEADER.pack(MAGIC, FORMAT_VERSION, len(fieldnames), csv_stat.st_mtime_ns,
+                         csv_stat.st_size, digest, len(rows), len(names), len(blob))
+
+    # ステップ3: 一時ファイルに書いて置き換え
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(dir=path.parent, prefix=f'.{path.name}.')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(header)
+            f.write(names)
+            f.write(records)
+            f.write(key_index.tobytes())
+            f.write(blob)
+        os.replace(temp_path, path)
+    except BaseException:
+        os.unlink(temp_path)
+        raise
+
+
+def open_compiled(path, csv_path):
+    """
+    CSVと一致するコンパイル済みスケジュールを開く
+
+    【処理フロー】
+    1. ヘッダーを読み、マジック・バージョンを確認
+    2. CSVの更新時刻とサイズが同じなら開く
+    3. サイズが同じで更新時刻だけ違う場合は、SHA-256が同じなら
+       ヘッダーの更新時刻を書き換えて開く（次回はハッシュ計算なし）
+
+    【引数】
+    path: コンパイル済みスケジュールのパス
+    csv_path: 元のCSVのパス
+
+    【戻り値】
+    compiled: CompiledSchedule（ファイルがない・古い・壊れている場合はNone）
+    """
+    csv_stat = os.stat(csv_path)
+    try:
+        with open(path, 'rb') as f:
+            header = f.read(HEADER.size)
+    except OSError:
+        return None
+    if len(header) < HEADER.size:
+        return None
+    magic, version, _, mtime_ns, size, digest, _, _, _ = HEADER.unpack(header)
+    if magic != MAGIC or version != FORMAT_VERSION:
+        return None
+
+    if (mtime_ns, size) != (csv_stat.st_mtime_ns, csv_stat.st_size):
+        if size != csv_stat.st_size or file_digest(csv_path) != digest:
+            return None
+        # 内容は同じ → 更新時刻だけ記録し直す（書き換えられなくても結果は同じ）
+        try:
+            with open(path, 'r+b') as f:
+                f.seek(STAT_OFFSET)
+                f.write(STAT.pack(csv_stat.st_mtime_ns, csv_stat.st_size))
+        except OSError:
+            pass
+
+    try:
+        return CompiledSchedule(path)
+    except (OSError, ValueError):
+        return None
+
+
+# ============================================================
+# クラス定義
+# ============================================================
+
+class CompiledSchedule:
+    """
+    コンパイル済みスケジュールの読み込み（mmapで必要な部分だけ読む）
+
+    【保持するデータ】
+    fieldnames: CSVの列名のリスト
+    count: 行数
+
+    【使い方】
+    with open_compiled(path, csv_path) as compiled:
+        for record, values, key in compiled.rows():  # 全行（まとめてデコードするので速い）
+            ...
+        row = compiled.find('2025-12-1')  # キーから行番号（二分探索）
+        values = compiled.values(row)     # その行の値だけデコード
+    """
+
+    def __init__(self, path):
+        with open(path, 'rb') as f:
+            self.mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            (_, _, columns, _, _, _, self.count,
+             names_length, blob_length) = HEADER.unpack_from(self.mm, 0)
+            position = HEADER.size
+            names = bytes(self.mm[position:position + names_length])
+            self.fieldnames = names.decode('utf-8').split(SEPARATOR)
+            if len(self.fieldnames) != columns:
+                raise ValueError('列名の数が一致しません')
+            position += names_length
+            self.records_offset = position
+            position += self.count * RECORD.size
+            self.key_index = array('I')
+            self.key_index.frombytes(self.mm[position:position + self.count * 4])
+            position += self.count * 4
+            self.blob_offset = position
+            self.blob_length = blob_length
+            if position + blob_length != len(self.mm):
+                raise ValueError('ファイルの長さが一致しません')
+        except (struct.error, ValueError, UnicodeDecodeError):
+            self.mm.close()
+            raise ValueError(f'コンパイル済みスケジュールが壊れています: {path}')
+
+    def __len__(self):
+        return self.count
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        """ファイルの割り当てを解除"""
+        self.mm.close()
+
+    def record(self, row):
+        """
+        行の型付きの値を返す
+
+        【戻り値】
+        (year, month, week, start_ordinal, end_ordinal, blob_offset)
+        """
+        return RECORD.unpack_from(self.mm, self.records_offset + row * RECORD.size)
+
+    def values_and_key(self, row):
+        """行の値（列名と同じ順番）とキーを返す"""
+        start = self.record(row)[5]
+        if row + 1 < self.count:
+            end = self.record(row + 1)[5] - 1
+        else:
+            end = self.blob_length
+        begin = self.blob_offset
+        parts = bytes(self.mm[begin + start:begin + end]).decode('utf-8').split(SEPARATOR)
+        return parts[:-1], parts[-1]
+
+    def values(self, row):
+        """行の値（列名と同じ順番の文字列のリスト）を返す"""
+        return self.values_and_key(row)[0]
+
+    def key(self, row):
+        """行のキーを返す"""
+        return self.values_and_key(row)[1]
+
+    def find(self, key):
+        """
+        キーから行番号を求める（キーの索引を二分探索）
+
+        【戻り値】
+        row: 行番号（見つからなければNone）
+        """
+        low, high = 0, self.count
+        while low < high:
+            middle = (low + high) // 2
+            if self.key(self.key_index[middle]) < key:
+                low = middle + 1
+            else:
+                high = middle
+        if low < self.count and self.key(self.key_index[low]) == key:
+            return self.key_index[low]
+        return None
+
+    def rows(self):
+        """
+        全行を順番に返す（文字列領域を1回でデコードして分割する）
+
+        【戻り値（yield）】
+        (record, values, key): record() と values_and_key() の戻り値
+        """
+        if not self.count:
+            return
+        width = len(self.fieldnames) + 1
+        strings = bytes(self.mm[self.blob_offset:self.blob_offset + self.blob_length]) \
+            .decode('utf-8').split(SEPARATOR)
+        records = RECORD.iter_unpack(self.mm[self.records_offset:
+                                             self.records_offset + self.count * RECORD.size])
+        for row, record in enumerate(records):
+            base = row * width
+            yield record, strings[base:base + width - 1], strings[base + width - 1]
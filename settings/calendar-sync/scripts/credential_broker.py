@@ -0,0 +1,358 @@
+"""
+フルスタック学習プログラム - 認証情報ブローカー・同期ロック
+
+【このモジュールの目的】
+cronの定期同期と手動の reschedule-learning.py --sync のように、
+複数の同期が同時に動いても安全にするための仕組みです。
+
+- 認証トークン（token.json）の更新と書き込みをファイルロックで1つずつにする
+  （同時に更新すると、片方が古いトークンで上書きしてしまう）
+- 有効期限まで余裕のあるアクセストークンはそのまま使い、更新しない
+  （同じプロセス内ではメモリにキャッシュし、token.jsonも読み直さない）
+- カレンダーごとの同期ロックで、同じカレンダーへの書き込みを1つずつにする
+  （同時に同じイベントを「未作成」と判断して、重複して作成するのを防ぐ）
+
+【ロックファイルの場所】
+トークン: token.json と同じディレクトリの token.json.lock
+カレンダー: settings/credentials/locks/calendar-xxxx.lock
+（ロックはプロセスが終了すると自動的に解放される。ファイルは残るが削除しなくてよい）
+
+【主な変数の依存関係】
+CREDENTIALS.get(token_path, load_token, refresh_token) → creds
+CREDENTIALS.store(token_path, creds) → token.jsonに保存
+CREDENTIALS.authorized(token_path, load_token, refresh_token) → AuthorizedHttpに渡す認証情報
+  （API呼び出し中の更新も CREDENTIALS.refresh() を通り、ロックとtoken.jsonの置き換えを使う）
+calendar_lock(calendar_name, token_path) → with文の間だけ同期ロックを保持
+"""
+
+# ============================================================
+# ライブラリのインポート
+# ============================================================
+
+import hashlib  # ロックファイル名の生成
+import os  # トークンファイルの置き換え
+import tempfile  # トークンファイルの一時書き込み
+import threading  # 同じプロセス内のスレッド間の排他制御
+import time  # ロック待ちのタイムアウト
+from contextlib import contextmanager  # with文で使えるロック
+from datetime import datetime, timedelta, timezone  # トークンの有効期限の確認
+from pathlib import Path  # ファイルパス操作用
+
+# fcntl はUnix系（Linux・macOS・WSL）でのみ使える
+# 使えない環境ではプロセス間のロックを行わない（スレッド間のロックは行う）
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+# ============================================================
+# グローバル設定
+# ============================================================
+
+# カレンダーごとの同期ロックを置くディレクトリ
+LOCK_DIR = Path(__file__).parent.parent.parent / 'credentials' / 'locks'
+
+# 有効期限までこの秒数を切ったアクセストークンは、使う前に更新する
+# （同期の途中で期限が切れないようにするため）
+TOKEN_REFRESH_MARGIN_SECONDS = 5 * 60
+
+# ロックを待つ最大時間（単位: 秒、超えたら TimeoutError）
+DEFAULT_LOCK_TIMEOUT_SECONDS = 10 * 60
+
+# ロックが空くのを確認する間隔（単位: 秒）
+LOCK_POLL_INTERVAL_SECONDS = 0.1
+
+
+# ============================================================
+# 関数定義
+# ============================================================
+
+@contextmanager
+def file_lock(lock_path, timeout=DEFAULT_LOCK_TIMEOUT_SECONDS, waiting_message=None):
+    """
+    ファイルロック（fcntl.flock）をwith文の間だけ取得
+
+    【処理フロー】
+    1. ロックファイルを開き、待たずにロックを試す
+    2. 他のプロセスが持っていれば waiting_message を1回表示し、空くまで待つ
+    3. timeout 秒を超えたら TimeoutError
+    4. with文を抜けたらロックを解放（プロセスが異常終了してもOSが解放する）
+
+    【引数】
+    lock_path: ロックファイルのパス
+    timeout: 最大待ち時間（秒、Noneなら空くまで待ち続ける）
+    waiting_message: 待つことになったときに表示するメッセージ
+    """
+    lock_path = Path(lock_path)
+    lock_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(lock_path, 'a') as lock_file:
+        if fcntl is not None:
+            deadline = None if timeout is None else time.monotonic() + timeout
+            announced = False
+            while True:
+                try:
+                    fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+                    break
+                except BlockingIOError:
+                    if waiting_message and not announced:
+                        print(waiting_message)
+                        announced = True
+                    if deadline is not None and time.monotonic() >= deadline:
+                        raise TimeoutError(f"ロックを取得できませんでした（{timeout:.0f}秒）: {lock_path}")
+                    time.sleep(LOCK_POLL_INTERVAL_SECONDS)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+
+def calendar_lock(calendar_name, token_path, timeout=DEFAULT_LOCK_TIMEOUT_SECONDS):
+    """
+    カレンダーごとの同期ロック
+
+    同じアカウント（トークン）の同じ名前のカレンダーに書き込む処理は、
+    このロックを持っている間だけ実行する。別の人・別のカレンダーの同期は待たない
+
+    【使い方】
+    with calendar_lock(CALENDAR_NAME, DEFAULT_TOKEN_PATH):
+        ...カレンダーの解決・同期計画・書き込み...
+
+    【引数】
+    calendar_name: カレンダー名
+    token_path: 認証トークンのパス（アカウントの区別に使う）
+    timeout: 最大待ち時間（秒）
+    """
+    identity = f"{Path(token_path).resolve()}\n{calendar_name}"
+    digest = hashlib.sha256(identity.encode('utf-8')).hexdigest()[:16]
+    return file_lock(LOCK_DIR / f'calendar-{digest}.lock', timeout,
+                     waiting_message=f"⏳ 別の同期が「{calendar_name}」に書き込み中です。終わるまで待ちます...")
+
+
+def token_needs_refresh(creds, margin=TOKEN_REFRESH_MARGIN_SECONDS, now=None):
+    """
+    アクセストークンを更新すべきかどうかを判定
+
+    【判定条件】
+    - アクセストークンがない
+    - 有効期限まで margin 秒を切っている（期限のないトークンは更新しない）
+
+    【引数】
+    creds: 認証情報（google.oauth2.credentials.Credentials）
+    margin: 期限切れとみなす余裕（秒）
+    now: 現在時刻（UTC、テスト用。Noneなら現在時刻）
+
+    【戻り値】
+    True: 更新が必要
+    """
+    if not creds.token:
+        return True
+    if creds.expiry is None:
+        return False
+    # google-auth の expiry はタイムゾーンなしのUTCなので、比較する前にそろえる
+    now = (now or datetime.now(timezone.utc)).replace(tzinfo=None)
+    return creds.expiry - timedelta(seconds=margin) <= now
+
+
+def write_token_file(token_path, text):
+    """
+    トークンファイルを書き換える（途中で中断しても壊れたファイルを残さない）
+
+    同じディレクトリの一時ファイルに書いてから置き換えるので、
+    読み込む側は常に「古いファイル」か「新しいファイル」のどちらかを読む
+
+    【引数】
+    token_path: トークンファイルのパス
+    text: 書き込む内容（creds.to_json()）
+    """
+    token_path = Path(token_path)
+    token_path.parent.mkdir(parents=True, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(dir=token_path.parent, prefix=f'.{token_path.name}.')
+    try:
+        with os.fdopen(fd, 'w') as f:
+            f.write(text)
+        os.replace(temp_path, token_path)
+    except BaseException:
+        os.unlink(temp_path)
+        raise
+
+
+# ============================================================
+# クラス定義
+# ============================================================
+
+class CredentialBroker:
+    """
+    トークンファイルごとの認証情報を、プロセス全体で共有するクラス
+
+    【保持するデータ】
+    cache: {トークンファイルのパス: 認証情報}
+    locks: {トークンファイルのパス: スレッド用のロック}（--manifest の並行同期用）
+
+    【使い方】
+    creds = CREDENTIALS.get(token_path, load_token, refresh_token)
+    if creds is None:
+        ...ブラウザで新規認証...
+        CREDENTIALS.store(token_path, creds)
+    """
+
+    def __init__(self):
+        self.cache = {}
+        self.locks = {}
+        self.lock = threading.Lock()
+
+    def thread_lock(self, key):
+        """トークンファイルごとのスレッド用ロックを返す"""
+        with self.lock:
+            return self.locks.setdefault(key, threading.Lock())
+
+    def get(self, token_path, load_token, refresh_token):
+        """
+        使える認証情報を返す（必要なときだけ更新する）
+
+        【処理フロー】
+        1. メモリのキャッシュに期限まで余裕のある認証情報があれば、それを返す
+        2. なければトークンのファイルロックを取得して、token.jsonを読み直す
+           （待っている間に別のプロセスが更新していれば、その結果を使う）
+        3. それでも期限が近ければ更新し、token.jsonを書き換える
+        4. キャッシュに入れて返す
+
+        【引数】
+        token_path: トークンファイルのパス
+        load_token: token_path → 認証情報（ファイルがなければNone）を返す関数
+        refresh_token: 認証情報を更新する関数（creds.refresh(Request()) など）
+
+        【戻り値】
+        creds: 認証情報（トークンがない・更新できない場合はNone → 新規認証が必要）
+        """
+        key = Path(token_path).resolve()
+        creds = self.cache.get(key)
+        if creds is not None and not token_needs_refresh(creds):
+            return creds
+
+        with self.thread_lock(key), file_lock(key.with_name(key.name + '.lock')):
+            creds = self.cache.get(key)
+            if creds is not None and not token_needs_refresh(creds):
+                return creds
+
+            creds = load_token(key)
+            if creds is None:
+                return None
+            if token_needs_refresh(creds):
+                if not creds.refresh_token:
+                    return None
+                refresh_token(creds)
+                write_token_file(key, creds.to_json())
+            self.cache[key] = creds
+            return creds
+
+    def refresh(self, token_path, stale_token, load_token, refresh_token):
+        """
+        サーバーに拒否されたアクセストークンを更新する（401が返ったとき）
+
+        【処理フロー】
+        1. トークンのファイルロックを取得して、token.jsonを読み直す
+        2. 別のスレッド・プロセスが既に更新していれば（stale_token と違えば）、それを使う
+        3. まだ古いままなら更新し、token.jsonを書き換える
+           （更新できない場合は refresh_token の例外をそのまま投げる）
+
+        【引数】
+        token_path: トークンファイルのパス
+        stale_token: 拒否されたアクセストークン
+        load_token: token_path → 認証情報（ファイルがなければNone）を返す関数
+        refresh_token: 認証情報を更新する関数
+
+        【戻り値】
+        creds: 更新後の認証情報
+        """
+        key = Path(token_path).resolve()
+        with self.thread_lock(key), file_lock(key.with_name(key.name + '.lock')):
+            creds = self.cache.get(key)
+            if creds is not None and creds.token != stale_token and not token_needs_refresh(creds):
+                return creds
+
+            creds = load_token(key) or creds
+            if creds is None:
+                raise FileNotFoundError(f"トークンファイルが見つかりません: {key}")
+            if creds.token == stale_token or token_needs_refresh(creds):
+                refresh_token(creds)
+                write_token_file(key, creds.to_json())
+            self.cache[key] = creds
+            return creds
+
+    def authorized(self, token_path, load_token, refresh_token):
+        """
+        AuthorizedHttp に渡す認証情報を返す（BrokeredCredentials）
+
+        【引数】
+        get() と同じ
+
+        【戻り値】
+        creds: BrokeredCredentials（トークンがない・更新できない場合はNone）
+        """
+        creds = self.get(token_path, load_token, refresh_token)
+        if creds is None:
+            return None
+        return BrokeredCredentials(self, token_path, creds, load_token, refresh_token)
+
+    def store(self, token_path, creds):
+        """
+        新規認証で得た認証情報を保存してキャッシュに入れる
+
+        【引数】
+        token_path: トークンファイルのパス
+        creds: 認証情報
+        """
+        key = Path(token_path).resolve()
+        with self.thread_lock(key), file_lock(key.with_name(key.name + '.lock')):
+            write_token_file(key, creds.to_json())
+            self.cache[key] = creds
+
+
+class BrokeredCredentials:
+    """
+    API呼び出し中のトークン更新をブローカー経由にする認証情報
+
+    AuthorizedHttp は、期限切れのトークンやサーバーの401に対して
+    認証情報を自分で更新する（creds.refresh()）。そのままではロックも
+    token.jsonの書き込みも通らず、他のプロセスと更新が競合する。
+    このクラスで包むと、更新はすべて CredentialBroker の get() / refresh() を通る
+
+    【保持するデータ】
+    broker: CredentialBroker
+    token_path: トークンファイルのパス
+    credentials: いま使っている認証情報（google.oauth2.credentials.Credentials）
+
+    それ以外の属性（token, expiry, valid など）は credentials のものを返す
+    """
+
+    def __init__(self, broker, token_path, credentials, load_token, refresh_token):
+        self.broker = broker
+        self.token_path = token_path
+        self.credentials = credentials
+        self.load_token = load_token
+        self.refresh_token = refresh_token
+
+    def __getattr__(self, name):
+        return getattr(self.credentials, name)
+
+    def before_request(self, request, method, url, headers):
+        """
+        リクエストの前に呼ばれる（AuthorizedHttp から）
+
+        期限が近ければブローカーで更新してから、Authorizationヘッダーを付ける
+        （credentials.before_request() は自分で更新してしまうので使わない）
+        """
+        creds = self.broker.get(self.token_path, self.load_token, self.refresh_token)
+        if creds is not None:
+            self.credentials = creds
+        self.credentials.apply(headers)
+
+    def refresh(self, request):
+        """サーバーがトークンを拒否したときに呼ばれる（AuthorizedHttp から）"""
+        self.credentials = self.broker.refresh(self.token_path, self.credentials.token,
+                                               self.load_token, self.refresh_token)
+
+
+# モジュール全体で共有するブローカー
+CREDENTIALS = CredentialBroker()
@@ -0,0 +1,189 @@
+"""
+フルスタック学習プログラム - ファイル監視モジュール
+
+【このモジュールの目的】
+dev-schedule.csvが保存されたことを検知します（sync-to-calendar.py --watch 用）。
+Linuxでは inotify（カーネルからの通知）を使い、使えない環境では
+一定間隔でファイルの更新時刻・サイズを調べるポーリングに切り替えます。
+
+【ディレクトリを監視する理由】
+多くのエディタは「一時ファイルに書いてから名前を変える」方法で保存するため、
+ファイル自体を監視すると、保存後に監視対象が消えてしまう。
+そこで親ディレクトリを監視し、対象のファイル名のイベントだけを拾う。
+
+【主な変数の依存関係】
+FileWatcher(path) → wait_for_change(debounce) → 保存が落ち着いたら戻る
+"""
+
+# ============================================================
+# ライブラリのインポート
+# ============================================================
+
+import ctypes  # libcのinotify関数を呼び出す
+import ctypes.util  # libcの場所を探す
+import os  # ファイル情報の取得・inotifyの読み込み
+import select  # inotifyの通知を待つ
+import struct  # inotifyイベントの解析
+import sys  # プラットフォームの判定
+import time  # ポーリング間隔・デバウンス
+from pathlib import Path  # ファイルパス操作用
+
+# ============================================================
+# グローバル設定
+# ============================================================
+
+# inotifyのイベント種別（linux/inotify.h）
+IN_MODIFY = 0x00000002       # 書き込まれた
+IN_CLOSE_WRITE = 0x00000008  # 書き込み用に開いたファイルが閉じられた
+IN_MOVED_TO = 0x00000080     # 名前の変更で作られた（エディタの保存）
+IN_CREATE = 0x00000100       # 新しく作られた
+IN_NONBLOCK = os.O_NONBLOCK
+IN_CLOEXEC = 0o2000000
+
+WATCH_MASK = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE
+
+# inotifyイベントのヘッダー（wd, mask, cookie, len）
+EVENT_HEADER = struct.Struct('iIII')
+
+# ポーリングで更新を調べる間隔（単位: 秒）
+DEFAULT_POLL_INTERVAL = 0.5
+
+
+# ============================================================
+# クラス定義
+# ============================================================
+
+class FileWatcher:
+    """
+    1つのファイルの変更を待つクラス
+
+    【使い方】
+    watcher = FileWatcher(csv_path)
+    try:
+        while True:
+            watcher.wait_for_change(debounce=0.3)
+            ...ファイルを読み直す...
+    finally:
+        watcher.close()
+
+    【保持するデータ】
+    path: 監視するファイル
+    mode: 'inotify' または 'polling'
+    """
+
+    def __init__(self, path, poll_interval=DEFAULT_POLL_INTERVAL):
+        self.path = Path(path).resolve()
+        self.poll_interval = poll_interval
+        self.fd = None
+        self.mode = 'polling'
+        self.last_stat = self._stat()
+
+        if sys.platform.startswith('linux'):
+            self._start_inotify()
+
+    def _start_inotify(self):
+        """inotifyで親ディレクトリの監視を始める（失敗したらポーリングのまま）"""
+        try:
+            libc = ctypes.CDLL(ctypes.util.find_library('c') or None, use_errno=True)
+            fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+            if fd < 0:
+                return
+            watch = libc.inotify_add_watch(fd, str(self.path.parent).encode(), WATCH_MASK)
+            if watch < 0:
+                os.close(fd)
+                return
+        except (OSError, AttributeError):
+            # libcが見つからない・inotify関数がない環境
+            return
+        self.fd = fd
+        self.mode = 'inotify'
+
+    def _stat(self):
+        """ポーリング用のファイル情報（更新時刻・サイズ・inode）"""
+        try:
+            info = self.path.stat()
+        except FileNotFoundError:
+            return None
+        return (info.st_mtime_ns, info.st_size, info.st_ino)
+
+    def _read_events(self, timeout):
+        """
+        timeout秒までinotifyの通知を待ち、対象ファイルのイベントがあったかを返す
+
+        【戻り値】
+        True: 対象ファイルが変更された、False: 時間切れ・他のファイルのイベントだけ
+        """
+        readable, _, _ = select.select([self.fd], [], [], timeout)
+        if not readable:
+            return False
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return False
+
+        changed = False
+        offset = 0
+        while offset + EVENT_HEADER.size <= len(data):
+            _, _, _, name_length = EVENT_HEADER.unpack_from(data, offset)
+            offset += EVENT_HEADER.size
+            name = data[offset:offset + name_length].rstrip(b'\0').decode('utf-8', 'replace')
+            offset += name_length
+            if name == self.path.name:
+                changed = True
+        return changed
+
+    def _poll(self, timeout):
+        """timeout秒まで一定間隔でファイル情報を調べ、変わったかを返す"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            current = self._stat()
+            if current != self.last_stat:
+                self.last_stat = current
+                return True
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+            wait = self.poll_interval
+            if deadline is not None:
+                wait = min(wait, max(0.0, deadline - time.monotonic()))
+            time.sleep(wait)
+
+    def wait(self, timeout=None):
+        """
+        ファイルが変更されるまで待つ
+
+        【引数】
+        timeout: 最大待ち時間（秒、Noneなら変更があるまで待ち続ける）
+
+        【戻り値】
+        True: 変更された、False: 時間切れ
+        """
+        if self.mode == 'polling':
+            return self._poll(timeout)
+
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+            if self._read_events(remaining):
+                return True
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+
+    def wait_for_change(self, debounce):
+        """
+        ファイルが変更され、その後 debounce 秒間変更がなくなるまで待つ
+
+        エディタの保存は「書き込み → 名前の変更」など複数のイベントになり、
+        続けて何度も保存することもあるため、落ち着いてから1回だけ読み直す
+
+        【引数】
+        debounce: 最後の変更からこの秒数だけ待ってから戻る
+        """
+        self.wait()
+        while self.wait(debounce):
+            pass
+
+    def close(self):
+        """inotifyを閉じる"""
+        if self.fd is not None:
+            os.close(self.fd)
+            self.fd = None
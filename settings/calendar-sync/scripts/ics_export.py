@@ -0,0 +1,273 @@
+"""
+フルスタック学習プログラム - ICSファイル書き出しモジュール
+
+【このモジュールの目的】
+Google Calendar APIを使わずに、学習スケジュールを iCalendar（RFC 5545）形式の
+.icsファイルとして書き出します。
+Googleカレンダー・Apple カレンダー・Outlook などは、.icsファイルのURLを
+「購読」できるので、静的なファイルサーバーに置くだけで全員に配信できます。
+
+- API呼び出し・認証・クォータは不要（数千行でも数十ミリ秒）
+- 1イベントずつ一時ファイルに書き出し、最後に置き換える（全体をメモリに載せない。
+  途中で中断しても、購読中のファイルが壊れない）
+- 元のCSVのハッシュを .ics に記録し、CSVが変わっていなければ書き換えない
+  （ファイルが変わらないので、購読側も再取得・再処理をしなくて済む）
+
+【主な変数の依存関係】
+source_digest(csv_path, settings) → digest
+read_source_digest(ics_path) → 前回書き出したときの digest
+write_calendar(ics_path, events, calendar_name, digest) → 書き出したイベント数
+（events は create_event_body() が返すイベントデータのイテレーター）
+"""
+
+# ============================================================
+# ライブラリのインポート
+# ============================================================
+
+import hashlib  # CSVのハッシュ
+import os  # ファイルの置き換え
+import tempfile  # 一時ファイルへの書き出し
+from datetime import datetime, timezone  # DTSTAMP（書き出し時刻）
+from pathlib import Path  # ファイルパス操作用
+
+# ============================================================
+# グローバル設定
+# ============================================================
+
+# .icsの出力形式のバージョン（形式を変えたら上げる → CSVが同じでも書き直す）
+ICS_FORMAT_VERSION = '1'
+
+# カレンダーを作ったアプリケーションの識別子（PRODID）
+ICS_PRODUCT_ID = '-//fullstack-learning//calendar-sync//JA'
+
+# UIDのドメイン部分（"<fslearning_key>@<ドメイン>" でイベントを区別する）
+ICS_UID_DOMAIN = 'fslearning'
+
+# CSVのハッシュを記録する独自プロパティ
+SOURCE_DIGEST_PROPERTY = 'X-FSLEARNING-SOURCE-SHA256'
+
+# 1行の最大長（RFC 5545: 改行を除いて75オクテット）
+MAX_LINE_OCTETS = 75
+
+# ハッシュ計算で一度に読み込むサイズ（単位: バイト）
+READ_CHUNK_BYTES = 64 * 1024
+
+
+# ============================================================
+# 関数定義
+# ============================================================
+
+def escape_text(text):
+    """
+    TEXT型の値をエスケープ（RFC 5545 3.3.11）
+
+    【変換】
+    \\ → \\\\、; → \\;、, → \\,、改行 → \\n
+
+    【引数】
+    text: 元の文字列
+
+    【戻り値】
+    escaped: .icsに書ける文字列
+    """
+    return (text.replace('\\', '\\\\')
+            .replace(';', '\\;')
+            .replace(',', '\\,')
+            .replace('\r\n', '\\n')
+            .replace('\n', '\\n'))
+
+
+def fold_line(line):
+    """
+    1行を75オクテットごとに折り返す（RFC 5545 3.1）
+
+    折り返した行の先頭には空白を1つ付ける。
+    UTF-8の文字（日本語・絵文字）の途中では折り返さない
+
+    【引数】
+    line: プロパティ1行（改行なし）
+
+    【戻り値】
+    folded: CRLFで終わる文字列（折り返しがあれば複数行）
+    """
+    # UTF-8は1文字最大4バイトなので、短い行はエンコードせずに判定できる
+    if len(line) * 4 <= MAX_LINE_OCTETS:
+        return line + '\r\n'
+    encoded = line.encode('utf-8')
+    if len(encoded) <= MAX_LINE_OCTETS:
+        return line + '\r\n'
+
+    # バイト列のまま区切り、UTF-8の継続バイト（0b10xxxxxx）の前では区切らない
+    parts = []
+    start = 0
+    limit = MAX_LINE_OCTETS
+    while len(encoded) - start > limit:
+        end = start + limit
+        while encoded[end] & 0xC0 == 0x80:
+            end -= 1
+        parts.append(encoded[start:end])
+        start = end
+        limit = MAX_LINE_OCTETS - 1  # 2行目以降は先頭の空白の分だけ短い
+    parts.append(encoded[start:])
+    return b'\r\n '.join(parts).decode('utf-8') + '\r\n'
+
+
+def format_date(value):
+    """
+    'YYYY-MM-DD' を DATE型の 'YYYYMMDD' に変換
+
+    【引数】
+    value: イベントデータの start.date / end.date
+
+    【戻り値】
+    date: '20251201' 形式の文字列
+    """
+    return value.replace('-', '')
+
+
+def event_lines(event, stamp):
+    """
+    イベントデータ（create_event_body()の戻り値）をVEVENTの行に変換
+
+    【対応関係】
+    extendedProperties.private.fslearning_key → UID（行IDなのでリスケジュールしても変わらない）
+    summary / description → SUMMARY / DESCRIPTION
+    start.date / end.date → DTSTART / DTEND（終日イベント。終了日を含まないのは同じ）
+    reminders.overrides → VALARM（何分前に通知するか）
+    （colorId はGoogleカレンダー独自の設定なので書き出さない）
+
+    【引数】
+    event: イベントデータ
+    stamp: DTSTAMPの値（'20251201T000000Z' 形式）
+
+    【戻り値（yield）】
+    line: 折り返し前のプロパティ1行
+    """
+    key = event['extendedProperties']['private']['fslearning_key']
+    yield 'BEGIN:VEVENT'
+    yield f'UID:{key}@{ICS_UID_DOMAIN}'
+    yield f'DTSTAMP:{stamp}'
+    yield f"DTSTART;VALUE=DATE:{format_date(event['start']['date'])}"
+    yield f"DTEND;VALUE=DATE:{format_date(event['end']['date'])}"
+    yield f"SUMMARY:{escape_text(event['summary'])}"
+    yield f"DESCRIPTION:{escape_text(event['description'])}"
+    for reminder in event.get('reminders', {}).get('overrides', []):
+        yield 'BEGIN:VALARM'
+        yield 'ACTION:DISPLAY'
+        yield f"DESCRIPTION:{escape_text(event['summary'])}"
+        yield f"TRIGGER:-PT{reminder['minutes']}M"
+        yield 'END:VALARM'
+    yield 'END:VEVENT'
+
+
+def source_digest(csv_path, settings=''):
+    """
+    CSVファイルのハッシュを計算（.icsを書き直すかどうかの判定用）
+
+    ファイルを少しずつ読むので、大きなCSVでもメモリを使わない。
+    CSV以外で出力に影響する設定（カレンダー名・リマインダーなど）は settings に渡す
+
+    【引数】
+    csv_path: CSVファイルのパス
+    settings: 出力に影響する設定を文字列にしたもの
+
+    【戻り値】
+    digest: SHA-256の16進文字列
+    """
+    digest = hashlib.sha256(f'{ICS_FORMAT_VERSION}\n{settings}\n'.encode('utf-8'))
+    with open(csv_path, 'rb') as f:
+        for block in iter(lambda: f.read(READ_CHUNK_BYTES), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def read_source_digest(ics_path):
+    """
+    前回書き出した.icsに記録されたCSVのハッシュを読む
+
+    ヘッダー部分（最初のVEVENTより前）だけを読む。
+    ハッシュの行は75オクテットを超えて折り返されているので、つなげてから読む
+
+    【引数】
+    ics_path: .icsファイルのパス
+
+    【戻り値】
+    digest: 記録されたハッシュ（ファイルがない・記録がなければNone）
+    """
+    prefix = SOURCE_DIGEST_PROPERTY + ':'
+    header = []
+    try:
+        with open(ics_path, 'r', encoding='utf-8', newline='') as f:
+            for line in f:
+                line = line.rstrip('\r\n')
+                if line.startswith(' ') and header:
+                    header[-1] += line[1:]  # 折り返しの続き
+                    continue
+                if line == 'BEGIN:VEVENT':
+                    break
+                header.append(line)
+    except (OSError, UnicodeDecodeError):
+        return None
+
+    for line in header:
+        if line.startswith(prefix):
+            return line[len(prefix):]
+    return None
+
+
+def write_calendar(ics_path, events, calendar_name, digest, now=None):
+    """
+    イベントを.icsファイルに書き出す
+
+    【処理フロー】
+    1. 同じディレクトリに一時ファイルを作る
+    2. カレンダーのヘッダー（名前・CSVのハッシュ）を書く
+    3. events を1件ずつVEVENTに変換して書く（全件をメモリに載せない）
+    4. 書き終わったら ics_path と置き換える（失敗したら一時ファイルを消す）
+
+    【引数】
+    ics_path: 出力先のパス
+    events: イベントデータのイテレーター
+    calendar_name: カレンダー名（購読したときに表示される名前）
+    digest: source_digest()の戻り値
+    now: 書き出し時刻（UTC、テスト用。Noneなら現在時刻）
+
+    【戻り値】
+    count: 書き出したイベント数
+    """
+    ics_path = Path(ics_path)
+    ics_path.parent.mkdir(parents=True, exist_ok=True)
+    stamp = (now or datetime.now(timezone.utc)).strftime('%Y%m%dT%H%M%SZ')
+
+    fd, temp_path = tempfile.mkstemp(dir=ics_path.parent, prefix=f'.{ics_path.name}.')
+    count = 0
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8', newline='') as f:
+            # ステップ2: ヘッダー
+            for line in ('BEGIN:VCALENDAR',
+                         'VERSION:2.0',
+                         f'PRODID:{ICS_PRODUCT_ID}',
+                         'CALSCALE:GREGORIAN',
+                         'METHOD:PUBLISH',
+                         f'NAME:{escape_text(calendar_name)}',
+                         f'X-WR-CALNAME:{escape_text(calendar_name)}',
+                         f'{SOURCE_DIGEST_PROPERTY}:{digest}'):
+                f.write(fold_line(line))
+
+            # ステップ3: イベントを1件ずつ書く
+            for event in events:
+                f.write(''.join([fold_line(line) for line in event_lines(event, stamp)]))
+                count += 1
+
+            f.write(fold_line('END:VCALENDAR'))
+
+        # ステップ4: 置き換え（読む側は古いファイルか新しいファイルのどちらかを読む）
+        # mkstempは所有者だけが読める権限で作るので、通常のファイルと同じ権限にする
+        umask = os.umask(0)
+        os.umask(umask)
+        os.chmod(temp_path, 0o666 & ~umask)
+        os.replace(temp_path, ics_path)
+    except BaseException:
+        os.unlink(temp_path)
+        raise
+    return count
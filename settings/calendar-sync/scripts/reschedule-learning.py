@@ -13,12 +13,15 @@ python reschedule-learning.py --from-week 5 --shift-weeks 2
 # 第10週以降を1ヶ月後ろにずらして、自動的にカレンダーに同期
 python reschedule-learning.py --from-week 10 --shift-months 1 --sync
 
+# 複数の変更をまとめて実行（第5週以降を1週、第20週以降をさらに1ヶ月）
+python reschedule-learning.py --op 5:1 --op 20:0:1 --sync
+
 【処理の流れ】
 1. コマンドライン引数を解析
 2. dev-schedule.csvを読み込み
-3. 指定された週以降のスケジュールをシフト
-4. CSVファイルを更新
-5. （--syncオプションがあれば）Googleカレンダーに同期
+3. 指定された週以降のスケジュールをシフト（複数の変更も全行を1回なめるだけ）
+4. CSVファイルを更新（変更がいくつあっても1回だけ書き込む）
+5. （--syncオプションがあれば）移動した行だけGoogleカレンダーに同期
 """
 
 # ============================================================
@@ -27,100 +30,509 @@ python reschedule-learning.py --from-week 10 --shift-months 1 --sync
 
 import csv
 import argparse  # コマンドライン引数を解析
+import bisect  # 開始日の索引の二分探索
+import importlib.util  # ファイルパスからモジュールを読み込む
 import sys
-from datetime import datetime, timedelta  # 日付計算用
+from datetime import timedelta  # 日付計算用
 from pathlib import Path  # ファイルパス操作用
 
 # 同期スクリプトから関数をインポート
 # sync-to-calendar.pyで定義された関数を再利用する
+# ファイル名にハイフンが含まれるため、通常のimport文ではなく
+# importlibでファイルパスを指定して読み込む
+SYNC_SCRIPT_PATH = Path(__file__).parent / 'sync-to-calendar.py'
 try:
-    from sync_to_calendar import (
-        get_calendar_service,       # Google Calendar API認証
-        get_or_create_calendar,     # カレンダー取得/作成
-        sync_events_to_calendar,    # イベント同期
-        load_schedule               # CSVファイル読み込み
-    )
-except ImportError:
+    _spec = importlib.util.spec_from_file_location('sync_to_calendar', SYNC_SCRIPT_PATH)
+    sync_to_calendar = importlib.util.module_from_spec(_spec)
+    _spec.loader.exec_module(sync_to_calendar)
+except FileNotFoundError:
     print("❌ sync-to-calendar.py が見つかりません")
     sys.exit(1)
 
+sync_schedule = sync_to_calendar.sync_schedule  # 同期状態を確認してカレンダーに同期
+load_schedule = sync_to_calendar.load_schedule  # CSVファイル読み込み
+load_schedule_by_keys = sync_to_calendar.load_schedule_by_keys  # キーを指定して学習データを読み込む
+compile_schedule = sync_to_calendar.compile_schedule  # コンパイル済みスケジュールを開く
+schedule_item_from_row = sync_to_calendar.schedule_item_from_row  # CSVの行 → 学習データ
+plan_schedule_sync = sync_to_calendar.plan_schedule_sync  # 同期計画とAPIコストの見積もり
+print_plan_report = sync_to_calendar.print_plan_report  # 同期計画の表示
+METRICS = sync_to_calendar.METRICS  # フェーズごとの時間・API呼び出しの計測
+QUOTA = sync_to_calendar.QUOTA  # APIのクォータ予算（--quota-per-minute / --quota-per-day）
+calculate_week_date = sync_to_calendar.calculate_week_date  # 年・月・週 → その週の土曜日
+calculate_week_columns = sync_to_calendar.calculate_week_columns  # 年・月・週の列 → 全行の週の範囲とキー
+find_schedule_week = sync_to_calendar.find_schedule_week  # 日付 → 年・月・週
+ensure_row_ids = sync_to_calendar.ensure_row_ids  # ID列が空の行に行IDを割り当てる
+make_event_key = sync_to_calendar.make_event_key  # 学習データ → イベントのキー（行ID）
+
+
+# ============================================================
+# クラス定義
+# ============================================================
+
+class ScheduleIndex:
+    """
+    スケジュールの行を、その週の土曜日の日付順に並べた索引
+
+    【目的】
+    「第N週以降」の境界を、全行を調べずに二分探索（bisect）で見つける。
+    日付は calculate_week_date() と同じ計算で求めるので、カレンダーの表示と一致する
+
+    【保持するデータ】
+    ordinals: 各行の土曜日の通し日数（date.toordinal()）を昇順に並べたリスト
+    positions: ordinals と同じ順番の、元の行の位置
+    start: プログラム開始週（最も早い行）の土曜日の通し日数
+
+    【使い方】
+    index = ScheduleIndex(rows)
+    positions = index.positions_from(5)  # 第5週以降の行の位置
+    """
+
+    def __init__(self, rows, saturdays=None):
+        """
+        【引数】
+        rows: 全行（列名 → 文字列の辞書のリスト）
+        saturdays: 各行の土曜日の通し日数（コンパイル済みスケジュールの計算結果。
+                   Noneなら rows から計算する）
+        """
+        if saturdays is None:
+            # 週の日付は全行まとめて計算する（開始日の日曜日 + 6日 = 土曜日）
+            start_ordinals, _, _ = calculate_week_columns([int(row['年度']) for row in rows],
+                                                          [int(row['月']) for row in rows],
+                                                          [int(row['週']) for row in rows])
+            saturdays = [ordinal + 6 for ordinal in start_ordinals]
+        # CSVはほぼ日付順に並んでいるので、並べ替えはほぼO(n)で終わる
+        entries = sorted((ordinal, position) for position, ordinal in enumerate(saturdays))
+        self.ordinals = [ordinal for ordinal, _ in entries]
+        self.positions = [position for _, position in entries]
+        self.start = self.ordinals[0] if self.ordinals else None
+
+    def program_week(self, year, month, week):
+        """
+        年・月・週が、プログラム開始から何週目かを求める（開始週 = 第1週）
+
+        【戻り値】
+        program_week: 通算の週番号（1から始まる）
+        """
+        ordinal = calculate_week_date(year, month, week).toordinal()
+        return (ordinal - self.start) // 7 + 1
+
+    def positions_from(self, from_week):
+        """
+        プログラム開始から from_week 週目以降の行の位置を返す
+
+        【ロジック】
+        境界 = 開始週の土曜日 + (from_week - 1) × 7日
+        bisect_left() で境界以上の最初の要素を見つけ、そこから後ろを返す
+
+        【引数】
+        from_week: 通算の週番号（1から始まる）
+
+        【戻り値】
+        positions: 対象の行の位置のリスト（日付順）
+        """
+        if self.start is None:
+            return []
+        boundary = self.start + (max(1, from_week) - 1) * 7
+        return self.positions[bisect.bisect_left(self.ordinals, boundary):]
+
+    def weeks_from(self, from_week):
+        """
+        プログラム開始から from_week 週目以降の行を、通算の週番号と一緒に返す
+
+        【戻り値】
+        entries: [(通算の週番号, 行の位置), ...]（日付順）
+        """
+        if self.start is None:
+            return []
+        boundary = self.start + (max(1, from_week) - 1) * 7
+        first = bisect.bisect_left(self.ordinals, boundary)
+        return [((ordinal - self.start) // 7 + 1, position)
+                for ordinal, position in zip(self.ordinals[first:], self.positions[first:])]
+
 
 # ============================================================
 # 関数定義
 # ============================================================
 
-def shift_schedule(csv_path, from_week, shift_weeks=0, shift_months=0):
+def shift_week(year, month, week, shift_weeks=0, shift_months=0):
     """
-    スケジュールをシフト（後ろにずらす）
+    年・月・週を指定した週数・月数だけ後ろにずらす
 
-    【処理フロー】
-    1. CSVファイルを全行読み込み
-    2. 各行の週番号をチェック
-    3. from_week以降の行は日付を計算してシフト
-    4. from_week未満の行はそのまま
-    5. 全行をCSVファイルに書き戻す
+    【ロジック】
+    1. 月数のシフト: 同じ週番号のまま shift_months ヶ月後の月へ
+       （第5週がない月になる場合は、その月の最終週にする。
+         その週に別の行があると重なるので、find_week_conflicts() で確認する）
+    2. 週数のシフト: その週の土曜日に shift_weeks × 7日 を足す
+    3. find_schedule_week() で、ずらした土曜日を年・月・週に直す
+       （例: 12月第4週を2週ずらすと、翌年1月の第1週や第2週になる）
 
-    【アルゴリズム】
-    - total_week = (年度 - 2025) * 52 + 月 * 4 + 週
-      → 全体の通算週番号を概算で計算
-    - total_week >= from_week なら対象
+    【引数】
+    year, month, week: 元の年・月・週番号
+    shift_weeks: 何週間ずらすか
+    shift_months: 何ヶ月ずらすか
+
+    【戻り値】
+    (year, month, week): ずらした後の年・月・週番号
+    """
+    # ステップ1: 月数のシフト（月の通し番号で計算して年をまたぐ）
+    month_index = year * 12 + (month - 1) + shift_months
+    year, month = divmod(month_index, 12)
+    month += 1
+    saturday = calculate_week_date(year, month, week)
+    while saturday.month != month:
+        # 第5週がない月 → 1週前に戻す
+        saturday -= timedelta(weeks=1)
+
+    # ステップ2〜3: 週数のシフトと正規化
+    return find_schedule_week(saturday + timedelta(weeks=shift_weeks))
+
+
+def find_week_conflicts(rows, moved):
+    """
+    シフト後に、同じ週に2行以上が入ってしまった週を探す
+
+    【重なる例】
+    - 第5週を1ヶ月ずらした先の月に第5週がない → 最終週（第4週）にまとめられ、
+      もともと第4週にある行と重なる
+    重なった行は同じ週のイベントとして上書きし合うので、CSVを書き換える前に確認する。
+    移動した行を含まない週（元のCSVから重なっている週）は対象にしない
+
+    【引数】
+    rows: シフト後の全行（列名 → 文字列の辞書のリスト）
+    moved: 移動した行の一覧（compute_batch_shifted_rows()の戻り値）
+
+    【戻り値】
+    conflicts: [{'week': '2026/02 Week4',
+                 'rows': [{'key': ..., 'from': ..., 'content': ..., 'operations': [...]}, ...]}, ...]
+               （週の日付順。重なりがなければ空のリスト。
+                 operations はその行に適用した操作、移動していない行は空のリスト）
+    """
+    moved_by_key = {entry['key']: entry for entry in moved}
+    weeks = {}
+    for row in rows:
+        week = (int(row['年度']), int(row['月']), int(row['週']))
+        weeks.setdefault(week, []).append(row)
+
+    conflicts = []
+    for (year, month, week), group in sorted(weeks.items()):
+        keys = [row[sync_to_calendar.ROW_ID_COLUMN] for row in group]
+        if len(group) < 2 or not any(key in moved_by_key for key in keys):
+            continue
+        label = f"{year}/{month:02d} Week{week}"
+        conflicts.append({
+            'week': label,
+            'rows': [{'key': key,
+                      'from': moved_by_key[key]['from'] if key in moved_by_key else label,
+                      'content': row['学習内容'],
+                      'operations': moved_by_key[key].get('operations', []) if key in moved_by_key else []}
+                     for key, row in zip(keys, group)],
+        })
+    return conflicts
+
+
+def format_week_conflicts(conflicts):
+    """
+    find_week_conflicts()の結果を、エラーメッセージの文字列にする
+
+    【戻り値】
+    message: 1行目に件数、2行目以降に重なった週と行（元の週・適用した操作 → 内容）、
+             最後に重なりに関わった操作の一覧
+    """
+    lines = [f"シフト後に {len(conflicts)} 週で複数の行が同じ週に重なります（CSVは変更していません）"]
+    involved = []
+    for conflict in conflicts:
+        lines.append(f"  {conflict['week']}:")
+        for row in conflict['rows']:
+            operations = row.get('operations') or []
+            applied = f"（{', '.join(operations)}）" if operations else '（移動なし）'
+            lines.append(f"    - {row['from']} から{applied}: {row['content']}")
+            involved.extend(operation for operation in operations if operation not in involved)
+    if involved:
+        lines.append(f"  重なりに関わった操作: {', '.join(involved)}")
+    return '\n'.join(lines)
+
+
+def format_shift_operation(operation):
+    """
+    シフト操作を --op と同じ 'FROM_WEEK:WEEKS[:MONTHS]' の形式にする（parse_shift_operation()の逆）
+
+    【引数】
+    operation: (from_week, shift_weeks, shift_months)
+
+    【戻り値】
+    text: 例 '5:1'、'20:0:1'
+    """
+    from_week, shift_weeks, shift_months = operation
+    if shift_months:
+        return f"{from_week}:{shift_weeks}:{shift_months}"
+    return f"{from_week}:{shift_weeks}"
+
+
+def parse_shift_operation(text):
+    """
+    シフト操作の指定 'FROM_WEEK:WEEKS[:MONTHS]' を解析（--op・--ops-file 用）
+
+    【例】
+    '5:2'    → 第5週以降を2週間後ろへ
+    '10:0:1' → 第10週以降を1ヶ月後ろへ
+    '8:1:1'  → 第8週以降を1ヶ月と1週間後ろへ
+
+    【引数】
+    text: 指定の文字列
+
+    【戻り値】
+    (from_week, shift_weeks, shift_months): 整数のタプル
+
+    【例外】
+    ValueError: 形式が正しくない・0以下の週番号・負のシフト・シフトなし
+    """
+    parts = text.strip().split(':')
+    if len(parts) not in (2, 3):
+        raise ValueError(f"'{text}' は FROM_WEEK:WEEKS[:MONTHS] の形式で指定してください")
+    try:
+        from_week, shift_weeks, shift_months = (int(part) for part in parts + ['0'] * (3 - len(parts)))
+    except ValueError:
+        raise ValueError(f"'{text}' に数値でない値があります") from None
+    if from_week < 1:
+        raise ValueError(f"'{text}': 週番号は1以上を指定してください")
+    # 前にずらすと、シフトしない行と同じ週に重なるため受け付けない
+    # （後ろにずらして重なる場合は compute_batch_shifted_rows() で確認する）
+    if shift_weeks < 0 or shift_months < 0:
+        raise ValueError(f"'{text}': シフトには0以上の値を指定してください")
+    if shift_weeks == 0 and shift_months == 0:
+        raise ValueError(f"'{text}': 週数か月数のどちらかを指定してください")
+    return from_week, shift_weeks, shift_months
+
+
+def load_shift_operations(ops_path):
+    """
+    シフト操作をファイルから読み込む（--ops-file）
+
+    【ファイル形式】
+    1行に1つ、--op と同じ 'FROM_WEEK:WEEKS[:MONTHS]' を書く。
+    空行と # 以降（コメント）は無視する
+
+        # 第5週に予備の週を入れる
+        5:1
+        # 第20週以降をさらに1ヶ月遅らせる
+        20:0:1
+
+    【引数】
+    ops_path: ファイルのパス
+
+    【戻り値】
+    operations: parse_shift_operation()の戻り値のリスト（ファイルの順番）
+
+    【例外】
+    ValueError: 形式が正しくない行がある（行番号付きのメッセージ）
+    """
+    operations = []
+    with open(ops_path, 'r', encoding='utf-8') as f:
+        for line_number, line in enumerate(f, 1):
+            line = line.split('#', 1)[0].strip()
+            if not line:
+                continue
+            try:
+                operations.append(parse_shift_operation(line))
+            except ValueError as e:
+                raise ValueError(f"{ops_path} の{line_number}行目: {e}") from None
+    return operations
+
+
+def shift_week_by_operations(year, month, week, operations):
+    """
+    年・月・週に、複数のシフト操作を順番に適用する
+
+    【引数】
+    year, month, week: 元の年・月・週番号
+    operations: [(shift_weeks, shift_months), ...]（適用する順番）
+
+    【戻り値】
+    (year, month, week): すべてずらした後の年・月・週番号
+    """
+    for shift_weeks, shift_months in operations:
+        year, month, week = shift_week(year, month, week, shift_weeks, shift_months)
+    return year, month, week
+
+
+def compute_shifted_rows(csv_path, from_week, shift_weeks=0, shift_months=0):
+    """
+    スケジュールをシフトした結果をメモリ上で計算（CSVは書き換えない）
+
+    compute_batch_shifted_rows() に操作を1つだけ渡すのと同じ
 
     【引数】
     csv_path: CSVファイルのパス
     from_week: この週以降をシフト対象とする（例: 5）
     shift_weeks: 何週間ずらすか（例: 2）
     shift_months: 何ヶ月ずらすか（例: 1）
+
+    【戻り値】
+    compute_batch_shifted_rows()と同じ
+    """
+    return compute_batch_shifted_rows(csv_path, [(from_week, shift_weeks, shift_months)])
+
+
+def compute_batch_shifted_rows(csv_path, operations):
+    """
+    複数のシフト操作をまとめて適用した結果をメモリ上で計算（CSVは書き換えない）
+
+    【処理フロー】
+    1. CSVファイルを全行読み込み
+       （コンパイル済みスケジュールがあれば、CSVの解析と土曜日の日付計算を省く）
+    2. 行IDがない行には、ずらす前の日付から行IDを割り当てる
+       （ずらしてもイベントのキーが変わらず、カレンダーの同じイベントを移動できる）
+    3. ScheduleIndexで、最も早い操作の週以降の行を二分探索で見つける
+    4. 対象の行を日付順に1回だけなめ、その行に当てはまる操作をすべて順番に適用する
+    5. find_week_conflicts()で、同じ週に2行以上が入っていないか確認する
+
+    【複数の操作の意味】
+    - 各操作の週番号は、どれも「ずらす前」のスケジュールで数える
+      （第5週に1週入れて、第20週以降を1ヶ月遅らせる → 元の第20週以降は1週 + 1ヶ月ずれる）
+    - 1つの行に複数の操作が当てはまる場合は、指定した順番に適用する
+    - 1行につき1回だけ計算するので、操作を何回かに分けて実行するのと違い、
+      同じ行を何度も読み書きしない
+
+    【アルゴリズム】
+    - 週の位置は calculate_week_date() が返す土曜日の日付で比べる
+      （同期スクリプトと同じ計算なので、カレンダー上の週と一致する）
+    - 第1週 = CSVで最も早い週。カレンダー上の週を数えるため、
+      学習のない週（月の第5週など）も1週として数える
+
+    【引数】
+    csv_path: CSVファイルのパス
+    operations: [(from_week, shift_weeks, shift_months), ...]（適用する順番）
+
+    【戻り値】
+    (fieldnames, rows, moved):
+        fieldnames: CSVのヘッダー行（列名のリスト、ID列を含む）
+        rows: シフト後の全行（列名 → 文字列の辞書のリスト）
+        moved: 移動した行の一覧
+               [{'key': 行ID, 'from': ..., 'to': ..., 'content': ..., 'operations': ['5:1', ...]}, ...]
+               （operations は適用した操作、format_shift_operation()の形式）
+
+    【例外】
+    ValueError: シフト後に同じ週に重なる行がある（format_week_conflicts()のメッセージ）
     """
     # ステップ1: CSVファイルを読み込む
-    rows = []  # 全行を格納するリスト
-
-    with open(csv_path, 'r', encoding='utf-8') as f:
-        reader = csv.DictReader(f)
-        # fieldnames = CSVのヘッダー行（列名）
-        # 後で書き戻すときに必要
-        fieldnames = reader.fieldnames
-
-        for row in reader:
-            # 各行のデータを取得
-            year = int(row['年度'])
-            month = int(row['月'])
-            week = int(row['週'])
-
-            # ステップ2: この行をシフトするか判定
-            # 通算週番号を計算（年度と月を考慮）
-            # 例: 2025年12月の第1週 → (2025-2025)*52 + 12*4 + 1 = 49
-            # 例: 2026年1月の第1週 → (2026-2025)*52 + 1*4 + 1 = 57
-            total_week = (year - 2025) * 52 + month * 4 + week
-            from_total_week = from_week
-
-            # from_week以降の行はシフト対象
-            if total_week >= from_total_week:
-                # ステップ3: 日付を計算
-                # その年・月・週の開始日を計算
-                # month=1, week=1 → 1月1日から0週後 = 1月1日
-                current_date = datetime(year, month, 1) + timedelta(weeks=(week - 1))
-
-                # ステップ4: シフト
-                # shift_weeks週間 + shift_months*30日 後ろにずらす
-                # 注: 1ヶ月=30日として概算
-                new_date = current_date + timedelta(weeks=shift_weeks, days=shift_months * 30)
-
-                # ステップ5: 新しい年度・月を設定
-                row['年度'] = str(new_date.year)
-                row['月'] = str(new_date.month)
-                # 週番号はそのまま維持
-                # （月内での相対的な週番号なので変更しない）
-
-            # この行をリストに追加
-            rows.append(row)
-
-    # ステップ6: CSVファイルに書き戻す
+    # fieldnames = CSVのヘッダー行（列名）
+    # 後で書き戻すときに必要
+    compiled = compile_schedule(csv_path)
+    if compiled is not None:
+        with compiled:
+            fieldnames = compiled.fieldnames
+            rows = []
+            saturdays = []
+            for record, values, _ in compiled.rows():
+                rows.append(dict(zip(fieldnames, values)))
+                saturdays.append(record[4] - 1)  # 終了日（次の日曜日）の前日 = 土曜日
+    else:
+        with open(csv_path, 'r', encoding='utf-8') as f:
+            reader = csv.DictReader(f)
+            fieldnames = reader.fieldnames
+            rows = list(reader)
+        saturdays = None
+
+    # ステップ2: 行IDを割り当てる（ID列がなければ追加）
+    fieldnames = ensure_row_ids(fieldnames, rows)
+
+    # ステップ3: 対象の行を二分探索で見つける
+    index = ScheduleIndex(rows, saturdays)
+    moved = []  # 移動した行の一覧
+    if not operations:
+        return fieldnames, rows, moved
+    first_week = min(from_week for from_week, _, _ in operations)
+
+    # ステップ4: 対象の行をずらす
+    # 位置のリストを1回なめるだけなので、同じ行を2回ずらすことはない
+    for program_week, position in index.weeks_from(first_week):
+        applicable = [operation for operation in operations if operation[0] <= program_week]
+        row = rows[position]
+        year, month, week = int(row['年度']), int(row['月']), int(row['週'])
+        new_year, new_month, new_week = shift_week_by_operations(
+            year, month, week, [(shift_weeks, shift_months) for _, shift_weeks, shift_months in applicable])
+        if (new_year, new_month, new_week) == (year, month, week):
+            continue
+
+        row['年度'] = str(new_year)
+        row['月'] = str(new_month)
+        row['週'] = str(new_week)
+        moved.append({
+            'key': row[sync_to_calendar.ROW_ID_COLUMN],
+            'from': f"{year}/{month:02d} Week{week}",
+            'to': f"{new_year}/{new_month:02d} Week{new_week}",
+            'content': row['学習内容'],
+            'operations': [format_shift_operation(operation) for operation in applicable],
+        })
+
+    # ステップ5: 同じ週に重なる行がないか確認（あればCSVを書き換える前・同期する前に中止）
+    # 操作を1つずつ実行して問題がなくても、組み合わせると重なることがあるので、
+    # すべての操作を適用した結果で確認する
+    conflicts = find_week_conflicts(rows, moved)
+    if conflicts:
+        raise ValueError(format_week_conflicts(conflicts))
+
+    return fieldnames, rows, moved
+
+
+def write_schedule_rows(csv_path, fieldnames, rows):
+    """
+    全行をCSVファイルに書き戻す
+
+    【引数】
+    csv_path: CSVファイルのパス
+    fieldnames: CSVのヘッダー行（列名のリスト）
+    rows: 全行（列名 → 文字列の辞書のリスト）
+    """
     with open(csv_path, 'w', encoding='utf-8', newline='') as f:
         writer = csv.DictWriter(f, fieldnames=fieldnames)
         writer.writeheader()  # ヘッダー行を書き込み
         writer.writerows(rows)  # 全データ行を書き込み
 
-    print(f"✓ スケジュールを更新しました: {csv_path}")
+
+def shift_schedule(csv_path, from_week, shift_weeks=0, shift_months=0):
+    """
+    スケジュールをシフト（後ろにずらす）
+
+    shift_schedule_batch() に操作を1つだけ渡すのと同じ
+
+    【引数】
+    csv_path: CSVファイルのパス
+    from_week: この週以降をシフト対象とする（例: 5）
+    shift_weeks: 何週間ずらすか（例: 2）
+    shift_months: 何ヶ月ずらすか（例: 1）
+
+    【戻り値】
+    moved: 移動した行の一覧（compute_batch_shifted_rows()の戻り値と同じ）
+    """
+    return shift_schedule_batch(csv_path, [(from_week, shift_weeks, shift_months)])
+
+
+def shift_schedule_batch(csv_path, operations):
+    """
+    複数のシフト操作をまとめて適用する
+
+    【処理フロー】
+    1. compute_batch_shifted_rows()でシフト後の全行を計算
+    2. 全行をCSVファイルに書き戻す（操作の数に関係なく1回だけ）
+
+    【引数】
+    csv_path: CSVファイルのパス
+    operations: [(from_week, shift_weeks, shift_months), ...]（適用する順番）
+
+    【戻り値】
+    moved: 移動した行の一覧（compute_batch_shifted_rows()の戻り値と同じ）
+
+    【例外】
+    ValueError: シフト後に同じ週に重なる行がある（CSVは書き換えない）
+    """
+    fieldnames, rows, moved = compute_batch_shifted_rows(csv_path, operations)
+
+    # CSVファイルに書き戻す
+    write_schedule_rows(csv_path, fieldnames, rows)
+
+    print(f"✓ スケジュールを更新しました: {csv_path}（移動: {len(moved)} 件）")
+    return moved
 
 
 def main():
@@ -136,10 +548,17 @@ def main():
     6. （--syncオプションがあれば）Googleカレンダーに同期
 
     【コマンドライン引数】
-    --from-week: 開始週番号（必須）
+    --from-week: 開始週番号（--op / --ops-file を使わない場合は必須）
     --shift-weeks: シフトする週数（オプション、デフォルト: 0）
     --shift-months: シフトする月数（オプション、デフォルト: 0）
+    --op: シフト操作 FROM_WEEK:WEEKS[:MONTHS]（オプション、複数指定可）
+    --ops-file: シフト操作を1行に1つ書いたファイル（オプション）
     --sync: 同期フラグ（オプション、指定すると自動同期）
+    --lean: --sync で変わったフィールド（日付など）だけを送信する（オプション）
+    --plan: 計画表示フラグ（オプション、CSVもカレンダーも変更しない。table / json）
+    --quota-per-minute: --sync の1分あたりのAPI呼び出しの上限（オプション、sync-to-calendar.py と同じ）
+    --quota-per-day: --sync の1日あたりのAPI呼び出しの上限（オプション、sync-to-calendar.py と同じ）
+    --metrics-out: 計測結果の出力先（オプション、.jsonならJSON、それ以外はOpenMetrics形式）
     """
     # ステップ1: コマンドライン引数パーサーを作成
     parser = argparse.ArgumentParser(
@@ -150,8 +569,7 @@ def main():
     parser.add_argument(
         '--from-week',
         type=int,  # 整数型
-        required=True,  # 必須引数
-        help='この週以降をリスケジュール対象とする（例: 5）'
+        help='プログラム開始から数えてこの週以降をリスケジュール対象とする（例: 5）'
     )
     parser.add_argument(
         '--shift-weeks',
@@ -165,26 +583,132 @@ def main():
         default=0,
         help='何ヶ月後ろにずらすか（例: 1）'
     )
+    parser.add_argument(
+        '--op',
+        action='append',  # 複数回指定できる（指定した順番に適用）
+        default=[],
+        metavar='FROM_WEEK:WEEKS[:MONTHS]',
+        help='シフト操作を追加（例: 5:1 = 第5週以降を1週間、20:0:1 = 第20週以降を1ヶ月）'
+    )
+    parser.add_argument(
+        '--ops-file',
+        help='シフト操作を1行に1つ（--op と同じ形式、# 以降はコメント）書いたファイル'
+    )
     parser.add_argument(
         '--sync',
         action='store_true',  # フラグ（True/False）
         help='リスケジュール後、Googleカレンダーに自動同期する'
     )
+    parser.add_argument(
+        '--lean',
+        action='store_true',
+        help='--sync で、変わったフィールド（移動した行なら日付とタイトル）だけを送信（patch）する'
+    )
+    parser.add_argument(
+        '--plan',
+        nargs='?',
+        const='table',
+        choices=['table', 'json'],
+        help='移動する学習項目・同期計画・APIコストを表示するだけで、CSVもカレンダーも変更しない'
+    )
+    parser.add_argument(
+        '--quota-per-minute',
+        type=int,
+        metavar='CALLS',
+        help='--sync の1分あたりのAPI呼び出しの上限（読み取り・再送も数える。超えそうなら待つ）'
+    )
+    parser.add_argument(
+        '--quota-per-day',
+        type=int,
+        metavar='CALLS',
+        help='--sync の1日（UTC）あたりのAPI呼び出しの上限（超える分の書き込みは次回の同期に回す）'
+    )
+    parser.add_argument(
+        '--metrics-out',
+        help='フェーズごとの時間・API呼び出し回数・レイテンシ・ピークメモリを書き出すファイル'
+             '（.jsonならJSON、それ以外はOpenMetrics形式）'
+    )
 
     # 引数を解析
     # コマンドライン: python script.py --from-week 5 --shift-weeks 2
     # → args.from_week = 5, args.shift_weeks = 2
     args = parser.parse_args()
 
-    # ステップ2: 引数の検証
-    # shift_weeks と shift_months の両方が0の場合はエラー
-    if args.shift_weeks == 0 and args.shift_months == 0:
-        print("❌ --shift-weeks または --shift-months を指定してください")
+    # APIのクォータ予算（sync-to-calendar.py の同期・cron と1日の使用回数を共有する）
+    QUOTA.configure(args.quota_per_minute, args.quota_per_day)
+
+    if args.metrics_out:
+        # 計測を有効にして、終了時（エラー時も）に結果を書き出す
+        METRICS.start_memory_tracking()
+        try:
+            run_reschedule(args)
+        finally:
+            METRICS.stop_memory_tracking()
+            METRICS.write(args.metrics_out)
+            print(f"📈 計測結果を書き出しました: {args.metrics_out}")
+    else:
+        run_reschedule(args)
+
+
+def build_operations(args):
+    """
+    コマンドライン引数からシフト操作のリストを作る
+
+    【順番】
+    1. --from-week と --shift-weeks / --shift-months（指定されていれば）
+    2. --ops-file の各行（ファイルの順番）
+    3. --op（指定した順番）
+
+    【引数】
+    args: main()で解析したコマンドライン引数
+
+    【戻り値】
+    operations: [(from_week, shift_weeks, shift_months), ...]
+    （不正な指定があればメッセージを表示して終了）
+    """
+    operations = []
+    if args.from_week is not None or args.shift_weeks or args.shift_months:
+        if args.from_week is None:
+            print("❌ --from-week を指定してください")
+            sys.exit(1)
+        # shift_weeks と shift_months の両方が0の場合はエラー
+        if args.shift_weeks == 0 and args.shift_months == 0:
+            print("❌ --shift-weeks または --shift-months を指定してください")
+            sys.exit(1)
+        # 前にずらすと、シフトしない行と同じ週に重なるため受け付けない
+        # （後ろにずらして重なる場合は compute_batch_shifted_rows() で確認する）
+        if args.shift_weeks < 0 or args.shift_months < 0:
+            print("❌ --shift-weeks / --shift-months には0以上の値を指定してください")
+            sys.exit(1)
+        operations.append((args.from_week, args.shift_weeks, args.shift_months))
+
+    try:
+        if args.ops_file:
+            operations.extend(load_shift_operations(args.ops_file))
+        operations.extend(parse_shift_operation(text) for text in args.op)
+    except OSError as e:
+        print(f"❌ 操作ファイルを読み込めません: {e}")
+        sys.exit(1)
+    except ValueError as e:
+        print(f"❌ {e}")
         sys.exit(1)
 
-    print("=" * 60)
-    print("  学習スケジュール リスケジュール")
-    print("=" * 60)
+    if not operations:
+        print("❌ --from-week と --shift-weeks / --shift-months、または --op / --ops-file を指定してください")
+        sys.exit(1)
+    return operations
+
+
+def run_reschedule(args):
+    """
+    コマンドライン引数に従ってリスケジュール・計画表示・同期を実行
+
+    【引数】
+    args: main()で解析したコマンドライン引数
+    """
+
+    # ステップ2: 引数の検証
+    operations = build_operations(args)
 
     # ステップ3: CSVファイルのパスを構築
     # __file__ = このスクリプトのパス
@@ -197,13 +721,33 @@ def main():
         print(f"❌ スケジュールファイルが見つかりません: {csv_path}")
         sys.exit(1)
 
+    # --plan: シフト結果と同期計画を表示するだけ（確認なし、何も書き換えない）
+    if args.plan:
+        try:
+            _, rows, moved = compute_batch_shifted_rows(csv_path, operations)
+        except ValueError as e:
+            print(f"❌ {e}")
+            sys.exit(1)
+        schedule = [schedule_item_from_row(row) for row in rows]
+        report = plan_schedule_sync(schedule, lean=args.lean)
+        report['moved_rows'] = moved
+        print_plan_report(report, args.plan)
+        return
+
+    print("=" * 60)
+    print("  学習スケジュール リスケジュール")
+    print("=" * 60)
+
     # ステップ4: 確認メッセージを表示
     print(f"\n📋 リスケジュール内容:")
-    print(f"  - 対象: Week {args.from_week} 以降")
-    if args.shift_weeks > 0:
-        print(f"  - シフト: {args.shift_weeks} 週間後ろへ")
-    if args.shift_months > 0:
-        print(f"  - シフト: {args.shift_months} ヶ月後ろへ")
+    for from_week, shift_weeks, shift_months in operations:
+        print(f"  - 対象: Week {from_week} 以降")
+        if shift_weeks > 0:
+            print(f"    シフト: {shift_weeks} 週間後ろへ")
+        if shift_months > 0:
+            print(f"    シフト: {shift_months} ヶ月後ろへ")
+    if len(operations) > 1:
+        print("  （週番号はどれも変更前のスケジュールで数えます）")
 
     print(f"\n⚠️  この操作により、{csv_path} が更新されます")
 
@@ -217,26 +761,34 @@ def main():
 
     # ステップ5: スケジュールをシフト
     print("\n📊 スケジュールを更新中...")
-    shift_schedule(csv_path, args.from_week, args.shift_weeks, args.shift_months)
+    try:
+        with METRICS.phase('shift'):
+            moved = shift_schedule_batch(csv_path, operations)
+    except ValueError as e:
+        # 同じ週に重なる行がある → CSVは書き換えず、同期もしない
+        print(f"❌ {e}")
+        print("💡 --shift-weeks で週単位にずらすか、重なる週の行を先に移動してください")
+        sys.exit(1)
 
     # ステップ6: Googleカレンダーに同期（--syncオプションがある場合）
     if args.sync:
-        print("\n🔄 Googleカレンダーに同期中...")
-
-        # Google Calendar API認証
-        service = get_calendar_service()
-        if not service:
+        # 更新後のスケジュールから、移動した行だけをキーで取り出す
+        # （行IDがキーなので、カレンダーの既存イベントの日付を更新するだけで済む）
+        moved_keys = {entry['key'] for entry in moved}
+        with METRICS.phase('load_schedule'):
+            schedule = load_schedule_by_keys(csv_path, moved_keys)
+
+        print(f"\n🔄 移動した {len(schedule)} 件をGoogleカレンダーに同期中...")
+        try:
+            synced = not schedule or sync_schedule(schedule, lean=args.lean)
+        except TimeoutError as e:
+            # 別の同期（cronなど）が長時間終わらない。CSVはすでに更新済み
+            print(f"❌ {e}")
+            print("💡 あとで python settings/calendar-sync/scripts/sync-to-calendar.py を実行してください")
+            sys.exit(1)
+        if not synced:
             print("❌ Google認証に失敗しました")
             sys.exit(1)
-
-        # カレンダー取得/作成
-        calendar_id = get_or_create_calendar(service)
-
-        # 更新後のスケジュールを読み込み
-        schedule = load_schedule(csv_path)
-
-        # イベント同期
-        sync_events_to_calendar(service, calendar_id, schedule)
     else:
         # --syncオプションがない場合は手動同期の案内
         print("\n💡 Googleカレンダーに同期する場合は、以下を実行してください:")
@@ -7,39 +7,60 @@ dev-schedule.csvに記載された学習スケジュールを読み込み、
 Googleカレンダーに週単位の終日イベントとして自動登録・更新します。
 
 【処理の流れ】
-1. Google Calendar APIで認証
-2. 専用カレンダーを取得/作成
-3. CSVファイルから学習スケジュールを読み込み
-4. 各週のイベントをカレンダーに同期（新規作成 or 更新）
+1. CSVファイルから学習スケジュールを読み込み
+2. 同期状態ストアと比べて変更がなければ終了（API呼び出しなし）
+3. Google Calendar APIで認証
+4. 専用カレンダーを取得/作成
+5. 差分のある週だけ同期（新規作成 or 更新）
 
 【主な変数の依存関係】
-main() → get_calendar_service() → service（APIクライアント）
-main() → get_or_create_calendar(service) → calendar_id（カレンダーID）
 main() → load_schedule() → schedule（学習データのリスト）
-main() → sync_events_to_calendar(service, calendar_id, schedule)
+main() → sync_schedule(schedule) → SyncState（同期状態ストア）
+sync_schedule() → get_credentials() → build_calendar_service() → service（APIクライアント）
+sync_schedule() → get_or_create_calendar(service, state) → calendar_id（カレンダーID）
+sync_schedule() → sync_events_to_calendar(service, calendar_id, schedule)
 """
 
 # ============================================================
 # ライブラリのインポート
 # ============================================================
 
+import argparse  # コマンドライン引数を解析
 import csv  # CSVファイル読み書き
+import functools  # 読み込んだディスカバリードキュメントのキャッシュ
+import hashlib  # コンパイル済みスケジュールの元CSVのハッシュ
+import io  # 読み込んだCSVの解析
+import itertools  # ストリーミング同期のチャンク分割
+import json  # 同期計画のJSON出力
+import math  # API呼び出し回数の見積もり
+import os  # CSVの更新時刻
+import pickle  # ディスカバリードキュメントのディスクキャッシュ
+import struct  # コンパイル済みスケジュールに収まらない値の判定
 import sys  # システム終了処理
+import time  # キャッシュの有効期限チェック
+import urllib.request  # ディスカバリードキュメントのダウンロード
+from concurrent.futures import ThreadPoolExecutor  # 複数人の一括同期
 from datetime import datetime, timedelta  # 日付計算用
 from pathlib import Path  # ファイルパス操作用
-
-# Google Calendar API関連のライブラリをインポート
-# これらがインストールされていない場合はエラーメッセージを表示
-try:
-    from google.auth.transport.requests import Request  # トークン更新用
-    from google.oauth2.credentials import Credentials  # 認証情報管理
-    from google_auth_oauthlib.flow import InstalledAppFlow  # OAuth認証フロー
-    from googleapiclient.discovery import build  # APIクライアント構築
-except ImportError:
-    print("❌ 必要なライブラリがインストールされていません")
-    print("\n以下のコマンドを実行してください:")
-    print("pip install google-auth-oauthlib google-auth-httplib2 google-api-python-client")
-    sys.exit(1)
+from types import SimpleNamespace  # 遅延インポートしたライブラリのまとめ
+
+# Google Calendar API関連のライブラリ（google-auth / googleapiclient）は
+# 読み込みに時間がかかるため、ここではインポートしない。
+# APIを使う処理の中で import_google_libraries() を呼んで初めて読み込む
+# （CSVだけを扱う reschedule-learning.py などの起動が速くなる）
+
+# 同じディレクトリのバッチ実行・変更取得・クォータ予算・リトライ・並行実行・計測モジュール
+from calendar_batch import MAX_BATCH_SIZE, execute_batched
+from calendar_pull import list_changed_events
+from calendar_quota import QUOTA, order_by_urgency
+from calendar_retry import execute_with_retry, get_error_status
+from calendar_workers import run_in_workers
+from compiled_schedule import open_compiled, write_compiled
+from credential_broker import CREDENTIALS, calendar_lock
+from file_watch import FileWatcher
+from ics_export import read_source_digest, source_digest, write_calendar
+from sync_metrics import METRICS
+from sync_state import DEFAULT_STATE_PATH, SyncState, content_hash, field_hashes
 
 # ============================================================
 # グローバル設定（スクリプト全体で使う定数）
@@ -49,6 +70,10 @@ except ImportError:
 # 'calendar'はカレンダーの読み書き権限を意味する
 SCOPES = ['https://www.googleapis.com/auth/calendar']
 
+# 認証ファイルのパス（settings/credentials/）
+DEFAULT_TOKEN_PATH = Path(__file__).parent.parent.parent / 'credentials' / 'token.json'
+DEFAULT_CREDENTIALS_PATH = Path(__file__).parent.parent.parent / 'credentials' / 'credentials.json'
+
 # カレンダー設定
 CALENDAR_NAME = 'フルスタック学習プログラム'  # 作成するカレンダーの名前
 EVENT_COLOR_ID = '9'  # イベントの色（1-11の数字で指定、9=青色）
@@ -58,131 +83,418 @@ EVENT_COLOR_ID = '9'  # イベントの色（1-11の数字で指定、9=青色
 # 1440分 = 24時間 = 1日前、60分 = 1時間前
 DEFAULT_REMINDER_MINUTES = [1440, 60]
 
+# 同期設定
+# 作成・更新リクエストを何件ずつバッチにまとめて送信するか（1なら1件ずつ）
+DEFAULT_BATCH_SIZE = MAX_BATCH_SIZE
+# --prune で1回に削除してよいイベント数の上限（CSVの読み込みミスで全件消さないため）
+DEFAULT_PRUNE_LIMIT = 50
+# スケジュールの行ID（イベントのキー）を入れるCSVの列名
+ROW_ID_COLUMN = 'ID'
+# --watch で最後の保存からこの秒数だけ変更がなければ同期する
+WATCH_DEBOUNCE_SECONDS = 0.3
+# 複数人の一括同期（--manifest）で同時に同期する人数
+DEFAULT_TENANT_WORKERS = 4
+# コンパイル済みスケジュール（型変換・日付計算済みのバイナリ）の保存先（settings/credentials/cache/）
+COMPILED_SCHEDULE_DIR = Path(__file__).parent.parent.parent / 'credentials' / 'cache' / 'schedules'
+# ストリーミング同期（--stream）で1回に計画・書き込みする行数
+STREAM_CHUNK_SIZE = DEFAULT_BATCH_SIZE * 10
+# --ics で書き出す .icsファイルのパス（settings/calendar-sync/export/）
+DEFAULT_ICS_PATH = Path(__file__).parent.parent / 'export' / 'dev-schedule.ics'
+# 保存済みのカレンダーIDを確認なしで使う期間（過ぎたら calendars().get で1回確認）
+CALENDAR_ID_TTL_SECONDS = 24 * 60 * 60  # 1日
+# アウトボックス（送信待ちの書き込み）を、APIにエラーで断られてもこの回数までは次回に送り直す
+OUTBOX_MAX_ATTEMPTS = 5
+# 予算を超えて次回に回した書き込みを、何件まで一覧表示するか
+DEFERRED_REPORT_LIMIT = 10
+
+# 軽量モード（--lean）でレスポンスに含めるフィールド（fields= マスク）
+# 書き込みの結果として記録するのはイベントIDとetagだけ
+WRITE_RESPONSE_FIELDS = 'id,etag'
+# 既存イベントの一覧は、比較に使うフィールドだけ（event_signature()を参照）
+LIST_EVENT_FIELDS = ('items(id,etag,summary,description,start,end,colorId,reminders,'
+                     'extendedProperties),nextPageToken')
+
+# APIクライアント設定
+CALENDAR_API_VERSION = 'v3'
+# ディスカバリードキュメント（APIの仕様書）のキャッシュ（settings/credentials/cache/）
+DISCOVERY_CACHE_DIR = Path(__file__).parent.parent.parent / 'credentials' / 'cache'
+DISCOVERY_CACHE_MAX_AGE_SECONDS = 30 * 24 * 60 * 60  # 30日で取り直す
+DISCOVERY_URL = 'https://www.googleapis.com/discovery/v1/apis/calendar/{version}/rest'
+
 
 # ============================================================
 # 関数定義
 # ============================================================
 
-def get_calendar_service():
+def import_google_libraries():
     """
-    Google Calendar APIサービスを取得
+    Google Calendar API関連のライブラリを読み込む（遅延インポート）
+
+    【なぜ関数の中でインポートするのか】
+    google-auth / googleapiclient の読み込みには時間がかかる。
+    APIを使う処理の中でだけ読み込むことで、
+    CSVだけを扱う処理（--plan やリスケジュールのみ）の起動を速くする。
+    2回目以降の呼び出しはPythonのモジュールキャッシュから返るので速い
+
+    【戻り値】
+    google: ライブラリをまとめたオブジェクト
+            （google.Request, google.Credentials, google.InstalledAppFlow,
+              google.build_from_document, google.httplib2, google.AuthorizedHttp）
+    """
+    # これらがインストールされていない場合はエラーメッセージを表示
+    try:
+        from google.auth.transport.requests import Request  # トークン更新用
+        from google.oauth2.credentials import Credentials  # 認証情報管理
+        from google_auth_oauthlib.flow import InstalledAppFlow  # OAuth認証フロー
+        from googleapiclient.discovery import build_from_document  # APIクライアント構築
+        import httplib2  # HTTP通信（ワーカーごとに接続を分けるため）
+        from google_auth_httplib2 import AuthorizedHttp  # 認証付きHTTP接続
+    except ImportError:
+        print("❌ 必要なライブラリがインストールされていません")
+        print("\n以下のコマンドを実行してください:")
+        print("pip install google-auth-oauthlib google-auth-httplib2 google-api-python-client")
+        sys.exit(1)
+
+    return SimpleNamespace(
+        Request=Request,
+        Credentials=Credentials,
+        InstalledAppFlow=InstalledAppFlow,
+        build_from_document=build_from_document,
+        httplib2=httplib2,
+        AuthorizedHttp=AuthorizedHttp,
+    )
+
+
+@functools.lru_cache(maxsize=None)
+def load_discovery_document(version=CALENDAR_API_VERSION):
+    """
+    Calendar APIのディスカバリードキュメントを読み込む（ディスクにキャッシュ）
+
+    【処理フロー】
+    1. キャッシュファイル（APIバージョンごと）が有効期限内ならそれを読み込む
+    2. なければ googleapiclient に同梱された文書、それもなければダウンロードで取得
+    3. 解析済みの辞書をpickle形式でキャッシュに保存
+
+    解析済みの辞書を保存しておくので、次回以降はJSONの解析も不要になる。
+    同じプロセス内（ワーカーごとのクライアント作成など）ではメモリ上の結果を再利用する
+
+    【引数】
+    version: APIバージョン（例: 'v3'）
+
+    【戻り値】
+    document: ディスカバリードキュメント（辞書）
+    """
+    cache_path = DISCOVERY_CACHE_DIR / f'calendar-{version}.pickle'
+    if cache_path.exists() and time.time() - cache_path.stat().st_mtime < DISCOVERY_CACHE_MAX_AGE_SECONDS:
+        with open(cache_path, 'rb') as f:
+            return pickle.load(f)
+
+    document_text = None
+    try:
+        # google-api-python-client 2.x は主要APIの文書を同梱している
+        from googleapiclient.discovery_cache import get_static_doc
+        document_text = get_static_doc('calendar', version)
+    except ImportError:
+        pass
+    if document_text is None:
+        with urllib.request.urlopen(DISCOVERY_URL.format(version=version)) as response:
+            document_text = response.read().decode('utf-8')
+
+    document = json.loads(document_text)
+    cache_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(cache_path, 'wb') as f:
+        pickle.dump(document, f, protocol=pickle.HIGHEST_PROTOCOL)
+    return document
+
+
+def get_credentials(token_path=DEFAULT_TOKEN_PATH, credentials_path=DEFAULT_CREDENTIALS_PATH,
+                    interactive=True):
+    """
+    Google Calendar APIの認証情報を取得
 
     【処理フロー】
     1. 既存のtoken.jsonを確認（保存済みの認証情報）
-    2. トークンが無効/期限切れなら更新
+    2. トークンが無効/期限切れ間近なら更新
+       （1〜2は credential_broker.CREDENTIALS が行う。同じプロセスではメモリのキャッシュを使い、
+         更新と書き込みはファイルロックで他のプロセスと1つずつ行う）
     3. トークンが存在しない場合は新規認証
        - credentials.jsonからOAuth設定を読み込み
        - ブラウザで認証URLを開いてコードを取得
        - 取得したコードでトークンを生成
-    4. APIクライアント（service）を返す
+    4. 認証情報（creds）を返す
+       （API呼び出し中にAuthorizedHttpが行う更新も CREDENTIALS を通るように包んで返す）
 
     【変数の依存関係】
-    credentials_path (credentials.json) → flow → creds → service
-    token_path (token.json) → creds → service
+    credentials_path (credentials.json) → flow → creds
+    token_path (token.json) → creds
+
+    【引数】
+    token_path: 保存済みトークンのパス（デフォルト: settings/credentials/token.json）
+    credentials_path: OAuth設定のパス（デフォルト: settings/credentials/credentials.json）
+    interactive: Falseならブラウザでの新規認証を行わない（複数人の一括同期用）
+
+    【戻り値】
+    creds: 認証情報（Noneの場合は認証失敗）
+    """
+    google = import_google_libraries()
+    token_path = Path(token_path)
+    credentials_path = Path(credentials_path)
+
+    def load_token(path):
+        # token.jsonが存在する場合、保存済みの認証情報を読み込む
+        if not path.exists():
+            return None
+        return google.Credentials.from_authorized_user_file(str(path), SCOPES)
+
+    def refresh_token(creds):
+        creds.refresh(google.Request())
+
+    # ステップ1〜2: 保存済みの認証情報を使う（期限が近ければ更新して保存）
+    creds = CREDENTIALS.authorized(token_path, load_token, refresh_token)
+    if creds:
+        return creds
+
+    # ステップ3: 新規認証が必要
+    # 入力を待てない場合（一括同期）はエラー
+    if not interactive:
+        print(f"❌ 有効なトークンがありません（先に1人ずつ認証してください）: {token_path}")
+        return None
+
+    # credentials.jsonが存在しない場合はエラー
+    if not credentials_path.exists():
+        print(f"❌ 認証情報ファイルが見つかりません: {credentials_path}")
+        print("📖 セットアップ手順: settings/calendar-sync/docs/CALENDAR_SETUP.md を参照してください")
+        return None
+
+    # OAuth認証フローを開始
+    flow = google.InstalledAppFlow.from_client_secrets_file(
+        str(credentials_path), SCOPES)
+
+    # WSL2環境用の設定
+    # redirect_uriを'urn:ietf:wg:oauth:2.0:oob'に設定すると、
+    # ブラウザでコードが表示され、手動入力できる
+    flow.redirect_uri = 'urn:ietf:wg:oauth:2.0:oob'
+
+    # 認証URLを生成して表示
+    print("\n以下のURLをブラウザで開いて認証してください:")
+    auth_url, _ = flow.authorization_url(prompt='consent')
+    print(f"\n{auth_url}\n")
+
+    # ユーザーが入力した認証コードを取得
+    code = input("認証コードを入力してください: ")
+
+    # 認証コードを使ってトークンを取得
+    flow.fetch_token(code=code)
+    creds = flow.credentials
+
+    # ステップ4: トークンを保存（次回以降の認証を省略）
+    CREDENTIALS.store(token_path, creds)
+    return CREDENTIALS.authorized(token_path, load_token, refresh_token)
+
+
+def build_calendar_service(creds):
+    """
+    認証情報からGoogle Calendar APIクライアントを構築
+
+    【なぜ毎回新しいHTTP接続を作るのか】
+    httplib2 の接続はスレッドセーフではないため、
+    並行実行（--workers）ではワーカーごとにこの関数でクライアントを作る
+
+    【引数】
+    creds: get_credentials()の戻り値（トークンの更新は CREDENTIALS を通る）
+
+    【戻り値】
+    service: Google Calendar APIクライアント
+    """
+    # キャッシュしたディスカバリードキュメントから'calendar' APIのクライアントを作成
+    # （build()のように毎回ディスカバリードキュメントを読み込み・解析しない）
+    google = import_google_libraries()
+    with METRICS.phase('discovery'):
+        http = google.AuthorizedHttp(creds, http=google.httplib2.Http())
+        return google.build_from_document(load_discovery_document(), http=http)
+
+
+def get_calendar_service(interactive=True):
+    """
+    Google Calendar APIサービスを取得
+
+    【処理フロー】
+    1. get_credentials()で認証情報を取得
+    2. build_calendar_service()でAPIクライアントを構築
+
+    【引数】
+    interactive: Falseならブラウザでの新規認証を行わない（get_credentials()と同じ）
 
     【戻り値】
     service: Google Calendar APIクライアント（Noneの場合は認証失敗）
     """
-    creds = None  # 認証情報を格納する変数
-
-    # パスの構築
-    # __file__ = このスクリプトのパス
-    # parent = 親ディレクトリ（scripts/ → calendar-sync/ → settings/）
-    script_dir = Path(__file__).parent.parent  # settings/calendar-sync/
-    token_path = script_dir.parent / 'credentials' / 'token.json'  # settings/credentials/token.json
-    credentials_path = script_dir.parent / 'credentials' / 'credentials.json'  # settings/credentials/credentials.json
-
-    # ステップ1: 既存のトークンファイルを確認
-    # token.jsonが存在する場合、保存済みの認証情報を読み込む
-    if token_path.exists():
-        creds = Credentials.from_authorized_user_file(str(token_path), SCOPES)
-
-    # ステップ2: 認証情報の検証と更新
-    # creds.valid = Trueなら有効な認証情報
-    if not creds or not creds.valid:
-        # トークンが期限切れで、かつリフレッシュトークンがある場合
-        if creds and creds.expired and creds.refresh_token:
-            # トークンを更新（再認証不要）
-            creds.refresh(Request())
-        else:
-            # ステップ3: 新規認証が必要
-            # credentials.jsonが存在しない場合はエラー
-            if not credentials_path.exists():
-                print(f"❌ 認証情報ファイルが見つかりません: {credentials_path}")
-                print("📖 セットアップ手順: settings/calendar-sync/docs/CALENDAR_SETUP.md を参照してください")
-                return None
+    creds = get_credentials(interactive=interactive)
+    if not creds:
+        return None
+    return build_calendar_service(creds)
+
+
+def find_calendar(service, calendar_name=CALENDAR_NAME):
+    """
+    専用カレンダーを探す（見つからなくても作成しない）
+
+    【処理フロー】
+    1. 既存のカレンダー一覧をページごとに取得
+    2. calendar_nameと一致するカレンダーを探す
+    3. 見つかればそのIDを、最後のページまでなければNoneを返す
+
+    【引数】
+    service: Google Calendar APIクライアント
+    calendar_name: カレンダー名（デフォルト: CALENDAR_NAME）
+
+    【戻り値】
+    calendar_id: カレンダーのID（文字列）、見つからなければNone
+    """
+    page_token = None
+    while True:
+        # ステップ1: 既存のカレンダーリストを1ページ取得
+        # service.calendarList().list() = カレンダー一覧取得API
+        # fields = 必要な項目だけ返してもらう（購読カレンダーが多いと応答が大きくなるため）
+        calendar_list = execute_with_retry(lambda: service.calendarList().list(
+            pageToken=page_token,
+            fields='items(id,summary),nextPageToken'
+        ))
+
+        # ステップ2: カレンダー名で検索
+        # calendar_list.get('items', []) = カレンダーの配列を取得（なければ空配列）
+        for calendar in calendar_list.get('items', []):
+            # summary = カレンダーの表示名
+            if calendar['summary'] == calendar_name:
+                print(f"✓ カレンダーを見つけました: {calendar_name}")
+                return calendar['id']  # カレンダーIDを返す
+
+        # ステップ3: 次のページがなければ終了
+        # （1ページ目だけで判断すると、既存のカレンダーがあるのに重複して作成してしまう）
+        page_token = calendar_list.get('nextPageToken')
+        if not page_token:
+            return None
+
+
+def calendar_exists(service, calendar_id):
+    """
+    保存済みのカレンダーIDがまだ使えるかを確認
+
+    【ロジック】
+    calendars().get() はカレンダー1件分の軽い呼び出し。
+    404（削除済み）や403（アクセス権がなくなった）ならFalseを返す
+
+    【引数】
+    service: Google Calendar APIクライアント
+    calendar_id: 確認するカレンダーID
+
+    【戻り値】
+    True: 使えるカレンダー、False: 使えない
+    """
+    try:
+        execute_with_retry(lambda: service.calendars().get(calendarId=calendar_id, fields='id'))
+        return True
+    except Exception as e:
+        if get_error_status(e) in (403, 404):
+            return False
+        raise
+
+
+def calendar_lookup_method(record, verify=False, now=None):
+    """
+    カレンダーIDを解決するときに呼ぶAPIメソッドを判定（API呼び出しなし）
+
+    【判定】
+    - 記録があり、確認してからCALENDAR_ID_TTL_SECONDS以内 → 呼び出しなし（None）
+    - 記録があるが期限切れ（または verify=True） → 'calendars.get'
+    - 記録がない → 'calendarList.list'
 
-            # OAuth認証フローを開始
-            flow = InstalledAppFlow.from_client_secrets_file(
-                str(credentials_path), SCOPES)
+    【引数】
+    record: state.get_calendar_record() の戻り値
+    verify: Trueなら期限内でも確認する
+    now: 現在時刻（省略時は time.time()）
+
+    【戻り値】
+    method: APIメソッド名、呼び出し不要ならNone
+    """
+    if record is None:
+        return 'calendarList.list'
+    now = time.time() if now is None else now
+    if not verify and now - record[1] < CALENDAR_ID_TTL_SECONDS:
+        return None
+    return 'calendars.get'
 
-            # WSL2環境用の設定
-            # redirect_uriを'urn:ietf:wg:oauth:2.0:oob'に設定すると、
-            # ブラウザでコードが表示され、手動入力できる
-            flow.redirect_uri = 'urn:ietf:wg:oauth:2.0:oob'
 
-            # 認証URLを生成して表示
-            print("\n以下のURLをブラウザで開いて認証してください:")
-            auth_url, _ = flow.authorization_url(prompt='consent')
-            print(f"\n{auth_url}\n")
+def resolve_calendar(service, state=None, create=True, verify=False, calendar_name=CALENDAR_NAME):
+    """
+    専用カレンダーのIDを解決（保存済みのIDを優先して使う）
 
-            # ユーザーが入力した認証コードを取得
-            code = input("認証コードを入力してください: ")
+    【処理フロー】
+    1. 同期状態ストアに確認済みのIDがあり、期限内ならそのまま使う（API呼び出しなし）
+    2. 期限切れなら calendars().get() で1回だけ確認し、確認時刻を更新
+    3. 記録がない、またはカレンダーが削除されていたら、一覧を全ページ検索
+    4. それでもなければ（create=Trueのとき）新規作成
+    5. 見つけた・作成したIDを同期状態ストアに保存
 
-            # 認証コードを使ってトークンを取得
-            flow.fetch_token(code=code)
-            creds = flow.credentials
+    【引数】
+    service: Google Calendar APIクライアント
+    state: 同期状態ストア（Noneなら毎回一覧を検索）
+    create: Falseなら見つからなくても作成しない（--planの読み取り専用モード用）
+    verify: Trueなら期限内でも存在を確認する
+    calendar_name: カレンダー名（デフォルト: CALENDAR_NAME）
 
-        # ステップ4: トークンを保存（次回以降の認証を省略）
-        # ディレクトリが存在しない場合は作成
-        token_path.parent.mkdir(parents=True, exist_ok=True)
-        with open(token_path, 'w') as token:
-            token.write(creds.to_json())
+    【戻り値】
+    calendar_id: カレンダーのID（文字列）、見つからず作成もしなければNone
+    """
+    # ステップ1〜2: 保存済みのIDを使う
+    record = state.get_calendar_record(calendar_name) if state else None
+    if record:
+        method = calendar_lookup_method(record, verify)
+        if method is None:
+            return record[0]
+        if calendar_exists(service, record[0]):
+            state.set_calendar_id(calendar_name, record[0])
+            return record[0]
+        print(f"⚠️  保存済みのカレンダーが見つからないため、一覧から探し直します: {calendar_name}")
+        state.forget_calendar(calendar_name)
+
+    # ステップ3: カレンダー一覧を検索
+    calendar_id = find_calendar(service, calendar_name)
+
+    # ステップ4: カレンダーが存在しない場合は新規作成
+    if not calendar_id and create:
+        print(f"📅 新しいカレンダーを作成: {calendar_name}")
+        calendar = {
+            'summary': calendar_name,  # カレンダー名
+            'timeZone': 'Asia/Tokyo',  # タイムゾーン
+            'description': 'フルスタックエンジニア学習プログラムのスケジュール'
+        }
+        # service.calendars().insert() = カレンダー作成API
+        created_calendar = execute_with_retry(lambda: service.calendars().insert(body=calendar))
+        calendar_id = created_calendar['id']
 
-    # ステップ5: APIクライアントを構築して返す
-    # build()で'calendar' APIのv3バージョンを使うクライアントを作成
-    return build('calendar', 'v3', credentials=creds)
+    # ステップ5: 次回のために保存
+    if calendar_id and state:
+        state.set_calendar_id(calendar_name, calendar_id)
+    return calendar_id
 
 
-def get_or_create_calendar(service):
+def get_or_create_calendar(service, state=None, verify=False, calendar_name=CALENDAR_NAME):
     """
     専用カレンダーを取得または作成
 
     【処理フロー】
-    1. 既存のカレンダー一覧を取得
-    2. CALENDAR_NAMEと一致するカレンダーを探す
-    3. 見つかればそのIDを返す
-    4. 見つからなければ新規作成してIDを返す
+    resolve_calendar()で、保存済みID → 一覧検索 → 新規作成 の順に解決する
 
     【引数】
     service: Google Calendar APIクライアント
+    state: 同期状態ストア（保存済みのカレンダーIDを使う場合）
+    verify: Trueなら保存済みIDの存在を必ず確認する
+    calendar_name: カレンダー名（デフォルト: CALENDAR_NAME）
 
     【戻り値】
     calendar_id: カレンダーのID（文字列）
     """
-    # ステップ1: 既存のカレンダーリストを取得
-    # service.calendarList().list() = カレンダー一覧取得API
-    # .execute() = APIリクエストを実行
-    calendar_list = service.calendarList().list().execute()
-
-    # ステップ2: カレンダー名で検索
-    # calendar_list.get('items', []) = カレンダーの配列を取得（なければ空配列）
-    for calendar in calendar_list.get('items', []):
-        # summary = カレンダーの表示名
-        if calendar['summary'] == CALENDAR_NAME:
-            print(f"✓ カレンダーを見つけました: {CALENDAR_NAME}")
-            return calendar['id']  # カレンダーIDを返す
-
-    # ステップ3: カレンダーが存在しない場合は新規作成
-    print(f"📅 新しいカレンダーを作成: {CALENDAR_NAME}")
-    calendar = {
-        'summary': CALENDAR_NAME,  # カレンダー名
-        'timeZone': 'Asia/Tokyo',  # タイムゾーン
-        'description': 'フルスタックエンジニア学習プログラムのスケジュール'
-    }
-    # service.calendars().insert() = カレンダー作成API
-    created_calendar = service.calendars().insert(body=calendar).execute()
-    return created_calendar['id']
+    return resolve_calendar(service, state, create=True, verify=verify, calendar_name=calendar_name)
 
 
 def calculate_week_date(year, month, week):
@@ -230,14 +542,103 @@ def calculate_week_date(year, month, week):
     return target_date
 
 
+def find_schedule_week(date):
+    """
+    日付から、その日を含む週の年・月・週番号を求める（calculate_week_date()の逆変換）
+
+    【ロジック】
+    1. その日を含む週（日曜〜土曜）の土曜日を求める
+    2. 土曜日の年・月をそのまま使う
+    3. 週番号 = (土曜日の日 - 1) // 7 + 1
+       （その月の最初の土曜日は1〜7日のどこかにあるため）
+
+    【例】
+    2025/12/1（月）→ 土曜日は12/6 → (2025, 12, 1)
+    2025/12/14（日）→ 土曜日は12/20 → (2025, 12, 3)
+
+    【引数】
+    date: datetime オブジェクト
+
+    【戻り値】
+    (year, month, week): calculate_week_date()に渡すと同じ土曜日になる値
+    """
+    saturday = date + timedelta(days=(5 - date.weekday()) % 7)
+    return saturday.year, saturday.month, (saturday.day - 1) // 7 + 1
+
+
+@functools.lru_cache(maxsize=None)
+def first_saturday_ordinal(year, month):
+    """
+    その月の最初の土曜日の通し日数（月の表。同じ年・月は2回目から計算しない）
+
+    calculate_week_date(year, month, 1).toordinal() と同じ値
+
+    【引数】
+    year: 年（例: 2025）
+    month: 月（例: 12）
+
+    【戻り値】
+    ordinal: 最初の土曜日の通し日数（datetime.toordinal()）
+
+    【例外】
+    ValueError: 月が1〜12の範囲外（calculate_week_date()と同じ）
+    """
+    first_day = datetime(year, month, 1)
+    return first_day.toordinal() + (5 - first_day.weekday()) % 7
+
+
+def calculate_week_columns(years, months, weeks, ids=None):
+    """
+    年・月・週の列から、全行の週の範囲とキーをまとめて計算
+
+    【calculate_week_range()との違い】
+    行ごとに datetime・timedelta を作らず、月の表（first_saturday_ordinal()）の
+    通し日数に週数 × 7 を足すだけで求める。同じ月は1回しか計算しないので、
+    何年分・何人分のスケジュールでも、月の数だけの日付計算で済む。
+    週5が翌月にはみ出す場合も、通し日数の足し算なので calculate_week_range() と同じ日付になる
+
+    【計算式】
+    土曜日 = 最初の土曜日 + (week - 1) × 7
+    開始日（日曜日）= 土曜日 - 6 = 最初の土曜日 + week × 7 - 13
+    終了日（次の日曜日）= 土曜日 + 1 = 最初の土曜日 + week × 7 - 6
+
+    【引数】
+    years / months / weeks: 年・月・週の列（同じ長さの整数のシーケンス）
+    ids: 行IDの列（Noneなら行IDなし）
+
+    【戻り値】
+    (start_ordinals, end_ordinals, keys):
+        calculate_week_range() の開始日・終了日の通し日数と、各行のキーのリスト
+        （IDのない行のキーは assign_row_id() で決める。ensure_row_ids() が書き戻すIDと同じ）
+
+    【例外】
+    ValueError: 月が1〜12の範囲外（calculate_week_date()と同じ）
+    """
+    # ステップ1: 各行の週の開始日（日曜日）。月の表は行の順番に関係なく使い回す
+    first_saturdays = list(map(first_saturday_ordinal, years, months))
+    start_ordinals = [saturday + week * 7 - 13 for saturday, week in zip(first_saturdays, weeks)]
+    end_ordinals = [start + 7 for start in start_ordinals]
+
+    # ステップ2: キー（行IDがあればそれ、なければ "年-月-週"。他の行のIDと重なれば '-2' ...）
+    if ids is None:
+        ids = itertools.repeat('')
+        used = set()
+    else:
+        used = {row_id for row_id in ids if row_id}
+    keys = [row_id or assign_row_id(f"{year}-{month:02d}-{week}", used)
+            for year, month, week, row_id in zip(years, months, weeks, ids)]
+    return start_ordinals, end_ordinals, keys
+
+
 def load_schedule(csv_path):
     """
     dev-schedule.csvを読み込む
 
     【処理フロー】
-    1. CSVファイルを開く
-    2. 各行をdictionary形式で読み込み
-    3. 必要な列を抽出してリストに格納
+    1. コンパイル済みスケジュールを開く（CSVが変わっていれば作り直す）
+    2. 全行を学習データに変換してリストに格納
+       （型変換・週の日付計算は済んでいるので、文字列を分けるだけ）
+    3. コンパイル済みスケジュールを保存できない場合は、CSVを直接読み込む
 
     【引数】
     csv_path: CSVファイルのパス
@@ -253,11 +654,62 @@ def load_schedule(csv_path):
             'project': '個人ポートフォリオ作成',
             'process': '要件定義 → 設計 → 実装 → テスト',
             'claude_usage': 'Claudeで設計レビュー',
-            'url': 'https://example.com'
+            'url': 'https://example.com',
+            'id': '2025-12-1',  # 行ID（ID列が空なら、ensure_row_ids()が書き戻すときと同じID）
+            'start_date': datetime(2025, 11, 30),  # 週の開始日（calculate_week_range()）
+            'end_date': datetime(2025, 12, 7),  # 週の終了日（終了日を含まない）
         },
         ...
     ]
     """
+    compiled = compile_schedule(csv_path)
+    if compiled is None:
+        return read_schedule_csv(csv_path)
+    with compiled:
+        columns = compiled_columns(compiled)
+        return [item_from_compiled(record, values, key, columns)
+                for record, values, key in compiled.rows()]
+
+
+def load_schedule_by_keys(csv_path, keys):
+    """
+    指定したキーの学習データだけを読み込む（リスケジュールで移動した行の同期用）
+
+    コンパイル済みスケジュールのキーの索引を二分探索するので、全行を変換しない
+
+    【引数】
+    csv_path: CSVファイルのパス
+    keys: イベントのキーのイテレーター
+
+    【戻り値】
+    schedule: 学習データのリスト（CSVの行の順番。見つからないキーは含まない）
+    """
+    compiled = compile_schedule(csv_path)
+    if compiled is None:
+        keys = set(keys)
+        return [item for item in read_schedule_csv(csv_path) if make_event_key(item) in keys]
+    with compiled:
+        columns = compiled_columns(compiled)
+        rows = sorted(row for row in map(compiled.find, set(keys)) if row is not None)
+        return [item_from_compiled(compiled.record(row), *compiled.values_and_key(row), columns)
+                for row in rows]
+
+
+def read_schedule_csv(csv_path):
+    """
+    dev-schedule.csvを直接読み込む（コンパイル済みスケジュールを使わない）
+
+    【処理フロー】
+    1. CSVファイルを開く
+    2. 各行をdictionary形式で読み込み
+    3. 必要な列を抽出してリストに格納
+
+    【引数】
+    csv_path: CSVファイルのパス
+
+    【戻り値】
+    schedule: 学習データのリスト（load_schedule()と同じ形式。'start_date'・'end_date' はない）
+    """
     schedule = []
 
     # CSVファイルを開く（UTF-8エンコーディング）
@@ -268,20 +720,341 @@ def load_schedule(csv_path):
 
         for row in reader:
             # 各行から必要な情報を抽出
-            schedule.append({
-                'year': int(row['年度']),       # 文字列を整数に変換
-                'month': int(row['月']),
-                'week': int(row['週']),
-                'content': row['学習内容'],
-                'project': row['実践課題'],
-                'process': row['開発工程'],
-                'claude_usage': row['Claude活用法'],
-                'url': row['メモ・参考URL']
-            })
+            schedule.append(schedule_item_from_row(row))
+
+    # IDのない行にも、ensure_row_ids()が書き戻すときと同じIDを付ける
+    used = {item['id'] for item in schedule if item['id']}
+    for item in schedule:
+        if not item['id']:
+            item['id'] = assign_row_id(make_event_key(item), used)
 
     return schedule
 
 
+def compiled_schedule_path(csv_path):
+    """
+    CSVに対応するコンパイル済みスケジュールのパス
+
+    CSVの絶対パスのハッシュをファイル名にするので、
+    --manifest の受講者ごとのCSVもそれぞれ別のファイルになる
+
+    【戻り値】
+    path: settings/credentials/cache/schedules/<ハッシュ>.bin
+    """
+    name = hashlib.sha256(str(Path(csv_path).resolve()).encode('utf-8')).hexdigest()[:16]
+    return COMPILED_SCHEDULE_DIR / f'{name}.bin'
+
+
+def compile_schedule(csv_path):
+    """
+    コンパイル済みスケジュールを開く（なければ・古ければ作る）
+
+    【処理フロー】
+    1. open_compiled()で、CSVと一致するファイルがあればそれを開く
+    2. なければCSVを一度だけ読み、各行の型変換を行い、
+       週の日付とキーは calculate_week_columns() で全行まとめて計算する
+       （読んだバイト列からハッシュを計算するので、読み込み中にCSVが変わっても
+         次回は必ず作り直される）
+    3. write_compiled()で保存して開く
+
+    【引数】
+    csv_path: CSVファイルのパス
+
+    【戻り値】
+    compiled: CompiledSchedule（保存できない場合はNone）
+
+    【例外】
+    FileNotFoundError: CSVがない
+    ValueError / KeyError: CSVの内容が不正（read_schedule_csv()と同じ）
+    """
+    path = compiled_schedule_path(csv_path)
+
+    # ステップ1: 作成済みのファイル
+    with METRICS.phase('schedule_snapshot'):
+        compiled = open_compiled(path, csv_path)
+    if compiled is not None:
+        return compiled
+
+    # ステップ2: CSVを読み込んでコンパイル
+    with METRICS.phase('schedule_compile'):
+        csv_stat = os.stat(csv_path)
+        with open(csv_path, 'rb') as f:
+            data = f.read()
+        reader = csv.DictReader(io.StringIO(data.decode('utf-8'), newline=''))
+        fieldnames = reader.fieldnames or []
+        items = []
+        values = []
+        for row in reader:
+            items.append(schedule_item_from_row(row))
+            values.append([row.get(name) or '' for name in fieldnames])
+
+        # 週の日付とキーは全行まとめて計算（calculate_week_columns()）
+        years = [item['year'] for item in items]
+        months = [item['month'] for item in items]
+        weeks = [item['week'] for item in items]
+        start_ordinals, end_ordinals, keys = calculate_week_columns(
+            years, months, weeks, [item['id'] for item in items])
+        rows = list(zip(years, months, weeks, start_ordinals, end_ordinals, values, keys))
+
+        # ステップ3: 保存して開く
+        try:
+            write_compiled(path, fieldnames, rows, csv_stat, hashlib.sha256(data).digest())
+        except (OSError, ValueError, struct.error):
+            # 保存先に書けない・値がこの形式に収まらない → CSVを直接読む
+            return None
+    return open_compiled(path, csv_path)
+
+
+def compiled_columns(compiled):
+    """
+    学習データの各項目が、コンパイル済みスケジュールの何列目かを求める
+
+    【戻り値】
+    columns: [学習内容, 実践課題, 開発工程, Claude活用法, メモ・参考URL] の列番号
+             （行IDは列ではなく、行ごとに保存したキーを使う）
+    """
+    column = {name: index for index, name in enumerate(compiled.fieldnames)}
+    names = ('学習内容', '実践課題', '開発工程', 'Claude活用法', 'メモ・参考URL')
+    return [column[name] for name in names]
+
+
+def item_from_compiled(record, values, key, columns):
+    """
+    コンパイル済みスケジュールの1行を学習データに変換
+
+    【引数】
+    record: CompiledSchedule.record()の戻り値
+    values: その行の値のリスト
+    key: その行のキー（ID列が空の行にも calculate_week_columns() が割り当て済み）
+    columns: compiled_columns()の戻り値
+
+    【戻り値】
+    item: 学習データ（load_schedule()の戻り値の1要素）
+    """
+    year, month, week, start_ordinal, end_ordinal, _ = record
+    content, project, process, claude_usage, url = columns
+    return {
+        'year': year,
+        'month': month,
+        'week': week,
+        'content': values[content],
+        'project': values[project],
+        'process': values[process],
+        'claude_usage': values[claude_usage],
+        'url': values[url],
+        'id': key,
+        'start_date': datetime.fromordinal(start_ordinal),
+        'end_date': datetime.fromordinal(end_ordinal),
+    }
+
+
+def schedule_item_from_row(row):
+    """
+    CSVの1行（列名 → 文字列の辞書）を学習データに変換
+
+    【引数】
+    row: csv.DictReaderが返す1行分の辞書
+
+    【戻り値】
+    item: 学習データ（load_schedule()の戻り値の1要素と同じ形式）
+    """
+    return {
+        'year': int(row['年度']),       # 文字列を整数に変換
+        'month': int(row['月']),
+        'week': int(row['週']),
+        'content': row['学習内容'],
+        'project': row['実践課題'],
+        'process': row['開発工程'],
+        'claude_usage': row['Claude活用法'],
+        'url': row['メモ・参考URL'],
+        'id': row.get(ROW_ID_COLUMN) or ''
+    }
+
+
+def ensure_row_ids(fieldnames, rows):
+    """
+    ID列が空の行に行IDを割り当てる（CSVに書き戻す前に呼ぶ）
+
+    【なぜ行IDが必要か】
+    以前はイベントのキーを日付（年-月-週）から作っていたため、
+    リスケジュールで行が別の週に移るとキーが変わり、
+    カレンダーに同じ学習項目のイベントが重複して残っていた。
+    行IDは一度決めたら変わらないので、移動しても同じイベントを更新できる
+
+    【ロジック】
+    - IDがない行には、今の日付から作ったキー（例: '2025-12-1'）を割り当てる
+      → 既存のイベント・同期状態のキーと同じなので、移行作業は不要
+    - 他の行のIDと重なる場合は '-2', '-3' ... を付ける
+
+    【引数】
+    fieldnames: CSVのヘッダー行（列名のリスト）
+    rows: 全行（列名 → 文字列の辞書のリスト、その場で書き換える）
+
+    【戻り値】
+    fieldnames: ID列を含むヘッダー行（なければ末尾に追加）
+    """
+    if ROW_ID_COLUMN not in fieldnames:
+        fieldnames = list(fieldnames) + [ROW_ID_COLUMN]
+
+    used = {row[ROW_ID_COLUMN] for row in rows if row.get(ROW_ID_COLUMN)}
+    for row in rows:
+        if not row.get(ROW_ID_COLUMN):
+            row[ROW_ID_COLUMN] = assign_row_id(make_event_key(schedule_item_from_row(row)), used)
+    return fieldnames
+
+
+def assign_row_id(base, used):
+    """
+    IDのない行のIDを決める（ensure_row_ids() と同期時のキーで同じ規則を使う）
+
+    【なぜ同期時にも同じ規則で決めるのか】
+    リスケジュールで '2026-01-1' の行が別の週に移ったあと、空いた週にID列が空の行を
+    追加すると、日付から作ったキーが移動した行のIDと同じになる。
+    同期でもこの関数でキーを決めれば、2つの行が同じイベントとして扱われない
+
+    【引数】
+    base: 日付から作ったキー（例: '2025-12-1'）
+    used: 使用済みのID（CSVのID列の値と、割り当て済みのID。その場で追加する）
+
+    【戻り値】
+    row_id: base（使われていれば '-2', '-3' ... を付けたもの）
+    """
+    row_id = base
+    suffix = 2
+    while row_id in used:
+        row_id = f"{base}-{suffix}"
+        suffix += 1
+    used.add(row_id)
+    return row_id
+
+
+def check_unique_keys(keys):
+    """
+    同じキーの行がないことを確認する（同期計画を作る前に呼ぶ）
+
+    同じキーの行は1つのイベントとして扱われ、片方がカレンダーに届かず、
+    同期のたびに互いを上書きしてしまうため、黙ってまとめずに止める
+
+    【引数】
+    keys: 各行のキーのイテレーター
+
+    【戻り値】
+    seen: キーの集合
+
+    【例外】
+    ValueError: キーが重複している（ID列に同じ値が複数ある）
+    """
+    seen = set()
+    duplicates = set()
+    for unique_key in keys:
+        if unique_key in seen:
+            duplicates.add(unique_key)
+        seen.add(unique_key)
+    if duplicates:
+        raise ValueError(f"同じIDの行が複数あります: {', '.join(sorted(duplicates))}"
+                         f"（dev-schedule.csv のID列を直してください）")
+    return seen
+
+
+class ScheduleItem:
+    """
+    学習データ1行分のコンパクトなレコード（ストリーミング同期用）
+
+    __slots__ で属性を固定するので、行ごとの辞書より使用メモリが小さい。
+    item['year'] のように辞書と同じ書き方で読めるため、
+    create_event_body() などの関数をそのまま使える
+    """
+
+    __slots__ = ('year', 'month', 'week', 'content', 'project', 'process', 'claude_usage', 'url', 'id')
+
+    def __init__(self, year, month, week, content, project, process, claude_usage, url, id=''):
+        self.year = year
+        self.month = month
+        self.week = week
+        self.content = content
+        self.project = project
+        self.process = process
+        self.claude_usage = claude_usage
+        self.url = url
+        self.id = id
+
+    def __getitem__(self, name):
+        return getattr(self, name)
+
+    def get(self, name, default=None):
+        return getattr(self, name, default)
+
+
+def iter_schedule(csv_path):
+    """
+    dev-schedule.csvを1行ずつ読み込むジェネレーター（ストリーミング同期用）
+
+    【load_schedule()との違い】
+    ファイル全体をリストにせず、読んだ行からScheduleItemとして返す。
+    ファイルがどれだけ大きくても、使用メモリは処理中の行の分だけで済む
+    （IDのない行のIDを決めるため、先にID列の値だけを1回読む。保持するのはIDの集合だけ）
+
+    【引数】
+    csv_path: CSVファイルのパス
+
+    【戻り値（yield）】
+    item: ScheduleItem（load_schedule()の要素と同じ項目を持つ）
+
+    【例外】
+    ValueError: ID列に同じ値が複数ある（check_unique_keys()と同じ。チャンクをまたぐ重複も見つける）
+    """
+    # ステップ1: ID列の値を集める（重複していれば check_unique_keys() で止める）
+    with open(csv_path, 'r', encoding='utf-8', newline='') as f:
+        reader = csv.reader(f)
+        header = next(reader, None) or []
+        id_column = header.index(ROW_ID_COLUMN) if ROW_ID_COLUMN in header else None
+        used = check_unique_keys(
+            row[id_column] for row in reader
+            if id_column is not None and id_column < len(row) and row[id_column])
+
+    # ステップ2: 1行ずつ返す（IDのない行には assign_row_id() でIDを付ける）
+    with open(csv_path, 'r', encoding='utf-8', newline='') as f:
+        # DictReaderより軽いcsv.readerで読み、列の位置はヘッダーから求める
+        reader = csv.reader(f)
+        header = next(reader, None)
+        if header is None:
+            return
+        column = {name: index for index, name in enumerate(header)}
+        columns = [column[name] for name in
+                   ('年度', '月', '週', '学習内容', '実践課題', '開発工程', 'Claude活用法', 'メモ・参考URL')]
+        id_column = column.get(ROW_ID_COLUMN)  # ID列がない古いCSVにも対応
+
+        for row in reader:
+            if not row:
+                continue  # 空行は読み飛ばす
+            year, month, week, content, project, process, claude_usage, url = (
+                row[index] for index in columns)
+            row_id = row[id_column] if id_column is not None and id_column < len(row) else ''
+            if not row_id:
+                row_id = assign_row_id(f"{int(year)}-{int(month):02d}-{int(week)}", used)
+            yield ScheduleItem(int(year), int(month), int(week),
+                               content, project, process, claude_usage, url, row_id)
+
+
+def iter_chunks(items, size):
+    """
+    イテレーターをsize件ずつのリストに分けて返すジェネレーター
+
+    【引数】
+    items: 任意のイテレーター（iter_schedule()など）
+    size: 1チャンクの件数
+
+    【戻り値（yield）】
+    chunk: 最大size件のリスト
+    """
+    iterator = iter(items)
+    while True:
+        chunk = list(itertools.islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
 def create_event_body(item, start_date, end_date):
     """
     カレンダーイベントのボディ（データ）を作成
@@ -316,7 +1089,7 @@ def create_event_body(item, start_date, end_date):
     # ステップ2: ユニークキーを生成
     # 形式: "2025-12-1" （年-月-週）
     # このキーで既存イベントを検索・更新する
-    unique_key = f"{item['year']}-{item['month']:02d}-{item['week']}"
+    unique_key = make_event_key(item)
 
     # ステップ3: Google Calendar API形式でイベントデータを構築
     return {
@@ -360,94 +1133,2042 @@ def create_event_body(item, start_date, end_date):
     }
 
 
-def sync_events_to_calendar(service, calendar_id, schedule):
+def parse_event_body(event):
     """
-    スケジュールをカレンダーに同期
+    イベントのタイトル・説明文から学習データの項目を取り出す（create_event_body()の逆変換）
 
     【処理フロー】
-    1. スケジュールの各項目をループ
-    2. 週の開始日・終了日を計算
-    3. イベントデータを作成
-    4. 既存イベントを検索（extendedPropertiesのキーで）
-    5. 既存イベントがあれば更新、なければ新規作成
-
-    【変数の依存関係】
-    schedule → item → saturday → sunday, next_sunday → event_body
-    service, calendar_id, event_body → API呼び出し → 作成/更新
+    1. タイトル "Week 1: HTML/CSS基礎" から学習内容を取り出す
+    2. 説明文の各行を先頭の絵文字で判別して取り出す
+       📚 学習内容 / 🎯 実践課題 / 📋 開発工程 / 🤖 Claude活用法 / 📖 参考URL
 
     【引数】
-    service: Google Calendar APIクライアント
-    calendar_id: カレンダーID
-    schedule: 学習データのリスト
+    event: APIから取得したイベントデータ
+
+    【戻り値】
+    fields: 取り出せた項目だけを含む辞書（例: {'content': ..., 'project': ...}）
     """
-    print(f"\n📊 同期開始: {len(schedule)} 件のイベント")
+    fields = {}
+
+    summary = event.get('summary', '')
+    if summary.startswith('Week ') and ': ' in summary:
+        fields['content'] = summary.split(': ', 1)[1]
+
+    prefixes = [
+        ('📚 学習内容: ', 'content'),
+        ('🎯 実践課題: ', 'project'),
+        ('📋 開発工程: ', 'process'),
+        ('📖 参考URL: ', 'url'),
+        ('🤖 ', 'claude_usage'),
+    ]
+    for line in event.get('description', '').splitlines():
+        for prefix, field in prefixes:
+            if line.startswith(prefix):
+                # タイトルの学習内容を優先する（カレンダー上で編集されやすいため）
+                fields.setdefault(field, line[len(prefix):])
+                break
 
-    # カウンター変数（統計情報用）
-    created_count = 0   # 新規作成したイベント数
-    updated_count = 0   # 更新したイベント数
-    skipped_count = 0   # エラーでスキップしたイベント数
+    return fields
 
-    # スケジュールの各項目を処理
-    for item in schedule:
-        try:
-            # ステップ1: その週の土曜日を計算
-            saturday = calculate_week_date(item['year'], item['month'], item['week'])
-
-            # ステップ2: 週の範囲を計算（日曜〜土曜）
-            # 土曜日から6日前が日曜日
-            # 例: 土曜が12/7なら、日曜は12/1
-            sunday = saturday - timedelta(days=6)
-
-            # Google Calendarの終日イベントは終了日を含まないため、
-            # 終了日は次の日曜日（土曜日 + 1日）
-            # 例: 土曜が12/7なら、終了日は12/8
-            next_sunday = saturday + timedelta(days=1)
-
-            # ステップ3: イベントデータを作成
-            event_body = create_event_body(item, sunday, next_sunday)
-            unique_key = f"{item['year']}-{item['month']:02d}-{item['week']}"
-
-            # ステップ4: 既存イベントを検索
-            # privateExtendedProperty で extendedProperties の値で検索
-            # 'fslearning_key=2025-12-1' のようなイベントを探す
-            events_result = service.events().list(
-                calendarId=calendar_id,
-                privateExtendedProperty=f"fslearning_key={unique_key}",
-                maxResults=1  # 最大1件（同じキーは1つしかないはず）
-            ).execute()
-
-            existing_events = events_result.get('items', [])
-
-            # ステップ5: 既存イベントがあれば更新、なければ新規作成
-            if existing_events:
-                # イベントが既に存在する場合は更新
-                existing_event = existing_events[0]
-                service.events().update(
-                    calendarId=calendar_id,
-                    eventId=existing_event['id'],  # 既存イベントのID
-                    body=event_body  # 新しいデータで上書き
-                ).execute()
-                updated_count += 1
-                print(f"  ✓ 更新: {item['year']}/{item['month']:02d} Week{item['week']} - {item['content']}")
-            else:
-                # イベントが存在しない場合は新規作成
-                service.events().insert(
-                    calendarId=calendar_id,
-                    body=event_body
-                ).execute()
-                created_count += 1
-                print(f"  + 作成: {item['year']}/{item['month']:02d} Week{item['week']} - {item['content']}")
 
-        except Exception as e:
-            # エラーが発生した場合はスキップして次へ
-            print(f"  ✗ エラー: {item['year']}/{item['month']:02d} Week{item['week']} - {e}")
-            skipped_count += 1
+def make_event_key(item):
+    """
+    学習項目からイベントのユニークキーを生成
+
+    【形式】
+    - 行ID（CSVのID列）があればそれを使う（リスケジュールしても変わらない）
+    - なければ "2025-12-1" （年-月-週）
+    このキーを extendedProperties.private.fslearning_key に保存し、
+    既存イベントとの突き合わせに使う
+
+    【引数】
+    item: 学習データ（dictionary）
+
+    【戻り値】
+    unique_key: ユニークキー（文字列）
+    """
+    row_id = item.get('id')
+    if row_id:
+        return row_id
+    return f"{item['year']}-{item['month']:02d}-{item['week']}"
+
+
+def calculate_week_range(item):
+    """
+    学習項目の週の範囲（日曜〜次の日曜）を計算
+
+    【ロジック】
+    - その週の土曜日を calculate_week_date() で求める
+    - 土曜日から6日前が日曜日（例: 土曜が12/7なら、日曜は12/1）
+    - Google Calendarの終日イベントは終了日を含まないため、
+      終了日は次の日曜日（土曜日 + 1日）
+
+    【引数】
+    item: 学習データ（dictionary）
+
+    【戻り値】
+    (sunday, next_sunday): 開始日と終了日（datetime のタプル）
+    """
+    # コンパイル済みスケジュールから読んだ学習データは、計算済みの日付を使う
+    if item.get('start_date') is not None:
+        return item['start_date'], item['end_date']
+    saturday = calculate_week_date(item['year'], item['month'], item['week'])
+    sunday = saturday - timedelta(days=6)
+    next_sunday = saturday + timedelta(days=1)
+    return sunday, next_sunday
+
+
+def event_signature(event):
+    """
+    イベントの比較用シグネチャを作成
+
+    【目的】
+    create_event_body() が作るイベントと、APIから取得したイベントを比較する。
+    APIのレスポンスにはid・etag・updatedなど同期に関係ないフィールドが含まれるため、
+    このスクリプトが書き込むフィールドだけを取り出して比較する
+
+    【引数】
+    event: イベントデータ（create_event_body()の戻り値 or APIレスポンス）
+
+    【戻り値】
+    signature: 比較用のタプル（同じ内容なら同じ値になる）
+    """
+    reminders = event.get('reminders', {})
+    overrides = tuple(
+        (reminder.get('method'), reminder.get('minutes'))
+        for reminder in reminders.get('overrides', [])
+    )
+    private = event.get('extendedProperties', {}).get('private', {})
+
+    return (
+        event.get('summary', ''),
+        event.get('description', ''),
+        event.get('start', {}).get('date'),
+        event.get('end', {}).get('date'),
+        event.get('colorId'),
+        reminders.get('useDefault', True),
+        overrides,
+        private.get('fslearning_key'),
+    )
+
+
+def event_field_values(event):
+    """
+    event_signature() の値を、イベントのフィールドごとに分ける
+
+    【目的】
+    軽量モード（--lean）で、変わったフィールドだけを patch で送るため。
+    比較に使う値は event_signature() と同じなので、
+    「シグネチャが違う ⇔ どれかのフィールドが違う」が必ず成り立つ
+
+    【引数】
+    event: イベントデータ（create_event_body()の戻り値 or APIレスポンス）
+
+    【戻り値】
+    values: {フィールド名: 比較用の値}（フィールド名は create_event_body() のキー）
+    """
+    signature = event_signature(event)
+    return {
+        'summary': signature[0],
+        'description': signature[1],
+        'start': signature[2],
+        'end': signature[3],
+        'colorId': signature[4],
+        'reminders': signature[5:7],
+        'extendedProperties': signature[7],
+    }
+
+
+def changed_event_fields(entry, values, hashes):
+    """
+    更新する項目のうち、実際に内容が変わったフィールドを求める
+
+    【ロジック】
+    - リモートのイベントと比べた項目（entry['remote']）: フィールドごとの値を比べる
+    - 同期状態ストアで判断した項目（entry['stored_fields']）: フィールドごとのハッシュを比べる
+    - どちらも分からない場合（古い状態ファイルの記録など）: 全フィールド
+
+    【引数】
+    entry: 同期計画の 'update' の1要素
+    values: 新しいイベントの event_field_values()
+    hashes: 新しいイベントの field_hashes()
+
+    【戻り値】
+    fields: 変わったフィールド名のリスト
+    """
+    if entry.get('remote') is not None:
+        remote_values = event_field_values(entry['remote'])
+        changed = [field for field, value in values.items() if remote_values[field] != value]
+    elif entry.get('stored_fields'):
+        stored = json.loads(entry['stored_fields'])
+        changed = [field for field, digest in json.loads(hashes).items()
+                   if stored.get(field) != digest]
+    else:
+        changed = []
+    return changed or list(values)
+
+
+def fetch_remote_events(service, calendar_id, fields=None):
+    """
+    専用カレンダーの全イベントを取得し、fslearning_keyで索引化
+
+    【処理フロー】
+    1. events().list() をページ単位で呼び出す（1ページ最大2500件）
+    2. nextPageToken がなくなるまで繰り返す
+    3. extendedProperties.private.fslearning_key を持つイベントだけを辞書に格納
+
+    【なぜ一括取得するのか】
+    以前は1行ごとに events().list() で検索していたため、
+    240行のスケジュールで約480回のAPI呼び出しが必要だった。
+    一括取得なら数ページ分の呼び出しで済む
+
+    【引数】
+    service: Google Calendar APIクライアント
+    calendar_id: カレンダーID
+    fields: レスポンスのフィールドマスク（軽量モードでは LIST_EVENT_FIELDS、Noneなら全フィールド）
+
+    【戻り値】
+    remote_events: {fslearning_key: イベントデータ} の辞書
+    """
+    with METRICS.phase('remote_list'):
+        return fetch_remote_event_pages(service, calendar_id, fields)
+
+
+def fetch_remote_event_pages(service, calendar_id, fields=None):
+    """
+    fetch_remote_events()の本体（ページングしながら全イベントを取得）
+
+    【引数】
+    service: Google Calendar APIクライアント
+    calendar_id: カレンダーID
+    fields: レスポンスのフィールドマスク（Noneなら全フィールド）
+
+    【戻り値】
+    remote_events: {fslearning_key: イベントデータ} の辞書
+    """
+    remote_events = {}
+    for page in iter_remote_event_pages(service, calendar_id, fields):
+        remote_events.update(page)
+    return remote_events
+
+
+def iter_remote_event_pages(service, calendar_id, fields=None):
+    """
+    専用カレンダーのイベントを1ページずつ返すジェネレーター
+
+    ページを受け取った側が処理し終えてから次のページを取得するので、
+    カレンダー全体をメモリに載せずに済む（ストリーミング同期用）
+
+    【引数】
+    service: Google Calendar APIクライアント
+    calendar_id: カレンダーID
+    fields: レスポンスのフィールドマスク（Noneなら全フィールド）
+
+    【戻り値（yield）】
+    page: {fslearning_key: イベントデータ} の辞書（1ページ分、最大2500件）
+    """
+    page_token = None
+
+    while True:
+        # showDeleted=False = 削除済みイベントは含めない
+        events_result = execute_with_retry(lambda: service.events().list(
+            calendarId=calendar_id,
+            maxResults=2500,  # 1ページの最大件数（APIの上限）
+            pageToken=page_token,
+            showDeleted=False,
+            fields=fields  # Noneなら指定しない
+        ))
+
+        page = {}
+        for event in events_result.get('items', []):
+            private = event.get('extendedProperties', {}).get('private', {})
+            unique_key = private.get('fslearning_key')
+            # このスクリプトが作成したイベントだけを対象にする
+            if unique_key:
+                page[unique_key] = event
+        yield page
+
+        # 次のページがなければ終了
+        page_token = events_result.get('nextPageToken')
+        if not page_token:
+            return
+
+
+def plan_sync(schedule, remote_events):
+    """
+    ローカルのスケジュールとリモートのイベントを比較し、同期計画を作成
+
+    【処理フロー】
+    1. スケジュールの各項目からイベントデータを作成
+    2. 同じキーのリモートイベントを探す
+       - なければ「作成」
+       - あって内容が異なれば「更新」
+       - あって内容が同じなら「変更なし」
+
+    【引数】
+    schedule: 学習データのリスト
+    remote_events: fetch_remote_events()の戻り値
+
+    【例外】
+    ValueError: 同じキーの行がある（check_unique_keys()）
+
+    【戻り値】
+    plan: 同期計画（hash = イベント内容のハッシュ、同期状態ストアに記録する）
+    {
+        'create': [{'key': ..., 'item': ..., 'body': ..., 'hash': ...}, ...],
+        'update': [{'key': ..., 'item': ..., 'body': ..., 'hash': ..., 'event_id': ...,
+                    'remote': 比較したリモートのイベント}, ...],
+        'unchanged': [{'key': ..., 'item': ..., 'hash': ..., 'event_id': ..., 'etag': ...}, ...],
+    }
+    """
+    check_unique_keys(make_event_key(item) for item in schedule)
+    plan = {'create': [], 'update': [], 'unchanged': []}
+
+    for item in schedule:
+        sunday, next_sunday = calculate_week_range(item)
+        event_body = create_event_body(item, sunday, next_sunday)
+        unique_key = make_event_key(item)
+        signature = event_signature(event_body)
+        entry = {'key': unique_key, 'item': item, 'body': event_body,
+                 'hash': content_hash(signature)}
+
+        existing_event = remote_events.get(unique_key)
+        if existing_event is None:
+            plan['create'].append(entry)
+        elif event_signature(existing_event) != signature:
+            plan['update'].append(dict(entry, event_id=existing_event['id'], remote=existing_event))
+        else:
+            plan['unchanged'].append(dict(
+                entry, event_id=existing_event['id'], etag=existing_event.get('etag')))
+
+    return plan
+
+
+def plan_sync_from_state(schedule, stored):
+    """
+    同期状態ストアの記録だけを使って同期計画を作成（API呼び出しなし）
+
+    【処理フロー】
+    1. スケジュールの各項目からイベントデータとハッシュを作成
+    2. 同じキーの記録を探す
+       - 記録のハッシュと同じなら「変更なし」
+       - 記録はあるがハッシュが違えば「更新」（記録のイベントIDを使う）
+       - 記録がなければ「不明」（リモートを確認しないと作成か更新か分からない）
+
+    【引数】
+    schedule: 学習データのリスト
+    stored: SyncState.load()の戻り値
+
+    【例外】
+    ValueError: 同じキーの行がある（check_unique_keys()）
+
+    【戻り値】
+    (plan, unknown):
+        plan: plan_sync()と同じ形式の同期計画（'create'は常に空。
+              'update'には 'remote' の代わりに記録のフィールドごとのハッシュ 'stored_fields' が入る）
+        unknown: 記録がなかった学習項目のリスト
+    """
+    check_unique_keys(make_event_key(item) for item in schedule)
+    plan = {'create': [], 'update': [], 'unchanged': []}
+    unknown = []
+
+    for item in schedule:
+        unique_key = make_event_key(item)
+        record = stored.get(unique_key)
+        if record is None:
+            unknown.append(item)
+            continue
+
+        sunday, next_sunday = calculate_week_range(item)
+        event_body = create_event_body(item, sunday, next_sunday)
+        digest = content_hash(event_signature(event_body))
+        entry = {'key': unique_key, 'item': item, 'body': event_body,
+                 'hash': digest, 'event_id': record['event_id']}
+
+        if record['content_hash'] == digest:
+            plan['unchanged'].append(dict(entry, etag=record['etag']))
+        else:
+            plan['update'].append(dict(entry, stored_fields=record.get('field_hashes')))
+
+    return plan, unknown
+
+
+def build_sync_plan(schedule, stored, get_remote_events):
+    """
+    同期状態ストアとリモートのイベントを組み合わせて同期計画を作成
+
+    【処理フロー】
+    1. storedがあれば plan_sync_from_state() で記録のある項目を判断
+       - 記録のない項目がなければリモートを確認せずに終了
+    2. 記録のない項目（storedがNoneなら全項目）は
+       get_remote_events() で取得したリモートのイベントと比べる
+
+    【引数】
+    schedule: 学習データのリスト
+    stored: SyncState.load()の戻り値（Noneならリモートだけで判断）
+    get_remote_events: リモートのイベントを取得する関数（必要なときだけ1回呼ばれる）
+
+    【戻り値】
+    (plan, remote_events):
+        plan: plan_sync()と同じ形式の同期計画
+        remote_events: 取得したリモートのイベント（取得しなかった場合はNone）
+    """
+    if stored is None:
+        remote_events = get_remote_events()
+        return plan_sync(schedule, remote_events), remote_events
+
+    plan, unknown = plan_sync_from_state(schedule, stored)
+    if not unknown:
+        return plan, None
+
+    # 記録のない項目だけ、既存イベントを一括取得して確認
+    remote_events = get_remote_events()
+    remote_plan = plan_sync(unknown, remote_events)
+    for action in plan:
+        plan[action].extend(remote_plan[action])
+    return plan, remote_events
+
+
+def build_mutations(plan, lean=False):
+    """
+    同期計画から書き込み操作（ミューテーション）のリストを作成
+
+    【軽量モード（lean=True）】
+    - 更新は events().update（全フィールドを送信）ではなく events().patch にし、
+      内容が変わったフィールドだけを送る（日付だけ変わった場合は start/end だけ）
+    - レスポンスは fields= でイベントIDとetagだけに絞る
+
+    【引数】
+    plan: plan_sync()の戻り値
+    lean: Trueなら軽量モード
+
+    【戻り値】
+    mutations: 書き込み操作のリスト（field_hashes は同期状態ストアに記録する）
+    [
+        {'action': 'update', 'key': ..., 'item': ..., 'body': ..., 'event_id': ..., 'field_hashes': ...},
+        {'action': 'patch', ..., 'patch': 変わったフィールドだけのボディ, 'fields': 'id,etag'},
+        {'action': 'create', 'key': ..., 'item': ..., 'body': ..., 'field_hashes': ...},
+        ...
+    ]
+    """
+    response_fields = WRITE_RESPONSE_FIELDS if lean else None
+    mutations = []
+    for entry in plan['update']:
+        values = event_field_values(entry['body'])
+        hashes = field_hashes(values)
+        mutation = dict(entry, action='update', field_hashes=hashes, fields=response_fields)
+        if lean:
+            changed = changed_event_fields(entry, values, hashes)
+            mutation.update(action='patch', patch={field: entry['body'][field] for field in changed})
+        mutations.append(mutation)
+    for entry in plan['create']:
+        mutations.append(dict(entry, action='create', fields=response_fields,
+                              field_hashes=field_hashes(event_field_values(entry['body']))))
+    return mutations
+
+
+def make_mutation_request(events, calendar_id, mutation):
+    """
+    書き込み操作に対応するAPIリクエストを作成（まだ実行しない）
+
+    【引数】
+    events: service.events() の戻り値
+            （作るたびにAPI仕様の解析が走って遅いため、呼び出し側で1回だけ作って使い回す）
+    calendar_id: カレンダーID
+    mutation: build_mutations()が作る書き込み操作（または 'delete' 操作）
+
+    【戻り値】
+    request: 未実行のAPIリクエスト（.execute()で送信、またはバッチに追加）
+    """
+    if mutation['action'] == 'delete':
+        return events.delete(
+            calendarId=calendar_id,
+            eventId=mutation['event_id']
+        )
+    if mutation['action'] == 'patch':
+        return events.patch(
+            calendarId=calendar_id,
+            eventId=mutation['event_id'],  # 既存イベントのID
+            body=mutation['patch'],  # 変わったフィールドだけ
+            fields=mutation.get('fields')  # Noneなら全フィールドを返す
+        )
+    if mutation['action'] == 'update':
+        return events.update(
+            calendarId=calendar_id,
+            eventId=mutation['event_id'],  # 既存イベントのID
+            body=mutation['body'],  # 新しいデータで上書き
+            fields=mutation.get('fields')
+        )
+    return events.insert(
+        calendarId=calendar_id,
+        body=mutation['body'],
+        fields=mutation.get('fields')
+    )
+
+
+def execute_mutation_chunk(service, calendar_id, mutations, batch_size, on_throttle=None,
+                           reserved=False):
+    """
+    書き込み操作のまとまりを1つのAPIクライアントで実行
+
+    【処理フロー】
+    - batch_size が2以上: calendar_batch.execute_batched() でバッチ送信
+    - batch_size が1以下: 1件ずつ送信（再送可能なエラーはバックオフして再送）
+
+    【引数】
+    service: Google Calendar APIクライアント
+    calendar_id: カレンダーID
+    mutations: 書き込み操作のリスト
+    batch_size: 1バッチあたりのリクエスト数
+    on_throttle: レート制限されたときに呼ぶ関数（同時実行数の調整用）
+    reserved: Trueなら1回目の送信の予算は呼び出し側が QUOTA.reserve() で確保済み
+              （Falseなら送るたびに記録する。再送はどちらでも記録する）
+
+    【戻り値】
+    results: [(mutation, response, error), ...] のリスト（mutationsと同じ順番）
+    """
+    events = service.events()
+    if batch_size > 1:
+        requests = [
+            (str(index), lambda mutation=mutation: make_mutation_request(events, calendar_id, mutation))
+            for index, mutation in enumerate(mutations)
+        ]
+        batch_results = execute_batched(service, requests, batch_size, on_throttle, reserved)
+        return [
+            (mutation,) + batch_results[str(index)]
+            for index, mutation in enumerate(mutations)
+        ]
+
+    results = []
+    for mutation in mutations:
+        try:
+            response = execute_with_retry(
+                lambda: make_mutation_request(events, calendar_id, mutation),
+                on_throttle=on_throttle,
+                reserved=reserved
+            )
+            results.append((mutation, response, None))
+        except Exception as e:
+            results.append((mutation, None, e))
+    return results
+
+
+def execute_mutations(service, calendar_id, mutations, batch_size=DEFAULT_BATCH_SIZE,
+                      workers=1, service_factory=None, reserved=False):
+    """
+    書き込み操作を実行
+
+    【処理フロー】
+    - workers が1: 渡されたserviceで順番に実行
+    - workers が2以上: 書き込み操作をbatch_size件ずつのまとまりに分け、
+      calendar_workers.run_in_workers() で並行実行
+      （各ワーカーは service_factory() で専用のクライアントを作る）
+
+    【引数】
+    service: Google Calendar APIクライアント
+    calendar_id: カレンダーID
+    mutations: build_mutations()の戻り値
+    batch_size: 1バッチあたりのリクエスト数
+    workers: 並行実行するワーカー数
+    service_factory: ワーカー用の新しいAPIクライアントを作る関数
+    reserved: Trueなら1回目の送信の予算は呼び出し側が QUOTA.reserve() で確保済み
+
+    【戻り値】
+    results: [(mutation, response, error), ...] のリスト（mutationsと同じ順番）
+             成功時はerror=None、失敗時はresponse=None
+    """
+    if workers <= 1 or service_factory is None:
+        return execute_mutation_chunk(service, calendar_id, mutations, batch_size, reserved=reserved)
+
+    # 書き込み操作をワーカー1回分のまとまりに分割
+    size = max(1, batch_size)
+    chunks = [mutations[start:start + size] for start in range(0, len(mutations), size)]
+
+    def run_chunk(worker_service, chunk, limiter):
+        return execute_mutation_chunk(
+            worker_service, calendar_id, chunk, batch_size, limiter.on_throttle, reserved)
+
+    results = []
+    for chunk, (chunk_results, error) in zip(chunks, run_in_workers(chunks, run_chunk, service_factory, workers)):
+        if error is not None:
+            # クライアント作成の失敗など、まとまり全体のエラー
+            chunk_results = [(mutation, None, error) for mutation in chunk]
+        results.extend(chunk_results)
+    return results
+
+
+def sync_events_to_calendar(service, calendar_id, schedule, batch_size=DEFAULT_BATCH_SIZE,
+                            workers=1, service_factory=None, state=None, verify=False, lean=False):
+    """
+    スケジュールをカレンダーに同期
+
+    【処理フロー】
+    1. 同期計画を作成
+       - 同期状態ストアがあれば、記録のない項目だけリモートで確認
+       - ストアがない or verify=True なら、既存イベントを一括取得（ページング）
+    2. 前回終わらなかった書き込み（アウトボックス）のうち、
+       今回のスケジュールにない分を取り出して（take_outbox()）、計画の書き込みに加える
+    3. 差分のある項目だけAPIに書き込む（バッチ送信、workers指定時は並行実行）
+       前回の残りも含めて開始日が近い順に送り、クォータ予算を超える分は次回に回す
+    4. 成功した項目を同期状態ストアに記録
+
+    【変数の依存関係】
+    state, schedule → plan（記録のない項目は service, calendar_id → remote_events で補う）
+    plan → mutations
+    service, calendar_id, mutations → API呼び出し → 作成/更新 → state
+
+    【引数】
+    service: Google Calendar APIクライアント
+    calendar_id: カレンダーID
+    schedule: 学習データのリスト
+    batch_size: 1バッチあたりのリクエスト数（1なら1件ずつ送信）
+    workers: 並行実行するワーカー数（1なら順番に実行）
+    service_factory: ワーカー用の新しいAPIクライアントを作る関数
+    state: 同期状態ストア（SyncState、Noneなら使わない）
+    verify: Trueならストアを信用せず、リモートと照合してストアを作り直す
+    lean: Trueなら軽量モード（変わったフィールドだけpatchし、レスポンス・一覧をfields=で絞る）
+
+    【戻り値】
+    counts: {'created': 作成数, 'updated': 更新数, 'unchanged': 変更なし, 'skipped': エラー数,
+             'deferred': クォータ予算を超えて次回に回した件数}
+    """
+    print(f"\n📊 同期開始: {len(schedule)} 件のイベント")
+
+    # ステップ1: 同期計画を作成
+    # 同期状態ストアの記録で判断できる項目はAPIを呼ばない
+    stored = state.load(calendar_id) if state is not None and not verify else None
+
+    def get_remote_events():
+        remote_events = fetch_remote_events(service, calendar_id,
+                                            LIST_EVENT_FIELDS if lean else None)
+        print(f"✓ 既存イベントを取得: {len(remote_events)} 件")
+        return remote_events
+
+    # 'plan' フェーズには既存イベントの取得（'remote_list'）も含まれる
+    with METRICS.phase('plan'):
+        plan, remote_events = build_sync_plan(schedule, stored, get_remote_events)
+    if state is not None and stored is None:
+        reconcile_state(state, calendar_id, remote_events)
+    elif state is not None:
+        # リモートで一致した項目は記録しておく（次回はAPIを呼ばない）
+        state.record(calendar_id, [
+            (entry['key'], entry['event_id'], entry['etag'], entry['hash'])
+            for entry in plan['unchanged'] if entry['key'] not in stored
+        ])
+
+    unchanged_count = len(plan['unchanged'])
+    mutations = build_mutations(plan, lean)
+
+    # ステップ2: 前回の残り（今回のスケジュールにある行は、計画が作り直した分を送る）
+    arrived_count = 0
+    if state is not None:
+        with METRICS.phase('outbox'):
+            leftover = take_outbox(service, calendar_id, state,
+                                   {make_event_key(item) for item in schedule}, remote_events, lean)
+            if leftover['deletions']:
+                apply_deletions(service, calendar_id, leftover['deletions'], batch_size, state)
+        mutations.extend(leftover['writes'])
+        arrived_count = leftover['arrived']
+
+    # ステップ3〜4: 差分のある項目だけ書き込み、成功した項目を記録
+    with METRICS.phase('write'):
+        created_count, updated_count, skipped_count, deferred_count = apply_mutations(
+            service, calendar_id, mutations, batch_size, workers, service_factory, state)
+    created_count += arrived_count
+
+    print_sync_summary(created_count, updated_count, unchanged_count, skipped_count, deferred_count)
+    return {'created': created_count, 'updated': updated_count,
+            'unchanged': unchanged_count, 'skipped': skipped_count, 'deferred': deferred_count}
+
+
+def apply_mutations(service, calendar_id, mutations, batch_size=DEFAULT_BATCH_SIZE,
+                    workers=1, service_factory=None, state=None):
+    """
+    書き込み操作を実行し、結果を表示して同期状態ストアに記録
+
+    【処理フロー】
+    1. 書き込みを開始日が近い順に並べ（order_by_urgency()）、
+       送信する前に全件を同期状態ストアのアウトボックスに記録
+    2. batch_size × workers 件（ワーカー全員で1回に送る分。1分あたりの予算以下）ずつ、次を繰り返す
+       a. クォータ予算を確保する（1分あたりの上限に達していれば待つ。
+          1日の予算が足りなければ、確保できた分だけ送り、残りは次回に回す）
+       b. execute_mutations() で書き込む（再送した分は送るたびに予算に記録される）
+       c. 記録のイベントIDがリモートで削除されていた更新（404/410）は、新規作成し直す
+          （送る前にアウトボックスを「作成」に書き換えて送信済みの印を付け、古いイベントIDの記録を消す
+            → 応答の前に中断しても、次回は作成が届いたかを確認してから送るので、二重に作成しない）
+       d. 項目ごとの結果を表示・集計
+       e. 成功した項目を記録し、アウトボックスから消す（チェックポイント）
+    3. まとまり全体が接続エラーで失敗したら（オフライン）、残りは送らずに
+       アウトボックスに残す（次回の同期でまとめて送る）
+
+    途中で中断しても、チェックポイントまでに成功した分は記録済みなので、次回は送り直さない
+
+    【引数】
+    service: Google Calendar APIクライアント
+    calendar_id: カレンダーID
+    mutations: build_mutations()の戻り値
+    batch_size: 1バッチあたりのリクエスト数
+    workers: 並行実行するワーカー数
+    service_factory: ワーカー用の新しいAPIクライアントを作る関数
+    state: 同期状態ストア（Noneなら記録しない）
+
+    【戻り値】
+    (created_count, updated_count, skipped_count, deferred_count):
+        作成・更新・エラーでスキップ・予算を超えて次回に回した件数
+    （スキップ・次回に回した分は、アウトボックスに残っていれば次回の同期で送る）
+    """
+    created_count = 0
+    updated_count = 0
+    skipped_count = 0
+
+    # ステップ1: 急ぐ順に並べ、送信する前にアウトボックスに記録
+    mutations = order_by_urgency(mutations)
+    if state is not None:
+        state.enqueue(calendar_id, [outbox_record(mutation) for mutation in mutations])
+
+    checkpoint_size = QUOTA.chunk_size(max(1, batch_size) * max(1, workers))
+    deferred = []
+    for start in range(0, len(mutations), checkpoint_size):
+        chunk = mutations[start:start + checkpoint_size]
+
+        # ステップ2a: 予算を確保（足りない分は次回に回す）
+        granted = QUOTA.reserve(len(chunk))
+        if granted < len(chunk):
+            deferred = mutations[start + granted:]
+            chunk = chunk[:granted]
+            if not chunk:
+                break
+
+        # ステップ2b: 書き込む（作成が届いたかどうかは、応答を受け取るまで分からない）
+        if state is not None:
+            state.mark_sent(calendar_id, [mutation['key'] for mutation in chunk])
+        results = execute_mutations(
+            service, calendar_id, chunk, batch_size, workers, service_factory, reserved=True)
+
+        # ステップ2c: 記録のイベントIDがリモートで削除されていた場合は、新規作成し直す
+        stale = [index for index, (mutation, _, error) in enumerate(results)
+                 if error is not None and mutation['action'] in ('update', 'patch')
+                 and get_error_status(error) in (404, 410)]
+        if stale:
+            # 作成し直す分は確保していないので、送るときに予算に記録される
+            recreate = [dict(results[index][0], action='create', event_id=None, patch=None)
+                        for index in stale]
+            if state is not None:
+                keys = [mutation['key'] for mutation in recreate]
+                state.enqueue(calendar_id, [outbox_record(mutation) for mutation in recreate])
+                state.forget(calendar_id, keys)
+                state.mark_sent(calendar_id, keys)
+            retried = execute_mutations(
+                service, calendar_id, recreate, batch_size, workers, service_factory)
+            for index, result in zip(stale, retried):
+                results[index] = result
+
+        # ステップ2d: 項目ごとの結果を集計
+        succeeded = []
+        failed = []
+        for mutation, response, error in results:
+            label = mutation_label(mutation)
+            if error is not None:
+                # エラーが発生した項目はスキップとして数える
+                print(f"  ✗ エラー: {label} - {error}")
+                skipped_count += 1
+                failed.append((mutation['key'], error))
+                continue
+
+            succeeded.append((mutation['key'], response['id'], response.get('etag'), mutation['hash'],
+                              mutation.get('field_hashes')))
+            if mutation['action'] in ('update', 'patch'):
+                updated_count += 1
+                print(f"  ✓ 更新: {label} - {mutation['item']['content']}")
+            else:
+                created_count += 1
+                print(f"  + 作成: {label} - {mutation['item']['content']}")
+
+        # ステップ2e: チェックポイント（成功した項目を記録し、アウトボックスから消す）
+        offline = bool(failed) and all(is_connection_error(error) for _, error in failed)
+        if state is not None:
+            state.complete(calendar_id, succeeded)
+            state.fail(calendar_id, failed, count_attempt=not offline)
+
+        if deferred:
+            break
+
+        # ステップ3: 1件も届かなかった → 接続が戻るまで残りは送らない
+        remaining = len(mutations) - start - len(chunk)
+        if offline and not succeeded and remaining:
+            print(f"⚠️  Googleカレンダーに接続できません。残り {remaining} 件は送信待ちとして保存し、"
+                  f"次回の同期でまとめて送信します")
+            skipped_count += remaining
+            break
+
+    print_deferred(deferred)
+    return created_count, updated_count, skipped_count, len(deferred)
+
+
+def mutation_label(mutation):
+    """書き込み操作の表示用の週（'2025/12 Week1'、削除ならキー）"""
+    item = mutation.get('item')
+    if item is None:
+        return mutation['key']
+    return f"{item['year']}/{item['month']:02d} Week{item['week']}"
+
+
+def print_deferred(deferred):
+    """
+    クォータ予算を超えて次回に回した書き込みを表示
+
+    【引数】
+    deferred: 送らなかった書き込み（急ぐ順。先頭の DEFERRED_REPORT_LIMIT 件だけ表示）
+    """
+    if not deferred:
+        return
+    print(f"\n⏸️  1日のクォータ予算を使い切ったため、{len(deferred)} 件を次回の同期に回します"
+          f"（アウトボックスに保存済み）")
+    for mutation in deferred[:DEFERRED_REPORT_LIMIT]:
+        content = mutation['item']['content'] if mutation.get('item') else mutation.get('summary', '')
+        print(f"  ⏸ {mutation['action']}: {mutation_label(mutation)} - {content}")
+    if len(deferred) > DEFERRED_REPORT_LIMIT:
+        print(f"  …ほか {len(deferred) - DEFERRED_REPORT_LIMIT} 件")
+
+
+def outbox_record(mutation):
+    """
+    書き込み操作を、アウトボックスに保存できる形（JSONに変換できる辞書）にする
+
+    学習データ（item）は結果の表示に使う年・月・週・学習内容だけを残し、
+    同期計画の比較用の値（remote など）は保存しない
+
+    【引数】
+    mutation: build_mutations()が作る書き込み操作（または 'delete' 操作）
+
+    【戻り値】
+    record: SyncState.enqueue()に渡す辞書（SyncState.pending()で同じ形に戻る）
+    """
+    record = {name: mutation[name]
+              for name in ('key', 'action', 'event_id', 'body', 'patch', 'fields', 'hash',
+                           'field_hashes', 'summary')
+              if mutation.get(name) is not None}
+    item = mutation.get('item')
+    if item is not None:
+        record['item'] = {'year': item['year'], 'month': item['month'],
+                          'week': item['week'], 'content': item['content']}
+    return record
+
+
+def is_connection_error(error):
+    """
+    APIから応答がなかったエラー（オフライン・DNSの失敗・タイムアウトなど）かどうかを判定
+
+    HTTPのステータスコードがない = リクエストがサーバーに届いていない可能性が高い
+    """
+    return get_error_status(error) is None
+
+
+def take_outbox(service, calendar_id, state, schedule_keys=None, remote_events=None, lean=False):
+    """
+    前回の同期で終わらなかった書き込み（アウトボックス）を、今回送る分として取り出す
+
+    【処理フロー】
+    1. アウトボックスの書き込みを記録した順番に読み込む
+       - 失敗回数が OUTBOX_MAX_ATTEMPTS に達したものは諦めて取り除く
+         （CSVに残っていれば、同期計画が改めて作り直す）
+       - 今回同期するスケジュールにあるキーは取り除く
+         （同期計画がCSVと同期状態から作り直すので、古い書き込みは送らない）
+    2. 送信を始めたが応答がなかった作成は、届いていたかもしれない
+       → 既存イベントを1回だけ一覧取得して確認し、
+         あれば記録（内容が違えば更新に切り替え）、なければ作成し直す
+       （二重に作成しないため）
+
+    【引数】
+    service: Google Calendar APIクライアント
+    calendar_id: カレンダーID
+    state: 同期状態ストア（SyncState）
+    schedule_keys: 今回同期するスケジュールのキーのセット（Noneなら取り除かない）
+    remote_events: 同期計画で取得済みの既存イベント（Noneなら必要なときだけ取得する）
+    lean: Trueなら既存イベントの一覧を fields= で絞る
+
+    【戻り値】
+    leftover: {'writes': 作成・更新の書き込み, 'deletions': 削除の書き込み,
+               'arrived': 届いていたことが分かった作成の件数}
+    """
+    leftover = {'writes': [], 'deletions': [], 'arrived': 0}
+
+    # ステップ1: 送信待ちの書き込みを読み込む
+    pending = state.pending(calendar_id)
+    if not pending:
+        return leftover
+    expired = [mutation['key'] for mutation in pending if mutation['attempts'] >= OUTBOX_MAX_ATTEMPTS]
+    if expired:
+        print(f"⚠️  {OUTBOX_MAX_ATTEMPTS} 回失敗した書き込みを取り除きます: {len(expired)} 件")
+    superseded = [mutation['key'] for mutation in pending
+                  if schedule_keys is not None and mutation['key'] in schedule_keys]
+    if expired or superseded:
+        dropped = set(expired) | set(superseded)
+        state.discard(calendar_id, dropped)
+        pending = [mutation for mutation in pending if mutation['key'] not in dropped]
+    if not pending:
+        return leftover
+    print(f"\n📮 前回送信できなかった書き込み: {len(pending)} 件")
+
+    # ステップ2: 届いていたかもしれない作成を確認
+    in_flight = [mutation for mutation in pending
+                 if mutation['action'] == 'create' and mutation['sent']]
+    if in_flight:
+        if remote_events is None:
+            remote_events = fetch_remote_events(service, calendar_id,
+                                                LIST_EVENT_FIELDS if lean else None)
+        arrived = []
+        for mutation in in_flight:
+            event = remote_events.get(mutation['key'])
+            if event is None:
+                continue
+            if content_hash(event_signature(event)) == mutation['hash']:
+                arrived.append((mutation['key'], event['id'], event.get('etag'), mutation['hash'],
+                                mutation.get('field_hashes')))
+            else:
+                mutation.update(action='update', event_id=event['id'])
+                mutation.pop('patch', None)
+        if arrived:
+            print(f"✓ 前回の作成がカレンダーに届いていました: {len(arrived)} 件")
+            state.complete(calendar_id, arrived)
+        arrived_keys = {entry[0] for entry in arrived}
+        pending = [mutation for mutation in pending if mutation['key'] not in arrived_keys]
+        leftover['arrived'] = len(arrived)
+
+    leftover['deletions'] = [mutation for mutation in pending if mutation['action'] == 'delete']
+    leftover['writes'] = [mutation for mutation in pending if mutation['action'] != 'delete']
+    return leftover
+
+
+def flush_outbox(service, calendar_id, state, batch_size=DEFAULT_BATCH_SIZE,
+                 workers=1, service_factory=None, lean=False):
+    """
+    アウトボックスに残っている書き込みをすべて送る（ストリーミング同期用）
 
-    # 統計情報を表示
+    スケジュール全体のキーが前もって分からないので、take_outbox()で取り出した分を
+    同期計画より先に送る。送った行は、チャンクの計画では「変更なし」になる
+
+    【引数】
+    service: Google Calendar APIクライアント
+    calendar_id: カレンダーID
+    state: 同期状態ストア（SyncState）
+    batch_size: 1バッチあたりのリクエスト数
+    workers: 並行実行するワーカー数
+    service_factory: ワーカー用の新しいAPIクライアントを作る関数
+    lean: Trueなら既存イベントの一覧を fields= で絞る
+
+    【戻り値】
+    flushed: {'created': 作成数, 'updated': 更新数, 'skipped': エラー数,
+              'deferred': 次回に回した件数, 'keys': 書き込みが終わったキーのセット}
+    """
+    leftover = take_outbox(service, calendar_id, state, lean=lean)
+    writes = leftover['writes']
+    if leftover['deletions']:
+        apply_deletions(service, calendar_id, leftover['deletions'], batch_size, state)
+    created_count, updated_count, skipped_count, deferred_count = apply_mutations(
+        service, calendar_id, writes, batch_size, workers, service_factory, state)
+
+    # アウトボックスから消えたキー = 書き込みが終わったキー
+    remaining = {mutation['key'] for mutation in state.pending(calendar_id)}
+    return {'created': created_count + leftover['arrived'], 'updated': updated_count,
+            'skipped': skipped_count, 'deferred': deferred_count,
+            'keys': {mutation['key'] for mutation in writes} - remaining}
+
+
+def apply_deletions(service, calendar_id, mutations, batch_size=DEFAULT_BATCH_SIZE, state=None):
+    """
+    削除操作を実行し、結果を表示して同期状態ストアから消す
+
+    【処理フロー】
+    1. 送信する前にアウトボックスに記録
+    2. バッチリクエストでまとめて削除
+       （404/410 = すでに削除されている → 成功として扱う）
+    3. 削除したキーの記録とアウトボックスを消す（失敗した分はアウトボックスに残す）
+    （1日のクォータ予算が足りない分は送らず、アウトボックスに残す）
+
+    【引数】
+    service: Google Calendar APIクライアント
+    calendar_id: カレンダーID
+    mutations: [{'action': 'delete', 'key': ..., 'event_id': ..., 'summary': ...}, ...]
+    batch_size: 1バッチあたりのリクエスト数
+    state: 同期状態ストア（Noneなら使わない）
+
+    【戻り値】
+    (deleted_count, skipped_count): 削除した件数、エラーや予算不足で削除できなかった件数
+    """
+    if state is not None:
+        state.enqueue(calendar_id, [outbox_record(mutation) for mutation in mutations])
+
+    # 1日の予算が足りない分は次回に回す（アウトボックスに残る）
+    granted = QUOTA.reserve(len(mutations))
+    deferred = mutations[granted:]
+    mutations = mutations[:granted]
+    if state is not None:
+        state.mark_sent(calendar_id, [mutation['key'] for mutation in mutations])
+    results = execute_mutations(service, calendar_id, mutations, batch_size, reserved=True)
+
+    deleted = []
+    failed = []
+    for mutation, _, error in results:
+        if error is not None and get_error_status(error) not in (404, 410):
+            print(f"  ✗ エラー: {mutation['key']} - {error}")
+            failed.append((mutation['key'], error))
+            continue
+        deleted.append(mutation['key'])
+        print(f"  - 削除: {mutation['key']} - {mutation.get('summary', '')}")
+
+    if state is not None:
+        state.complete(calendar_id, deleted_keys=deleted)
+        state.fail(calendar_id, failed,
+                   count_attempt=not all(is_connection_error(error) for _, error in failed))
+    print_deferred(deferred)
+    return len(deleted), len(failed) + len(deferred)
+
+
+def print_sync_summary(created_count, updated_count, unchanged_count, skipped_count,
+                       deferred_count=0):
+    """同期結果の件数を表示"""
     print(f"\n✅ 同期完了!")
     print(f"  - 新規作成: {created_count} 件")
     print(f"  - 更新: {updated_count} 件")
+    print(f"  - 変更なし: {unchanged_count} 件")
     print(f"  - スキップ: {skipped_count} 件")
+    if deferred_count:
+        print(f"  - 次回に回した（クォータ予算）: {deferred_count} 件")
+
+
+def reconcile_state(state, calendar_id, remote_events):
+    """
+    同期状態ストアをリモートのイベントと照合し、作り直す（--verify）
+
+    【処理フロー】
+    1. リモートの各イベントのハッシュを計算
+    2. ストアの記録と比べて、食い違い（ドリフト）を数えて表示
+    3. ストアの記録をリモートの内容で置き換える
+
+    【引数】
+    state: 同期状態ストア（SyncState）
+    calendar_id: カレンダーID
+    remote_events: fetch_remote_events()の戻り値
+    """
+    stored = state.load(calendar_id)
+    entries = [
+        (key, event['id'], event.get('etag'), content_hash(event_signature(event)))
+        for key, event in remote_events.items()
+    ]
+
+    # ドリフト = ストアとリモートで内容やイベントIDが食い違っている項目
+    drifted = sum(
+        1 for key, event_id, _, digest in entries
+        if key not in stored
+        or stored[key]['event_id'] != event_id
+        or stored[key]['content_hash'] != digest
+    )
+    missing = len(set(stored) - set(remote_events))
+
+    print(f"🔍 同期状態を照合: 食い違い {drifted} 件 / リモートにない記録 {missing} 件")
+    state.replace_all(calendar_id, entries)
+
+
+def estimate_api_cost(plan, batch_size, calendar_lookup, list_pages, create_calendar=False,
+                      deletes=0, lean=False):
+    """
+    同期計画を実行した場合のAPI呼び出し回数とクォータ消費を見積もる
+
+    【ロジック】
+    - クォータ消費: バッチ内のリクエストも1件ずつ数える（Calendar APIの数え方）
+    - HTTPリクエスト: バッチは1回の往復として数える
+
+    【引数】
+    plan: 同期計画
+    batch_size: 1バッチあたりのリクエスト数
+    calendar_lookup: カレンダーIDの解決に使うAPIメソッド名（calendar_lookup_method()、不要ならNone）
+    list_pages: 既存イベント一覧の取得ページ数
+    create_calendar: カレンダーを新規作成するか
+    deletes: 削除するイベント数（--prune）
+    lean: Trueなら更新を events.patch で送る（build_mutations()と同じ）
+
+    【戻り値】
+    cost: {'http_requests': ..., 'quota_units': ..., 'calls': {メソッド名: 回数}}
+    """
+    calls = {}
+    if calendar_lookup:
+        calls[calendar_lookup] = 1
+    if create_calendar:
+        calls['calendars.insert'] = 1
+    if list_pages:
+        calls['events.list'] = list_pages
+    if plan['create']:
+        calls['events.insert'] = len(plan['create'])
+    if plan['update']:
+        calls['events.patch' if lean else 'events.update'] = len(plan['update'])
+    if deletes:
+        calls['events.delete'] = deletes
+
+    writes = len(plan['create']) + len(plan['update']) + deletes
+    write_requests = math.ceil(writes / batch_size) if batch_size > 1 else writes
+
+    return {
+        'http_requests': sum(calls.values()) - writes + write_requests,
+        'quota_units': sum(calls.values()),
+        'calls': calls,
+    }
+
+
+def plan_schedule_sync(schedule, batch_size=DEFAULT_BATCH_SIZE, verify=False,
+                       state_path=DEFAULT_STATE_PATH, prune_limit=None, lean=False):
+    """
+    同期を実行せずに、同期計画とAPIコストの見積もりを作成（--plan）
+
+    【処理フロー】
+    1. 同期状態ストアだけで判断できれば、API呼び出しなしで計画を作成
+    2. 判断できない項目があれば、認証して既存イベントを読み取る（書き込みはしない）
+    3. 作成・更新・削除候補とAPIコストをまとめる
+
+    【引数】
+    schedule: 学習データのリスト
+    batch_size: 1バッチあたりのリクエスト数
+    verify: Trueならストアを使わずリモートと比べる
+    state_path: 同期状態ファイルのパス
+    prune_limit: --prune の削除上限（Noneなら削除の見積もりをしない）
+    lean: --lean で同期する場合の見積もり（更新を events.patch として数える）
+
+    【戻り値】
+    report: 同期計画のレポート（print_plan_report()で表示、JSONに変換可能）
+    """
+    lookup = {'pages': 0, 'create_calendar': False}
+
+    def get_remote_events():
+        # 読み取り専用: カレンダーが見つからなくても作成しない
+        print("🔐 Google認証中（読み取りのみ）...", file=sys.stderr)
+        service = get_calendar_service()
+        if not service:
+            print("❌ Google認証に失敗しました", file=sys.stderr)
+            sys.exit(1)
+        found_calendar_id = resolve_calendar(service, state, create=False, verify=verify)
+        if not found_calendar_id:
+            lookup['create_calendar'] = True
+            return {}
+        remote_events = fetch_remote_events(service, found_calendar_id)
+        lookup['pages'] = max(1, math.ceil(len(remote_events) / 2500))
+        return remote_events
+
+    with SyncState(state_path) as state:
+        record = state.get_calendar_record(CALENDAR_NAME)
+        calendar_id = record[0] if record else None
+        stored = state.load(calendar_id) if calendar_id and not verify else None
+        plan, remote_events = build_sync_plan(schedule, stored, get_remote_events)
+        # 前回終わらなかった書き込み（次の同期で最初に送る）
+        outbox_pending = state.pending_count(calendar_id) if calendar_id else 0
+
+    # カレンダーにあってCSVにないイベント（削除候補）
+    known_keys = set(remote_events if remote_events is not None else stored)
+    orphan_keys = sorted(known_keys - {make_event_key(item) for item in schedule})
+
+    # --prune: 削除の前に必ず既存イベントを一覧取得する。上限を超えたら1件も削除しない
+    prune = None
+    list_pages = lookup['pages']
+    if prune_limit is not None:
+        blocked = len(orphan_keys) > prune_limit
+        prune = {'limit': prune_limit, 'deletes': 0 if blocked else len(orphan_keys),
+                 'blocked': blocked}
+        if remote_events is None:
+            list_pages = max(1, math.ceil(len(known_keys) / 2500))
+
+    # ネットワークを使う場合は、カレンダーIDの解決（保存済みIDの確認か一覧検索）が発生する
+    network_needed = (remote_events is not None or prune is not None
+                      or bool(plan['create'] or plan['update']))
+    calendar_lookup = calendar_lookup_method(record, verify) if network_needed else None
+    cost = estimate_api_cost(plan, batch_size, calendar_lookup, list_pages,
+                             lookup['create_calendar'], prune['deletes'] if prune else 0, lean)
+
+    # クォータ予算（--quota-per-day）で今日送れない書き込みの見積もり
+    # （読み取りも予算を使うので、残りから先に引く。次回に回せるのは書き込みだけ）
+    quota = None
+    if QUOTA.per_minute or QUOTA.per_day:
+        writes = (len(plan['create']) + len(plan['update']) + outbox_pending
+                  + (prune['deletes'] if prune else 0))
+        remaining = QUOTA.remaining_today()
+        deferred = 0
+        if remaining is not None:
+            deferred = min(writes, max(0, cost['quota_units'] + outbox_pending - remaining))
+        quota = {'per_minute': QUOTA.per_minute, 'per_day': QUOTA.per_day,
+                 'remaining_today': remaining, 'deferred': deferred}
+
+    def describe(entry):
+        item = entry['item']
+        return {'key': entry['key'],
+                'week': f"{item['year']}/{item['month']:02d} Week{item['week']}",
+                'content': item['content']}
+
+    return {
+        'schedule_rows': len(schedule),
+        'remote_checked': remote_events is not None,
+        'events': {
+            'create': [describe(entry) for entry in plan['create']],
+            'update': [describe(entry) for entry in plan['update']],
+            'unchanged': len(plan['unchanged']),
+            'delete': orphan_keys,
+        },
+        'prune': prune,
+        'outbox_pending': outbox_pending,
+        'quota': quota,
+        'api_cost': cost,
+    }
+
+
+def print_plan_report(report, output_format='table'):
+    """
+    同期計画のレポートを表示
+
+    【引数】
+    report: plan_schedule_sync()の戻り値（moved_rows を追加してもよい）
+    output_format: 'table'（表形式）または 'json'
+    """
+    if output_format == 'json':
+        print(json.dumps(report, ensure_ascii=False, indent=2))
+        return
+
+    if 'moved_rows' in report:
+        print(f"\n📋 移動する学習項目: {len(report['moved_rows'])} 件")
+        for row in report['moved_rows']:
+            print(f"  → {row['from']} → {row['to']} - {row['content']}")
+
+    events = report['events']
+    print(f"\n📋 同期計画（{report['schedule_rows']} 件の学習項目）")
+    for entry in events['create']:
+        print(f"  + 作成: {entry['week']} - {entry['content']}")
+    for entry in events['update']:
+        print(f"  ✓ 更新: {entry['week']} - {entry['content']}")
+    print(f"  - 新規作成: {len(events['create'])} 件")
+    print(f"  - 更新: {len(events['update'])} 件")
+    print(f"  - 変更なし: {events['unchanged']} 件")
+    print(f"  - 削除候補（カレンダーにあってCSVにない）: {len(events['delete'])} 件")
+    if report.get('outbox_pending'):
+        print(f"  - 前回送信できなかった書き込み: {report['outbox_pending']} 件（次の同期で最初に送信）")
+    prune = report.get('prune')
+    if prune:
+        for key in events['delete']:
+            print(f"  🗑️ 削除: {key}")
+        if prune['blocked']:
+            print(f"  ⚠️ 削除候補が上限（{prune['limit']} 件）を超えるため、--prune では削除しません")
+
+    cost = report['api_cost']
+    print("\n💰 APIコストの見積もり")
+    print(f"  - HTTPリクエスト: {cost['http_requests']} 回")
+    print(f"  - クォータ消費: {cost['quota_units']} 単位")
+    for method, count in cost['calls'].items():
+        print(f"    - {method}: {count}")
+    if not report['remote_checked']:
+        print("  （同期状態ストアの記録から計算。カレンダーとの照合は --verify を指定）")
+    quota = report.get('quota')
+    if quota:
+        print("\n⏱  クォータ予算")
+        if quota['per_minute']:
+            print(f"  - 1分あたり: {quota['per_minute']} 件まで（超えそうなら待つ）")
+        if quota['per_day']:
+            print(f"  - 1日あたり: {quota['per_day']} 件まで（今日の残り: {quota['remaining_today']} 件）")
+        if quota['deferred']:
+            print(f"  ⏸ 予算を超えるため、開始日が遠い {quota['deferred']} 件は次回以降に回します")
+
+
+def sync_schedule(schedule, batch_size=DEFAULT_BATCH_SIZE, workers=1, verify=False,
+                  state_path=DEFAULT_STATE_PATH, calendar_name=CALENDAR_NAME,
+                  token_path=DEFAULT_TOKEN_PATH, interactive=True, lean=False):
+    """
+    同期状態ストアを確認し、必要な場合だけ認証してカレンダーに同期
+
+    【処理フロー】
+    1. 同期状態ストアから前回のカレンダーIDと記録を読み込む
+    2. 全項目のハッシュが記録と一致し、送信待ちの書き込みもなければ、
+       認証もAPI呼び出しもせずに終了（読み取りだけなのでロックは取らない）
+    3. それ以外はカレンダーごとの同期ロックを取得し、
+       a. ロックを待つ間に別の同期が記録を進めたかもしれないので、ストアを読み直して
+          更新が必要な項目をアウトボックスに記録する（認証の前。オフラインで認証や送信が
+          できなくても、次回の同期でまとめて送る。ロックの中で書くので、別の同期や
+          flush_outbox() が書きかけの記録を読むことはない）
+       b. 認証 → カレンダー取得/作成 → sync_events_to_calendar()
+
+    sync-to-calendar.py・reschedule-learning.py --sync・--manifest（複数人の一括同期）から使う
+
+    【引数】
+    schedule: 学習データのリスト
+    batch_size: 1バッチあたりのリクエスト数
+    workers: 並行実行するワーカー数
+    verify: Trueならストアをリモートと照合する（ドリフトが疑われるとき用）
+    state_path: 同期状態ファイルのパス
+    calendar_name: 同期先のカレンダー名
+    token_path: 保存済みトークンのパス
+    interactive: Falseならブラウザでの新規認証を行わない
+    lean: Trueなら軽量モード（sync_events_to_calendar()を参照）
+
+    【戻り値】
+    counts: sync_events_to_calendar()の戻り値（認証失敗の場合はFalse）
+    """
+    with SyncState(state_path) as state:
+        # ステップ1〜2: 変更がなければネットワーク通信なしで終了
+        calendar_id = state.get_calendar_id(calendar_name)
+        if calendar_id and not verify:
+            with METRICS.phase('state_check'):
+                plan, unknown = plan_sync_from_state(schedule, state.load(calendar_id))
+            if not unknown and not plan['update'] and not state.pending_count(calendar_id):
+                print(f"\n✓ 前回の同期から変更はありません（{len(plan['unchanged'])} 件、API呼び出しなし）")
+                return {'created': 0, 'updated': 0, 'unchanged': len(plan['unchanged']), 'skipped': 0,
+                        'deferred': 0}
+
+        # ステップ3〜: 同じカレンダーへの同期は1つずつ（他の実行が終わるまで待つ）
+        # 待っている間に書き込まれた分は、ロック取得後にストアを読むので二重に作成しない
+        with calendar_lock(calendar_name, token_path):
+            # ステップ3a: 更新が必要な項目をアウトボックスに記録（ロック取得後のストアで計画し直す）
+            if calendar_id and not verify:
+                with METRICS.phase('state_check'):
+                    plan, _ = plan_sync_from_state(schedule, state.load(calendar_id))
+                state.enqueue(calendar_id, [outbox_record(mutation)
+                                            for mutation in build_mutations(plan, lean)])
+
+            # ステップ3b: Google Calendar APIで認証
+            print("\n🔐 Google認証中...")
+            with METRICS.phase('auth'):
+                creds = get_credentials(token_path, interactive=interactive)
+            if not creds:
+                # 認証失敗
+                return False
+            service = build_calendar_service(creds)
+
+            print("✓ 認証成功")
+
+            # カレンダーを取得または作成
+            with METRICS.phase('calendar_lookup'):
+                calendar_id = get_or_create_calendar(service, state, verify, calendar_name)
+
+            # ワーカーごとに専用のクライアントを作る関数
+            def service_factory():
+                return build_calendar_service(creds)
+
+            return sync_events_to_calendar(service, calendar_id, schedule, batch_size,
+                                           workers, service_factory, state, verify, lean)
+
+
+def diff_schedule(snapshot, schedule):
+    """
+    前回読み込んだスケジュールと比べて、追加・変更された行を求める（--watch 用）
+
+    【引数】
+    snapshot: 前回の {キー: 学習データ} の辞書
+    schedule: 今回読み込んだ学習データのリスト
+
+    【戻り値】
+    (changed, removed_keys):
+        changed: 追加・変更された学習データのリスト
+        removed_keys: CSVからなくなったキーのリスト
+    """
+    changed = [item for item in schedule if snapshot.get(make_event_key(item)) != item]
+    removed_keys = sorted(set(snapshot) - {make_event_key(item) for item in schedule})
+    return changed, removed_keys
+
+
+def watch_schedule(csv_path, batch_size=DEFAULT_BATCH_SIZE, workers=1,
+                   state_path=DEFAULT_STATE_PATH, debounce=WATCH_DEBOUNCE_SECONDS, lean=False):
+    """
+    dev-schedule.csvを監視し、保存されるたびに変更された行だけを同期（--watch）
+
+    【処理フロー】
+    1. 1回だけ認証・カレンダー解決を行い、APIクライアントを保持したままにする
+    2. 最初に全体を同期し、読み込んだ内容をスナップショットとして覚える
+    3. CSVが保存されたら（FileWatcher、連続した保存は debounce 秒まとめる）読み直す
+    4. スナップショットと比べて、追加・変更された行だけを同期
+    5. Ctrl+C で終了するまで 3〜4 を繰り返す
+
+    【なぜ速いのか】
+    通常の実行では毎回、認証・ディスカバリー・既存イベントの確認が必要になる。
+    監視中はクライアントと同期状態ストアを開いたままにし、変わった行の書き込みだけを送る
+
+    【引数】
+    csv_path: dev-schedule.csvのパス
+    batch_size: 1バッチあたりのリクエスト数
+    workers: 並行実行するワーカー数
+    state_path: 同期状態ファイルのパス
+    debounce: 最後の保存からこの秒数だけ変更がなければ同期する
+    lean: Trueなら軽量モード（sync_events_to_calendar()を参照）
+
+    【戻り値】
+    True: Ctrl+Cで終了、False: 認証失敗
+    """
+    with SyncState(state_path) as state:
+        # ステップ1: 認証とカレンダー解決（監視中は使い回す）
+        print("\n🔐 Google認証中...")
+        with METRICS.phase('auth'):
+            creds = get_credentials()
+        if not creds:
+            return False
+        service = build_calendar_service(creds)
+        print("✓ 認証成功")
+        with METRICS.phase('calendar_lookup'):
+            calendar_id = get_or_create_calendar(service, state)
+
+        def service_factory():
+            return build_calendar_service(creds)
+
+        # ステップ2: 最初に全体を同期
+        # （同期ロックは同期する間だけ持つ。監視中は他の実行を止めない）
+        schedule = load_schedule(csv_path)
+        with calendar_lock(CALENDAR_NAME, DEFAULT_TOKEN_PATH):
+            sync_events_to_calendar(service, calendar_id, schedule, batch_size,
+                                    workers, service_factory, state, lean=lean)
+        snapshot = {make_event_key(item): item for item in schedule}
+
+        watcher = FileWatcher(csv_path)
+        print(f"\n👀 {csv_path} を監視中（{watcher.mode}）... Ctrl+C で終了")
+        try:
+            while True:
+                # ステップ3: 保存を待って読み直す
+                watcher.wait_for_change(debounce)
+                started = time.perf_counter()
+                try:
+                    schedule = load_schedule(csv_path)
+                    check_unique_keys(make_event_key(item) for item in schedule)
+                except (OSError, ValueError, KeyError, csv.Error) as e:
+                    # 保存の途中などで読めない場合は、次の保存を待つ
+                    print(f"⚠️  CSVを読み込めませんでした（次の保存を待ちます）: {e}")
+                    continue
+
+                # ステップ4: 変わった行だけ同期
+                changed, removed_keys = diff_schedule(snapshot, schedule)
+                if removed_keys:
+                    print(f"💡 CSVから削除された行: {len(removed_keys)} 件"
+                          f"（カレンダーから消すには --prune を実行してください）")
+                if changed:
+                    with METRICS.phase('watch_sync'), calendar_lock(CALENDAR_NAME, DEFAULT_TOKEN_PATH):
+                        sync_events_to_calendar(service, calendar_id, changed, batch_size,
+                                                workers, service_factory, state, lean=lean)
+                    print(f"⏱️  保存からの同期時間: {time.perf_counter() - started:.2f} 秒")
+                snapshot = {make_event_key(item): item for item in schedule}
+        except KeyboardInterrupt:
+            print("\n👋 監視を終了しました")
+        finally:
+            watcher.close()
+    return True
+
+
+# ============================================================
+# ICSファイルの書き出し（--ics）
+# ============================================================
+
+def export_ics(csv_path, ics_path=DEFAULT_ICS_PATH, force=False, calendar_name=CALENDAR_NAME):
+    """
+    dev-schedule.csvを.icsファイルに書き出す（Google Calendar APIを使わない）
+
+    【処理フロー】
+    1. CSVのハッシュを計算し、前回書き出した.icsに記録されたハッシュと比べる
+    2. 同じなら何もしない（force=Trueなら書き直す）
+    3. iter_schedule()で1行ずつ読み、同期と同じ create_event_body() でイベントにする
+       （週の範囲・タイトル・説明文・キーがGoogleカレンダーへの同期と一致する）
+    4. ics_export.write_calendar() で書き出す
+
+    【引数】
+    csv_path: dev-schedule.csvのパス
+    ics_path: 出力先の.icsファイルのパス
+    force: Trueなら変更がなくても書き直す
+    calendar_name: カレンダー名
+
+    【戻り値】
+    count: 書き出したイベント数（変更がなく書き出さなかった場合はNone）
+    """
+    # ステップ1〜2: CSVと設定が前回と同じなら書き直さない
+    settings = f"{calendar_name}\n{DEFAULT_REMINDER_MINUTES}"
+    with METRICS.phase('ics_digest'):
+        digest = source_digest(csv_path, settings)
+    if not force and read_source_digest(ics_path) == digest:
+        print(f"\n✓ 前回の書き出しから変更はありません: {ics_path}")
+        return None
+
+    # ステップ3〜4: 1行ずつイベントにして書き出す
+    events = (create_event_body(item, *calculate_week_range(item))
+              for item in iter_schedule(csv_path))
+    with METRICS.phase('ics_write'):
+        count = write_calendar(ics_path, events, calendar_name, digest)
+    print(f"\n📤 {count} 件のイベントを書き出しました: {ics_path}")
+    return count
+
+
+# ============================================================
+# 複数人の一括同期（--manifest）
+# ============================================================
+
+def load_manifest(manifest_path):
+    """
+    一括同期の対象者一覧（マニフェスト）を読み込む
+
+    【マニフェストの形式（JSON）】
+    {
+        "tenants": [
+            {
+                "name": "alice",                          # 対象者名（必須、重複不可）
+                "schedule": "alice/dev-schedule.csv",     # スケジュールCSV（必須）
+                "token": "alice/token.json",              # 認証済みトークン（必須）
+                "calendar_name": "フルスタック学習プログラム",  # 省略時はCALENDAR_NAME
+                "state": "alice/sync-state.db"            # 省略時は tenants/<name>.db
+            },
+            ...
+        ]
+    }
+    相対パスはマニフェストファイルのディレクトリからのパスとして扱う
+
+    【引数】
+    manifest_path: マニフェストファイルのパス
+
+    【戻り値】
+    tenants: [{'name', 'schedule', 'token', 'calendar_name', 'state'}, ...]（パスはPath）
+
+    【例外】
+    ValueError: 必須項目がない・対象者名が重複している場合
+    """
+    manifest_path = Path(manifest_path)
+    base_dir = manifest_path.parent
+    with open(manifest_path, 'r', encoding='utf-8') as f:
+        entries = json.load(f).get('tenants', [])
+
+    tenants = []
+    names = set()
+    for number, entry in enumerate(entries, start=1):
+        missing = [field for field in ('name', 'schedule', 'token') if not entry.get(field)]
+        if missing:
+            raise ValueError(f"{number} 件目に {', '.join(missing)} がありません")
+        if entry['name'] in names:
+            raise ValueError(f"対象者名が重複しています: {entry['name']}")
+        names.add(entry['name'])
+
+        # 同期状態は対象者ごとに別ファイル（カレンダー名が同じでも混ざらない）
+        state = entry.get('state') or DEFAULT_STATE_PATH.parent / 'tenants' / f"{entry['name']}.db"
+        tenants.append({
+            'name': entry['name'],
+            'schedule': base_dir / entry['schedule'],
+            'token': base_dir / entry['token'],
+            'calendar_name': entry.get('calendar_name') or CALENDAR_NAME,
+            'state': base_dir / state,
+        })
+    return tenants
+
+
+def sync_tenant(tenant, batch_size=DEFAULT_BATCH_SIZE, workers=1, verify=False, lean=False):
+    """
+    対象者1人分のスケジュールを同期（一括同期の1タスク）
+
+    1人の失敗（CSVがない・トークン切れ・APIエラー）が他の人に影響しないよう、
+    例外はすべてここで受け止めて結果に記録する
+
+    【引数】
+    tenant: load_manifest()の戻り値の1要素
+    batch_size: 1バッチあたりのリクエスト数
+    workers: この対象者の書き込みを並行実行するワーカー数
+    verify: Trueならストアをリモートと照合する
+    lean: Trueなら軽量モード（sync_events_to_calendar()を参照）
+
+    【戻り値】
+    result: {'name', 'status'（'ok' / 'auth_failed' / 'error'）,
+             'created', 'updated', 'unchanged', 'skipped', 'deferred', 'seconds', 'error'}
+    """
+    started = time.perf_counter()
+    result = {'name': tenant['name'], 'status': 'ok',
+              'created': 0, 'updated': 0, 'unchanged': 0, 'skipped': 0, 'deferred': 0,
+              'error': None}
+    try:
+        schedule = load_schedule(tenant['schedule'])
+        counts = sync_schedule(schedule, batch_size, workers, verify, tenant['state'],
+                               tenant['calendar_name'], tenant['token'], interactive=False,
+                               lean=lean)
+        if counts:
+            result.update(counts)
+        else:
+            result['status'] = 'auth_failed'
+    except Exception as e:
+        result['status'] = 'error'
+        result['error'] = str(e)
+    result['seconds'] = time.perf_counter() - started
+    return result
+
+
+def sync_manifest(manifest_path, tenant_workers=DEFAULT_TENANT_WORKERS,
+                  batch_size=DEFAULT_BATCH_SIZE, workers=1, verify=False, lean=False):
+    """
+    マニフェストに書かれた全員のスケジュールを1つのプロセスで同期（--manifest）
+
+    【処理フロー】
+    1. マニフェストを読み込む
+    2. スレッドプールで tenant_workers 人ずつ並行して sync_tenant() を実行
+       （ライブラリの読み込み・ディスカバリードキュメントは全員で共有するので、
+         1人ずつプロセスを起動するより速い。認証・カレンダー・同期状態は1人ずつ別）
+    3. 対象者ごとの結果を表にして表示
+
+    【引数】
+    manifest_path: マニフェストファイルのパス
+    tenant_workers: 同時に同期する人数
+    batch_size: 1バッチあたりのリクエスト数
+    workers: 1人あたりの書き込みワーカー数
+    verify: Trueならストアをリモートと照合する
+    lean: Trueなら軽量モード（sync_events_to_calendar()を参照）
+
+    【戻り値】
+    results: sync_tenant()の戻り値のリスト（マニフェストと同じ順番）
+    """
+    tenants = load_manifest(manifest_path)
+    print(f"\n👥 {len(tenants)} 人のスケジュールを同期します（同時に {tenant_workers} 人ずつ）")
+
+    with ThreadPoolExecutor(max_workers=max(1, tenant_workers)) as executor:
+        results = list(executor.map(
+            lambda tenant: sync_tenant(tenant, batch_size, workers, verify, lean), tenants))
+
+    print("\n" + "=" * 50)
+    print("📊 対象者ごとの結果")
+    icons = {'ok': '✓', 'auth_failed': '🔐', 'error': '✗'}
+    for result in results:
+        line = (f"  {icons[result['status']]} {result['name']}: "
+                f"作成 {result['created']} / 更新 {result['updated']} / "
+                f"変更なし {result['unchanged']} / スキップ {result['skipped']}"
+                f"（{result['seconds']:.1f}秒）")
+        if result['deferred']:
+            line += f" - 次回に回した: {result['deferred']}"
+
+        if result['status'] == 'auth_failed':
+            line += " - 認証失敗"
+        elif result['error']:
+            line += f" - {result['error']}"
+        print(line)
+
+    failed = sum(1 for result in results if result['status'] != 'ok')
+    print(f"\n✅ 完了: {len(results) - failed} 人 / 失敗: {failed} 人")
+    return results
+
+
+def stream_sync_schedule(csv_path, batch_size=DEFAULT_BATCH_SIZE, workers=1, verify=False,
+                         state_path=DEFAULT_STATE_PATH, chunk_size=STREAM_CHUNK_SIZE, lean=False):
+    """
+    大きなスケジュールファイルを、メモリを一定に保ったまま同期（--stream）
+
+    【処理フロー】
+    1. iter_schedule()でCSVを読みながら、chunk_size行ずつのチャンクに分ける
+    2. チャンクのキーだけ同期状態ストアから読み込み、計画を作る
+    3. 記録のない行があれば、初回だけリモートのイベントをページごとにストアへ取り込む
+       （カレンダー全体をメモリに載せない）
+    4. チャンクの作成・更新をすぐに書き込み、結果をストアに記録
+    5. 次のチャンクへ（書き込みは最初のチャンクを読み終えた時点で始まる）
+
+    認証は、書き込みかリモートの確認が初めて必要になったときに行う。
+    変更がなければ sync_schedule() と同じくAPI呼び出しなしで終わる
+
+    【引数】
+    csv_path: dev-schedule.csvのパス
+    batch_size: 1バッチあたりのリクエスト数
+    workers: 並行実行するワーカー数
+    verify: Trueならストアをリモートの内容で作り直してから同期する
+    state_path: 同期状態ファイルのパス
+    chunk_size: 1チャンクの行数
+    lean: Trueなら軽量モード（sync_events_to_calendar()を参照）
+
+    【戻り値】
+    True: 同期成功、False: 認証失敗
+    """
+    # 書き込みはチャンクごとに続くので、実行全体で同期ロックを持つ
+    with SyncState(state_path) as state, calendar_lock(CALENDAR_NAME, DEFAULT_TOKEN_PATH):
+        session = {}
+
+        def connect():
+            # 認証してカレンダーを解決する（2回目以降は同じものを返す）
+            if not session:
+                print("\n🔐 Google認証中...")
+                with METRICS.phase('auth'):
+                    creds = get_credentials()
+                if not creds:
+                    return None
+                service = build_calendar_service(creds)
+                print("✓ 認証成功")
+                with METRICS.phase('calendar_lookup'):
+                    session['calendar_id'] = get_or_create_calendar(service, state, verify)
+                session['service'] = service
+                session['service_factory'] = lambda: build_calendar_service(creds)
+                # 前回終わらなかった書き込みを先に送る（送った行はチャンクの計画で「変更なし」になる）
+                # （全体のキーが先に分からないため、急ぐ順・予算はこの分とチャンクごとに適用する）
+                with METRICS.phase('outbox'):
+                    session['flushed'] = flush_outbox(service, session['calendar_id'], state,
+                                                      batch_size, workers,
+                                                      session['service_factory'], lean)
+            return session
+
+        def import_remote_events(calendar_id):
+            # リモートのイベントを1ページずつストアに取り込む
+            # （記録済みのキーは上書きしない。--verifyのときは先に記録を消して作り直す）
+            if verify:
+                state.clear(calendar_id)
+            count = 0
+            with METRICS.phase('remote_list'):
+                for page in iter_remote_event_pages(session['service'], calendar_id,
+                                                    LIST_EVENT_FIELDS if lean else None):
+                    state.record(calendar_id, [
+                        (key, event['id'], event.get('etag'), content_hash(event_signature(event)))
+                        for key, event in page.items()
+                    ], overwrite=False)
+                    count += len(page)
+            print(f"✓ 既存イベントをストアに取り込み: {count} 件")
+
+        calendar_id = state.get_calendar_id(CALENDAR_NAME)
+        imported = False
+        if verify:
+            if not connect():
+                return False
+            calendar_id = session['calendar_id']
+            import_remote_events(calendar_id)
+            imported = True
+        elif calendar_id and state.pending_count(calendar_id):
+            # 前回終わらなかった書き込みがある → CSVに変更がなくても接続して送る
+            if not connect():
+                return False
+            calendar_id = session['calendar_id']
+
+        print(f"\n📊 ストリーミング同期開始（{chunk_size} 行ずつ）")
+        created_count = updated_count = unchanged_count = skipped_count = deferred_count = 0
+        total_rows = 0
+
+        def plan_chunk(chunk):
+            # チャンクのキーだけストアから読み込んで計画を作る
+            with METRICS.phase('plan'):
+                keys = [make_event_key(item) for item in chunk]
+                stored = state.load_keys(calendar_id, keys) if calendar_id else {}
+                return plan_sync_from_state(chunk, stored)
+
+        for chunk in iter_chunks(iter_schedule(csv_path), chunk_size):
+            total_rows += len(chunk)
+
+            # ステップ2: チャンクの計画を作る
+            plan, unknown = plan_chunk(chunk)
+
+            # 書き込みかリモートの確認が必要になったら認証する
+            if (unknown or plan['update']) and not session:
+                if not connect():
+                    return False
+                if session['calendar_id'] != calendar_id:
+                    # 保存済みのカレンダーIDが使えなかった → 解決したIDの記録で計画し直す
+                    calendar_id = session['calendar_id']
+                    plan, unknown = plan_chunk(chunk)
+
+            # ステップ3: 記録のない行があれば、初回だけリモートのイベントを取り込む
+            if unknown and not imported:
+                import_remote_events(calendar_id)
+                imported = True
+                plan, unknown = plan_chunk(chunk)
+
+            # リモートにもない行は新規作成
+            if unknown:
+                plan['create'] = plan_sync(unknown, {})['create']
+
+            # アウトボックスから送った行は、送った側（作成・更新）で数える
+            flushed_keys = session['flushed']['keys'] if session else ()
+            unchanged_count += sum(1 for entry in plan['unchanged'] if entry['key'] not in flushed_keys)
+            if not plan['create'] and not plan['update']:
+                continue
+
+            # ステップ4: チャンクの差分を書き込む
+            with METRICS.phase('write'):
+                created, updated, skipped, deferred = apply_mutations(
+                    session['service'], session['calendar_id'], build_mutations(plan, lean),
+                    batch_size, workers, session['service_factory'], state)
+            created_count += created
+            updated_count += updated
+            skipped_count += skipped
+            deferred_count += deferred
+            print(f"📦 {total_rows} 行まで処理しました")
+
+        if not session:
+            print(f"\n✓ 前回の同期から変更はありません（{total_rows} 件、API呼び出しなし）")
+            return True
+
+        created_count += session['flushed']['created']
+        updated_count += session['flushed']['updated']
+        skipped_count += session['flushed']['skipped']
+        deferred_count += session['flushed']['deferred']
+        print_sync_summary(created_count, updated_count, unchanged_count, skipped_count,
+                           deferred_count)
+    return True
+
+
+def prune_orphan_events(service, calendar_id, schedule_keys, state=None,
+                        batch_size=DEFAULT_BATCH_SIZE, limit=DEFAULT_PRUNE_LIMIT):
+    """
+    カレンダーにあってCSVにないイベント（孤立イベント）を削除（--prune）
+
+    【処理フロー】
+    1. 既存イベントを一括取得し、CSVのキーにないものを孤立イベントとする
+    2. 孤立イベントが上限（limit）を超えたら、1件も削除せずに終了
+       （CSVの読み込みミスなどでカレンダーを空にしないための安全装置）
+    3. バッチリクエストでまとめて削除
+       （404/410 = すでに削除されている → 成功として扱う）
+    4. 削除したキーを同期状態ストアから消す
+
+    【引数】
+    service: Google Calendar APIクライアント
+    calendar_id: カレンダーID
+    schedule_keys: CSVにある全行のキーのセット
+    state: 同期状態ストア（Noneなら使わない）
+    batch_size: 1バッチあたりのリクエスト数
+    limit: 1回に削除してよいイベント数の上限
+
+    【戻り値】
+    (deleted_count, skipped_count): 削除した件数、エラーで削除できなかった件数
+                                    （上限を超えた場合は (0, 孤立イベント数)）
+    """
+    # ステップ1: 孤立イベントを探す
+    remote_events = fetch_remote_events(service, calendar_id)
+    orphans = sorted(key for key in remote_events if key not in schedule_keys)
+    if not orphans:
+        print("\n✓ 削除するイベントはありません")
+        return 0, 0
+
+    # ステップ2: 安全装置
+    if len(orphans) > limit:
+        print(f"\n⚠️  孤立イベントが {len(orphans)} 件あり、上限（{limit} 件）を超えるため削除しません")
+        print(f"   CSVが正しいことを確認してから --prune {len(orphans)} で再実行してください")
+        return 0, len(orphans)
+
+    # ステップ3: まとめて削除
+    print(f"\n🗑️  孤立イベントを削除: {len(orphans)} 件")
+    mutations = [{'action': 'delete', 'key': key, 'event_id': remote_events[key]['id'],
+                  'summary': remote_events[key].get('summary', '')}
+                 for key in orphans]
+
+    # ステップ4: 同期状態ストアから消す（apply_deletions()の中で、削除できた分だけ）
+    with METRICS.phase('prune'):
+        deleted_count, skipped_count = apply_deletions(
+            service, calendar_id, mutations, batch_size, state)
+
+    print(f"✅ 削除完了: {deleted_count} 件（スキップ: {skipped_count} 件）")
+    return deleted_count, skipped_count
+
+
+def prune_schedule(schedule_keys, batch_size=DEFAULT_BATCH_SIZE, limit=DEFAULT_PRUNE_LIMIT,
+                   state_path=DEFAULT_STATE_PATH):
+    """
+    認証してカレンダーの孤立イベントを削除（--prune）
+
+    【処理フロー】
+    1. 同期ロックを取得（同期中のイベントを孤立と判断しないため）
+    2. 認証して専用カレンダーを探す（見つからなければ何もしない。作成もしない）
+    3. prune_orphan_events() を実行
+
+    【引数】
+    schedule_keys: CSVにある全行のキーのセット
+    batch_size: 1バッチあたりのリクエスト数
+    limit: 1回に削除してよいイベント数の上限
+    state_path: 同期状態ファイルのパス
+
+    【戻り値】
+    True: 成功、False: 認証失敗
+    """
+    with SyncState(state_path) as state, calendar_lock(CALENDAR_NAME, DEFAULT_TOKEN_PATH):
+        print("\n🔐 Google認証中...")
+        with METRICS.phase('auth'):
+            service = get_calendar_service()
+        if not service:
+            return False
+        print("✓ 認証成功")
+
+        with METRICS.phase('calendar_lookup'):
+            calendar_id = resolve_calendar(service, state, create=False)
+        if not calendar_id:
+            print("💡 専用カレンダーがないため、削除するイベントはありません")
+            return True
+
+        prune_orphan_events(service, calendar_id, schedule_keys, state, batch_size, limit)
+    return True
+
+
+def event_start_date(event):
+    """
+    イベントの開始日を求める（--pull 用）
+
+    【なぜ start.date だけを見ないのか】
+    Googleカレンダーで終日イベントを時間指定の予定に変えると、
+    start.date がなくなり start.dateTime（例: '2026-01-10T09:00:00+09:00'）になる。
+    その場合はその予定の日付（タイムゾーンはイベントの表記のまま）を使う
+    （取り込んだ後の更新で、終日イベントに戻る）
+
+    【引数】
+    event: APIから取得したイベント
+
+    【戻り値】
+    start_date: 開始日（datetime、時刻は0時。読み取れなければNone）
+    """
+    start = event.get('start', {})
+    value = start.get('date') or start.get('dateTime', '')[:10]
+    try:
+        return datetime.strptime(value, '%Y-%m-%d')
+    except ValueError:
+        return None
+
+
+def pull_calendar_changes(service, calendar_id, csv_path, state):
+    """
+    Googleカレンダー上で直接編集されたイベントをdev-schedule.csvに取り込む
+
+    【処理フロー】
+    1. 同期トークンで前回以降に変更されたイベントだけを取得
+    2. 同期状態ストアのハッシュと比べて、カレンダー上で編集されたイベントを見つける
+       （このスクリプト自身の書き込みはハッシュが一致するので無視される）
+    3. イベントの日付・タイトル・説明文をCSVの行に反映して書き戻す
+    4. カレンダーの内容とCSVから作り直したイベントが違えば（日付の揃え直しなど）更新する
+    5. 次回用の同期トークンを保存
+
+    【引数】
+    service: Google Calendar APIクライアント
+    calendar_id: カレンダーID
+    csv_path: dev-schedule.csvのパス
+    state: 同期状態ストア（SyncState）
+    """
+    # ステップ1: 変更されたイベントを取得
+    events, next_sync_token, full_resync = list_changed_events(
+        service, calendar_id, state.get_sync_token(calendar_id))
+    mode = '全件' if full_resync else '差分'
+    print(f"✓ 変更されたイベントを取得（{mode}）: {len(events)} 件")
+
+    stored = state.load(calendar_id)
+
+    with open(csv_path, 'r', encoding='utf-8') as f:
+        reader = csv.DictReader(f)
+        fieldnames = reader.fieldnames
+        rows = list(reader)
+    # 行IDがない行には、週を動かす前に割り当てる（動かしてもキーが変わらないように）
+    fieldnames = ensure_row_ids(fieldnames, rows)
+    rows_by_key = {make_event_key(schedule_item_from_row(row)): row for row in rows}
+    # 学習項目が入っている週（1つの週には1つの学習項目だけ）
+    taken_weeks = {(int(row['年度']), int(row['月']), int(row['週'])) for row in rows}
+
+    # CSVの列名（学習データのキー → 列名）
+    columns = {
+        'content': '学習内容',
+        'project': '実践課題',
+        'process': '開発工程',
+        'claude_usage': 'Claude活用法',
+        'url': 'メモ・参考URL',
+    }
+
+    # ステップ2〜3: カレンダー上で編集されたイベントをCSVの行に反映
+    applied = []  # [(元のキー, 新しいキー, イベント, 行), ...]
+    for event in events:
+        private = event.get('extendedProperties', {}).get('private', {})
+        unique_key = private.get('fslearning_key')
+        record = stored.get(unique_key)
+        row = rows_by_key.get(unique_key)
+
+        # 削除されたイベント・このスクリプトが管理していないイベントは取り込まない
+        if event.get('status') == 'cancelled' or record is None or row is None:
+            continue
+
+        # ハッシュが一致 = 最後に同期した内容のまま（自分自身の書き込み）
+        if content_hash(event_signature(event)) == record['content_hash']:
+            continue
+
+        item = schedule_item_from_row(row)
+        sunday, next_sunday = calculate_week_range(item)
+        local_hash = content_hash(event_signature(create_event_body(item, sunday, next_sunday)))
+        if local_hash != record['content_hash']:
+            # CSVとカレンダーの両方が編集されていた場合はカレンダー側を優先
+            print(f"  ⚠️ 競合: {unique_key} はCSVでも編集されています（カレンダーの内容を優先）")
+
+        # イベントの開始日からその週の年・月・週番号を求める
+        start_date = event_start_date(event)
+        if start_date is None:
+            print(f"  ⚠️ スキップ: {unique_key} の開始日を読み取れません")
+            continue
+        year, month, week = find_schedule_week(start_date)
+        original = (int(row['年度']), int(row['月']), int(row['週']))
+        if (year, month, week) != original and (year, month, week) in taken_weeks:
+            print(f"  ⚠️ スキップ: {unique_key} の移動先 {year}/{month:02d} Week{week}"
+                  f" には別の学習項目があります")
+            continue
+
+        row['年度'], row['月'], row['週'] = str(year), str(month), str(week)
+        taken_weeks.discard(original)
+        taken_weeks.add((year, month, week))
+        for field, value in parse_event_body(event).items():
+            row[columns[field]] = value
+
+        # 行IDがあるのでキーは変わらない（古いイベントのキーが行IDと違う場合だけ変わる）
+        new_key = make_event_key(schedule_item_from_row(row))
+        applied.append((unique_key, new_key, event, row))
+        print(f"  ↓ 取り込み: {original[0]}/{original[1]:02d} Week{original[2]}"
+              f" → {year}/{month:02d} Week{week} - {row['学習内容']}")
+
+    if applied:
+        with open(csv_path, 'w', encoding='utf-8', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=fieldnames)
+            writer.writeheader()
+            writer.writerows(rows)
+
+    # ステップ4: CSVから作り直したイベントと違う場合（キー・日付の揃え直し）は更新
+    mutations = []
+    entries = []
+    for unique_key, new_key, event, row in applied:
+        item = schedule_item_from_row(row)
+        sunday, next_sunday = calculate_week_range(item)
+        event_body = create_event_body(item, sunday, next_sunday)
+        signature = event_signature(event_body)
+        if signature != event_signature(event):
+            mutations.append({'action': 'update', 'key': new_key, 'item': item, 'body': event_body,
+                              'hash': content_hash(signature), 'event_id': event['id']})
+        else:
+            entries.append((new_key, event['id'], event.get('etag'), content_hash(signature)))
+
+    for mutation, response, error in execute_mutations(service, calendar_id, mutations):
+        if error is not None:
+            print(f"  ✗ エラー: {mutation['key']} - {error}")
+        else:
+            entries.append((mutation['key'], response['id'], response.get('etag'), mutation['hash']))
+
+    state.forget(calendar_id, [old for old, new, _, _ in applied if old != new])
+    state.record(calendar_id, entries)
+
+    # ステップ5: 次回用の同期トークンを保存
+    if next_sync_token:
+        state.set_sync_token(calendar_id, next_sync_token)
+
+    print(f"\n✅ 取り込み完了: {len(applied)} 件")
+
+
+def pull_schedule(csv_path, state_path=DEFAULT_STATE_PATH):
+    """
+    Googleカレンダーの変更をdev-schedule.csvに取り込む（--pull）
+
+    【処理フロー】
+    1. 同期状態ストアから前回のカレンダーIDを読み込む（未同期なら何もしない）
+    2. 同期ロックを取得し、認証してpull_calendar_changes()を実行
+       （start-learning.sh から出力を隠して実行されるため、ブラウザでの新規認証は行わない。
+         トークンが使えなければ、1行の警告を表示して取り込みをスキップする）
+
+    【引数】
+    csv_path: dev-schedule.csvのパス
+    state_path: 同期状態ファイルのパス
+
+    【戻り値】
+    True: 取り込み成功（または取り込むものなし）、False: 認証失敗
+    """
+    with SyncState(state_path) as state:
+        calendar_id = state.get_calendar_id(CALENDAR_NAME)
+        if not calendar_id:
+            print("💡 まだ同期されていないため、取り込むイベントはありません")
+            return True
+
+        # CSVと同期状態ストアを書き換えるので、同期とは同時に実行しない
+        with calendar_lock(CALENDAR_NAME, DEFAULT_TOKEN_PATH):
+            print("\n🔐 Google認証中...")
+            with METRICS.phase('auth'):
+                service = get_calendar_service(interactive=False)
+            if not service:
+                print("⚠️  認証できないため、カレンダーの取り込みをスキップしました"
+                      "（./settings/calendar-sync/scripts/sync を実行して認証し直してください）")
+                return False
+            print("✓ 認証成功")
+
+            with METRICS.phase('pull'):
+                pull_calendar_changes(service, calendar_id, csv_path, state)
+    return True
 
 
 def main():
@@ -457,20 +3178,179 @@ def main():
     【全体の流れ】
     1. CSVファイルのパスを構築
     2. ファイルの存在確認
-    3. Google Calendar APIで認証
-    4. カレンダーを取得/作成
-    5. スケジュールを読み込み
-    6. カレンダーに同期
+    3. スケジュールを読み込み
+    4. カレンダーに同期（sync_schedule()、変更がなければAPI呼び出しなし）
 
     【変数の流れ】
     csv_path → schedule
-    credentials → service
-    service → calendar_id
-    service, calendar_id, schedule → sync_events_to_calendar()
+    schedule → sync_schedule() → 認証 → calendar_id → sync_events_to_calendar()
+
+    【コマンドライン引数】
+    --batch-size: 1バッチあたりのリクエスト数（オプション、デフォルト: 50）
+    --workers: 並行実行するワーカー数（オプション、デフォルト: 1）
+    --verify: 同期状態ストアをリモートのカレンダーと照合する（オプション）
+    --pull: カレンダー上の変更をCSVに取り込む（オプション、同期は行わない）
+    --plan: 同期計画とAPIコストを表示するだけで、カレンダーには書き込まない（table / json）
+    --metrics-out: 計測結果の出力先（オプション、.jsonならJSON、それ以外はOpenMetrics形式）
+    --stream: CSVを一括で読み込まず、チャンクごとに計画・書き込みする（オプション、行数を指定可）
+    --prune: 同期後、CSVにないイベントを削除する（オプション、1回の削除上限を指定可）
+    --watch: CSVを監視し、保存されるたびに変更された行だけを同期する（オプション）
+    --manifest: 複数人のスケジュールをまとめて同期する（オプション、マニフェストJSONのパス）
+    --tenant-workers: --manifest で同時に同期する人数（オプション、デフォルト: 4）
+    --lean: 変わったフィールドだけpatchし、レスポンスを最小限のフィールドに絞る（オプション）
+    --ics: APIを使わず.icsファイルに書き出す（オプション、出力先を指定可）
+    --force: --ics でCSVに変更がなくても書き直す（オプション）
+    --quota-per-minute: 1分あたりのAPI呼び出しの上限（オプション、読み取り・再送も数える。超えそうなら待つ）
+    --quota-per-day: 1日あたりのAPI呼び出しの上限（オプション、超える分の書き込みは次回に回す）
     """
-    print("=" * 50)
-    print("  Googleカレンダー同期スクリプト")
-    print("=" * 50)
+    parser = argparse.ArgumentParser(
+        description='学習スケジュールをGoogleカレンダーに同期します'
+    )
+    parser.add_argument(
+        '--batch-size',
+        type=int,
+        default=DEFAULT_BATCH_SIZE,
+        help=f'作成・更新を何件ずつまとめて送信するか（1-{MAX_BATCH_SIZE}、1なら1件ずつ）'
+    )
+    parser.add_argument(
+        '--workers',
+        type=int,
+        default=1,
+        help='並行実行するワーカー数（例: 4）'
+    )
+    parser.add_argument(
+        '--verify',
+        action='store_true',
+        help='ローカルの同期状態をGoogleカレンダーと照合してから同期する'
+    )
+    parser.add_argument(
+        '--pull',
+        action='store_true',
+        help='Googleカレンダー上で編集された日付・内容をCSVに取り込む（同期は行わない）'
+    )
+    parser.add_argument(
+        '--plan',
+        nargs='?',
+        const='table',
+        choices=['table', 'json'],
+        help='同期計画とAPIコストの見積もりを表示するだけで、カレンダーには書き込まない'
+    )
+    parser.add_argument(
+        '--stream',
+        nargs='?',
+        const=STREAM_CHUNK_SIZE,
+        type=int,
+        metavar='CHUNK_SIZE',
+        help=f'大きなCSVをメモリを一定に保ったまま同期する（1チャンクの行数、デフォルト: {STREAM_CHUNK_SIZE}）'
+    )
+    parser.add_argument(
+        '--prune',
+        nargs='?',
+        const=DEFAULT_PRUNE_LIMIT,
+        type=int,
+        metavar='MAX_DELETES',
+        help=f'同期後、CSVにないイベントをカレンダーから削除する'
+             f'（上限を超える場合は削除しない、デフォルト: {DEFAULT_PRUNE_LIMIT} 件）'
+    )
+    parser.add_argument(
+        '--watch',
+        action='store_true',
+        help='dev-schedule.csvを監視し、保存されるたびに変更された行だけを同期する（Ctrl+Cで終了）'
+    )
+    parser.add_argument(
+        '--manifest',
+        help='複数人のスケジュール・トークン・カレンダー名を書いたJSONを読み込み、まとめて同期する'
+    )
+    parser.add_argument(
+        '--tenant-workers',
+        type=int,
+        default=DEFAULT_TENANT_WORKERS,
+        help=f'--manifest で同時に同期する人数（デフォルト: {DEFAULT_TENANT_WORKERS}）'
+    )
+    parser.add_argument(
+        '--lean',
+        action='store_true',
+        help='更新では変わったフィールドだけを送信（patch）し、レスポンス・一覧を必要なフィールドに絞る'
+    )
+    parser.add_argument(
+        '--ics',
+        nargs='?',
+        const=DEFAULT_ICS_PATH,
+        type=Path,
+        metavar='ICS_PATH',
+        help=f'Googleカレンダーに同期せず、購読用の.icsファイルに書き出す'
+             f'（デフォルト: {DEFAULT_ICS_PATH.relative_to(Path(__file__).parent.parent.parent.parent)}）'
+    )
+    parser.add_argument(
+        '--force',
+        action='store_true',
+        help='--ics でCSVに変更がなくても書き直す'
+    )
+    parser.add_argument(
+        '--quota-per-minute',
+        type=int,
+        metavar='CALLS',
+        help='1分あたりのAPI呼び出しの上限（読み取り・再送も数える。超えそうなら待つ。'
+             'プロジェクトのクォータより少し小さくする）'
+    )
+    parser.add_argument(
+        '--quota-per-day',
+        type=int,
+        metavar='CALLS',
+        help='1日（UTC）あたりのAPI呼び出しの上限（読み取り・再送も数える。'
+             '超える分の書き込みは開始日が遠いものから次回の同期に回す）'
+    )
+    parser.add_argument(
+        '--metrics-out',
+        help='フェーズごとの時間・API呼び出し回数・レイテンシ・ピークメモリを書き出すファイル'
+             '（.jsonならJSON、それ以外はOpenMetrics形式）'
+    )
+    args = parser.parse_args()
+
+    # APIのクォータ予算（--manifest では全員で共有する）
+    QUOTA.configure(args.quota_per_minute, args.quota_per_day)
+
+    try:
+        if args.metrics_out:
+            # 計測を有効にして、終了時（エラー時も）に結果を書き出す
+            METRICS.start_memory_tracking()
+            try:
+                run_sync_command(args)
+            finally:
+                METRICS.stop_memory_tracking()
+                METRICS.write(args.metrics_out)
+                print(f"📈 計測結果を書き出しました: {args.metrics_out}")
+        else:
+            run_sync_command(args)
+    except TimeoutError as e:
+        # 別の同期が長時間終わらない（同期ロックを取得できない）
+        print(f"❌ {e}")
+        sys.exit(1)
+    except ValueError as e:
+        # CSVの内容が不正（同じIDの行がある など）
+        print(f"❌ {e}")
+        sys.exit(1)
+
+
+def run_sync_command(args):
+    """
+    コマンドライン引数に従って同期・取り込み・計画表示を実行
+
+    【引数】
+    args: main()で解析したコマンドライン引数
+    """
+
+    # --manifest: マニフェストに書かれた全員を同期（CSVのパスは各自のものを使う）
+    if args.manifest:
+        print("=" * 50)
+        print("  Googleカレンダー一括同期")
+        print("=" * 50)
+        try:
+            sync_manifest(args.manifest, args.tenant_workers, args.batch_size,
+                          args.workers, args.verify, args.lean)
+        except (OSError, ValueError) as e:
+            print(f"❌ マニフェストを読み込めません: {e}")
+        return
 
     # ステップ1: CSVファイルのパスを構築
     # __file__ = このスクリプトのパス（settings/calendar-sync/scripts/sync-to-calendar.py）
@@ -483,25 +3363,66 @@ def main():
         print(f"❌ スケジュールファイルが見つかりません: {csv_path}")
         return
 
-    # ステップ3: Google Calendar APIで認証
-    print("\n🔐 Google認証中...")
-    service = get_calendar_service()
-    if not service:
-        # 認証失敗の場合は終了
+    # --plan: 計画を表示するだけ（JSON出力をそのまま使えるよう見出しは出さない）
+    if args.plan:
+        report = plan_schedule_sync(load_schedule(csv_path), args.batch_size, args.verify,
+                                    prune_limit=args.prune, lean=args.lean)
+        print_plan_report(report, args.plan)
         return
 
-    print("✓ 認証成功")
+    # --ics: APIを使わずに.icsファイルへ書き出すだけ
+    if args.ics:
+        print("=" * 50)
+        print("  ICSファイル書き出し")
+        print("=" * 50)
+        export_ics(csv_path, args.ics, args.force)
+        return
+
+    print("=" * 50)
+    print("  Googleカレンダー同期スクリプト")
+    print("=" * 50)
+
+    # --pull: カレンダー → CSV の取り込みだけを行う
+    if args.pull:
+        pull_schedule(csv_path)
+        return
 
-    # ステップ4: カレンダーを取得または作成
-    calendar_id = get_or_create_calendar(service)
+    # --watch: 保存されるたびに変更された行だけを同期し続ける
+    if args.watch:
+        watch_schedule(csv_path, args.batch_size, args.workers, lean=args.lean)
+        return
+
+    # --stream: 読み込み・計画・書き込みをチャンクごとに行う
+    if args.stream:
+        print(f"\n📖 スケジュールを順に読み込みながら同期: {csv_path}")
+        if not stream_sync_schedule(csv_path, args.batch_size, args.workers, args.verify,
+                                    chunk_size=max(1, args.stream), lean=args.lean):
+            return
+        # --prune: キーだけをもう一度順に読んで集める（行データは保持しない）
+        if args.prune is not None and not prune_schedule(
+                {make_event_key(item) for item in iter_schedule(csv_path)},
+                args.batch_size, args.prune):
+            return
+        print("\n" + "=" * 50)
+        print("🎉 すべての処理が完了しました！")
+        print("=" * 50)
+        return
 
-    # ステップ5: スケジュールを読み込む
+    # ステップ3: スケジュールを読み込む
     print(f"\n📖 スケジュールを読み込み: {csv_path}")
-    schedule = load_schedule(csv_path)
+    with METRICS.phase('load_schedule'):
+        schedule = load_schedule(csv_path)
     print(f"✓ {len(schedule)} 件の学習項目を読み込みました")
 
-    # ステップ6: カレンダーに同期
-    sync_events_to_calendar(service, calendar_id, schedule)
+    # ステップ4: カレンダーに同期
+    if not sync_schedule(schedule, args.batch_size, args.workers, args.verify, lean=args.lean):
+        # 認証失敗の場合は終了
+        return
+
+    # ステップ5: CSVにないイベントを削除（--pruneオプションがある場合）
+    if args.prune is not None and not prune_schedule(
+            {make_event_key(item) for item in schedule}, args.batch_size, args.prune):
+        return
 
     print("\n" + "=" * 50)
     print("🎉 すべての処理が完了しました！")
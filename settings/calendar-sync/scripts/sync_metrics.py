@@ -0,0 +1,196 @@
+"""
+フルスタック学習プログラム - 同期の計測モジュール
+
+【このモジュールの目的】
+同期が遅いときに「どこで時間がかかっているか」を調べるため、
+次の値を計測してJSONまたはOpenMetrics形式で出力します。
+- 処理フェーズごとの経過時間（認証・APIクライアント構築・CSV読み込みなど）
+- APIメソッドごとの呼び出し回数・エラー回数・レイテンシのヒストグラム
+- 再送（リトライ）回数
+- ピークメモリ使用量（tracemalloc）
+
+【使い方】
+from sync_metrics import METRICS
+with METRICS.phase('load_schedule'):
+    schedule = load_schedule(csv_path)
+METRICS.record_call('calendar.events.list', 0.12)
+METRICS.write('metrics.json')  # 拡張子が.json以外ならOpenMetrics形式
+
+【主な変数の依存関係】
+METRICS（モジュール全体で共有）→ to_dict() / to_openmetrics() → write(path)
+"""
+
+# ============================================================
+# ライブラリのインポート
+# ============================================================
+
+import json  # JSON出力
+import threading  # 並行実行時の排他制御
+import time  # 経過時間の計測
+import tracemalloc  # ピークメモリの計測
+from contextlib import contextmanager  # with文で使える計測区間
+from pathlib import Path  # ファイルパス操作用
+
+# ============================================================
+# グローバル設定
+# ============================================================
+
+# レイテンシのヒストグラムの区切り（単位: 秒）
+LATENCY_BUCKETS = [0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0]
+
+# OpenMetrics出力のメトリクス名の接頭辞
+METRIC_PREFIX = 'fslearning_sync'
+
+
+# ============================================================
+# クラス定義
+# ============================================================
+
+class SyncMetrics:
+    """
+    同期処理の計測値を集めるクラス
+
+    【保持するデータ】
+    phases: {フェーズ名: 経過秒数}（同じフェーズは合計する）
+    calls: {メソッド名: 呼び出し回数}
+    errors: {メソッド名: エラー回数}
+    retries: {メソッド名: 再送回数}
+    latency: {メソッド名: {'buckets': [区切り以下の累積件数], 'sum': 合計秒数, 'count': 件数}}
+    peak_memory_bytes: tracemallocで計測したピークメモリ（未計測ならNone）
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.phases = {}
+        self.calls = {}
+        self.errors = {}
+        self.retries = {}
+        self.latency = {}
+        self.peak_memory_bytes = None
+
+    @contextmanager
+    def phase(self, name):
+        """with文の中の処理時間をフェーズ name として記録"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - started
+            with self.lock:
+                self.phases[name] = self.phases.get(name, 0.0) + elapsed
+
+    def record_call(self, method, seconds, error=None):
+        """
+        API呼び出し1回分を記録
+
+        【引数】
+        method: メソッド名（例: 'calendar.events.list'）
+        seconds: レイテンシ（秒）
+        error: 失敗した場合は例外オブジェクト
+        """
+        with self.lock:
+            self.calls[method] = self.calls.get(method, 0) + 1
+            if error is not None:
+                self.errors[method] = self.errors.get(method, 0) + 1
+
+            histogram = self.latency.setdefault(
+                method, {'buckets': [0] * len(LATENCY_BUCKETS), 'sum': 0.0, 'count': 0})
+            histogram['sum'] += seconds
+            histogram['count'] += 1
+            for index, bound in enumerate(LATENCY_BUCKETS):
+                if seconds <= bound:
+                    histogram['buckets'][index] += 1
+
+    def record_retry(self, method):
+        """再送1回分を記録"""
+        with self.lock:
+            self.retries[method] = self.retries.get(method, 0) + 1
+
+    def start_memory_tracking(self):
+        """ピークメモリの計測を開始（計測中は処理が少し遅くなる）"""
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    def stop_memory_tracking(self):
+        """ピークメモリの計測を終了して記録"""
+        if tracemalloc.is_tracing():
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            self.peak_memory_bytes = peak
+
+    def to_dict(self):
+        """計測値をJSONに変換できる辞書にする"""
+        with self.lock:
+            return {
+                'phases_seconds': dict(self.phases),
+                'api_calls': dict(self.calls),
+                'api_errors': dict(self.errors),
+                'retries': dict(self.retries),
+                'latency_seconds': {
+                    method: {
+                        'buckets': dict(zip([str(bound) for bound in LATENCY_BUCKETS],
+                                            histogram['buckets'])),
+                        'sum': histogram['sum'],
+                        'count': histogram['count'],
+                    }
+                    for method, histogram in self.latency.items()
+                },
+                'peak_memory_bytes': self.peak_memory_bytes,
+            }
+
+    def to_openmetrics(self):
+        """計測値をOpenMetricsのテキスト形式にする"""
+        data = self.to_dict()
+        lines = []
+
+        def family(name, metric_type, help_text):
+            lines.append(f"# TYPE {METRIC_PREFIX}_{name} {metric_type}")
+            lines.append(f"# HELP {METRIC_PREFIX}_{name} {help_text}")
+
+        family('phase_seconds', 'gauge', 'Wall-clock time per sync phase.')
+        for phase, seconds in data['phases_seconds'].items():
+            lines.append(f'{METRIC_PREFIX}_phase_seconds{{phase="{phase}"}} {seconds:.6f}')
+
+        for name, key, help_text in [
+            ('api_calls', 'api_calls', 'Calendar API requests per method.'),
+            ('api_errors', 'api_errors', 'Failed Calendar API requests per method.'),
+            ('retries', 'retries', 'Retried Calendar API requests per method.'),
+        ]:
+            family(name, 'counter', help_text)
+            for method, count in data[key].items():
+                lines.append(f'{METRIC_PREFIX}_{name}_total{{method="{method}"}} {count}')
+
+        family('api_latency_seconds', 'histogram', 'Calendar API latency per method.')
+        for method, histogram in data['latency_seconds'].items():
+            for bound, count in histogram['buckets'].items():
+                lines.append(f'{METRIC_PREFIX}_api_latency_seconds_bucket'
+                             f'{{method="{method}",le="{bound}"}} {count}')
+            lines.append(f'{METRIC_PREFIX}_api_latency_seconds_bucket'
+                         f'{{method="{method}",le="+Inf"}} {histogram["count"]}')
+            lines.append(f'{METRIC_PREFIX}_api_latency_seconds_sum{{method="{method}"}} {histogram["sum"]:.6f}')
+            lines.append(f'{METRIC_PREFIX}_api_latency_seconds_count{{method="{method}"}} {histogram["count"]}')
+
+        if data['peak_memory_bytes'] is not None:
+            family('peak_memory_bytes', 'gauge', 'Peak traced Python memory during the run.')
+            lines.append(f"{METRIC_PREFIX}_peak_memory_bytes {data['peak_memory_bytes']}")
+
+        lines.append('# EOF')
+        return '\n'.join(lines) + '\n'
+
+    def write(self, path):
+        """
+        計測値をファイルに書き出す
+
+        【引数】
+        path: 出力先（拡張子が.jsonならJSON、それ以外はOpenMetrics形式）
+        """
+        path = Path(path)
+        if path.suffix == '.json':
+            text = json.dumps(self.to_dict(), ensure_ascii=False, indent=2) + '\n'
+        else:
+            text = self.to_openmetrics()
+        path.write_text(text, encoding='utf-8')
+
+
+# モジュール全体で共有する計測オブジェクト
+METRICS = SyncMetrics()
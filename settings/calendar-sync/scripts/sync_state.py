@@ -0,0 +1,414 @@
+"""
+フルスタック学習プログラム - 同期状態ストア
+
+【このモジュールの目的】
+前回の同期で書き込んだ内容をローカルのSQLiteファイルに保存します。
+各 fslearning_key について「イベントID・etag・内容のハッシュ」を記録しておき、
+次回の同期でハッシュが変わっていない行はAPIを呼ばずにスキップします。
+フィールドごとのハッシュも記録するので、--lean ではどのフィールドが
+変わったかが分かり、そのフィールドだけを送信（patch）できます。
+スケジュールが変わっていなければ、同期はネットワーク通信なしで終わります。
+
+書き込み（作成・更新・削除）は、送信する前にアウトボックスに記録し、
+成功を確認したら同期状態の記録と同じトランザクションで消します。
+途中で中断しても（通信の切断・クォータ切れ・Ctrl+C）、次回は終わっていない分だけを送ります。
+
+【保存場所】
+settings/credentials/sync-state.db
+（認証情報と同じく、Gitにはコミットしない）
+
+【テーブル構成】
+events: calendar_id, fslearning_key → event_id, etag, content_hash, field_hashes
+calendars: カレンダー名 → calendar_id, 確認時刻（認証前にカレンダーIDを知るため）
+sync_tokens: calendar_id → nextSyncToken（カレンダー → CSV の差分取得用）
+outbox: calendar_id, fslearning_key → 送信待ちの書き込み（JSON）, 送信済みか, 失敗回数, 最後のエラー
+
+【主な変数の依存関係】
+SyncState(path) → load(calendar_id) → {key: {'event_id', 'etag', 'content_hash', 'field_hashes'}}
+content_hash(signature) → ハッシュ文字列
+field_hashes(values) → フィールドごとのハッシュ（JSON文字列）
+SyncState.enqueue() → mark_sent() → complete() / fail()（アウトボックス）
+"""
+
+# ============================================================
+# ライブラリのインポート
+# ============================================================
+
+import hashlib  # 内容のハッシュ計算
+import json  # ハッシュ計算前のシリアライズ
+import sqlite3  # 状態ファイル
+import time  # 更新時刻の記録
+from pathlib import Path  # ファイルパス操作用
+
+# ============================================================
+# グローバル設定
+# ============================================================
+
+# 状態ファイルのパス（settings/credentials/sync-state.db）
+DEFAULT_STATE_PATH = Path(__file__).parent.parent.parent / 'credentials' / 'sync-state.db'
+
+# load_keys()で1回のSQLに渡すキーの最大数（SQLiteのパラメーター数の上限より小さくする）
+MAX_KEYS_PER_QUERY = 500
+
+# フィールドごとのハッシュの長さ（変更の検出にだけ使うので短くてよい）
+FIELD_HASH_LENGTH = 16
+
+
+# ============================================================
+# 関数定義
+# ============================================================
+
+def content_hash(signature):
+    """
+    イベント内容のハッシュを計算
+
+    【ロジック】
+    signature（JSONに変換できる値）をキー順固定でJSON文字列にし、
+    SHA-256でハッシュ化する。同じ内容なら常に同じハッシュになる
+
+    【引数】
+    signature: 比較用の値（sync-to-calendar.pyのevent_signature()の戻り値）
+
+    【戻り値】
+    hash: 16進数のハッシュ文字列
+    """
+    serialized = json.dumps(signature, ensure_ascii=False, sort_keys=True)
+    return hashlib.sha256(serialized.encode('utf-8')).hexdigest()
+
+
+def field_hashes(values):
+    """
+    フィールドごとのハッシュを計算（記録用のJSON文字列）
+
+    【引数】
+    values: {フィールド名: 比較用の値}（sync-to-calendar.pyのevent_field_values()の戻り値）
+
+    【戻り値】
+    hashes: '{"summary": "1a2b...", ...}' 形式のJSON文字列
+    """
+    return json.dumps({
+        field: content_hash(value)[:FIELD_HASH_LENGTH]
+        for field, value in values.items()
+    }, sort_keys=True)
+
+
+# ============================================================
+# クラス定義
+# ============================================================
+
+class SyncState:
+    """
+    同期状態をSQLiteに保存するストア
+
+    【使い方】
+    with SyncState() as state:
+        stored = state.load(calendar_id)
+        state.record(calendar_id, [(key, event_id, etag, hash), ...])
+    """
+
+    def __init__(self, path=DEFAULT_STATE_PATH):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.connection = sqlite3.connect(str(self.path))
+        self.connection.executescript("""
+            CREATE TABLE IF NOT EXISTS events (
+                calendar_id TEXT NOT NULL,
+                fslearning_key TEXT NOT NULL,
+                event_id TEXT NOT NULL,
+                etag TEXT,
+                content_hash TEXT NOT NULL,
+                updated_at REAL NOT NULL,
+                field_hashes TEXT,
+                PRIMARY KEY (calendar_id, fslearning_key)
+            );
+            CREATE TABLE IF NOT EXISTS calendars (
+                name TEXT PRIMARY KEY,
+                calendar_id TEXT NOT NULL,
+                updated_at REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS sync_tokens (
+                calendar_id TEXT PRIMARY KEY,
+                sync_token TEXT NOT NULL,
+                updated_at REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS outbox (
+                calendar_id TEXT NOT NULL,
+                fslearning_key TEXT NOT NULL,
+                action TEXT NOT NULL,
+                mutation TEXT NOT NULL,
+                sent INTEGER NOT NULL DEFAULT 0,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                last_error TEXT,
+                queued_at REAL NOT NULL,
+                PRIMARY KEY (calendar_id, fslearning_key)
+            );
+        """)
+
+        # 以前のバージョンで作った状態ファイルには field_hashes 列がないので追加する
+        columns = {row[1] for row in self.connection.execute("PRAGMA table_info(events)")}
+        if 'field_hashes' not in columns:
+            with self.connection:
+                self.connection.execute("ALTER TABLE events ADD COLUMN field_hashes TEXT")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        """状態ファイルを閉じる"""
+        self.connection.close()
+
+    def get_calendar_id(self, name):
+        """
+        カレンダー名から前回使ったカレンダーIDを取得
+
+        【戻り値】
+        calendar_id: カレンダーID（記録がなければNone）
+        """
+        row = self.connection.execute(
+            "SELECT calendar_id FROM calendars WHERE name = ?", (name,)
+        ).fetchone()
+        return row[0] if row else None
+
+    def get_calendar_record(self, name):
+        """
+        カレンダー名から前回使ったカレンダーIDと、その存在を最後に確認した時刻を取得
+
+        【戻り値】
+        (calendar_id, verified_at): カレンダーIDと確認時刻（UNIX時間）、記録がなければNone
+        """
+        return self.connection.execute(
+            "SELECT calendar_id, updated_at FROM calendars WHERE name = ?", (name,)
+        ).fetchone()
+
+    def forget_calendar(self, name):
+        """カレンダーの記録を削除（カレンダーが削除されていたとき用）"""
+        with self.connection:
+            self.connection.execute("DELETE FROM calendars WHERE name = ?", (name,))
+
+    def set_calendar_id(self, name, calendar_id):
+        """カレンダー名とカレンダーIDの対応を記録（確認時刻は現在時刻になる）"""
+        with self.connection:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO calendars (name, calendar_id, updated_at) VALUES (?, ?, ?)",
+                (name, calendar_id, time.time())
+            )
+
+    def get_sync_token(self, calendar_id):
+        """
+        前回の差分取得で受け取った nextSyncToken を取得
+
+        【戻り値】
+        sync_token: 同期トークン（記録がなければNone）
+        """
+        row = self.connection.execute(
+            "SELECT sync_token FROM sync_tokens WHERE calendar_id = ?", (calendar_id,)
+        ).fetchone()
+        return row[0] if row else None
+
+    def set_sync_token(self, calendar_id, sync_token):
+        """次回の差分取得に使う nextSyncToken を記録"""
+        with self.connection:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO sync_tokens (calendar_id, sync_token, updated_at) VALUES (?, ?, ?)",
+                (calendar_id, sync_token, time.time())
+            )
+
+    def load(self, calendar_id):
+        """
+        カレンダーの同期状態をすべて読み込む
+
+        【戻り値】
+        stored: {fslearning_key: {'event_id': ..., 'etag': ..., 'content_hash': ...,
+                                  'field_hashes': ...（記録がなければNone）}}
+        """
+        rows = self.connection.execute(
+            "SELECT fslearning_key, event_id, etag, content_hash, field_hashes "
+            "FROM events WHERE calendar_id = ?",
+            (calendar_id,)
+        )
+        return {
+            key: {'event_id': event_id, 'etag': etag, 'content_hash': digest,
+                  'field_hashes': fields}
+            for key, event_id, etag, digest, fields in rows
+        }
+
+    def load_keys(self, calendar_id, keys):
+        """
+        指定したキーの同期状態だけを読み込む（ストリーミング同期用）
+
+        load()と違い、カレンダー全体の記録をメモリに載せない
+
+        【引数】
+        calendar_id: カレンダーID
+        keys: fslearning_key のリスト
+
+        【戻り値】
+        stored: load()と同じ形式の辞書（記録のあるキーだけ）
+        """
+        keys = list(keys)
+        stored = {}
+        for start in range(0, len(keys), MAX_KEYS_PER_QUERY):
+            chunk = keys[start:start + MAX_KEYS_PER_QUERY]
+            placeholders = ', '.join('?' * len(chunk))
+            rows = self.connection.execute(
+                "SELECT fslearning_key, event_id, etag, content_hash, field_hashes FROM events "
+                f"WHERE calendar_id = ? AND fslearning_key IN ({placeholders})",
+                [calendar_id] + chunk
+            )
+            for key, event_id, etag, digest, fields in rows:
+                stored[key] = {'event_id': event_id, 'etag': etag, 'content_hash': digest,
+                               'field_hashes': fields}
+        return stored
+
+    def record(self, calendar_id, entries, overwrite=True):
+        """
+        同期が成功したイベントの状態を記録
+
+        【引数】
+        calendar_id: カレンダーID
+        entries: [(fslearning_key, event_id, etag, content_hash), ...] のリスト
+                 （5番目に field_hashes() の戻り値を付けてもよい。ない場合はNULL）
+        overwrite: Falseなら記録済みのキーはそのまま残す（記録のないキーだけ追加）
+        """
+        with self.connection:
+            self._write_records(calendar_id, entries, overwrite)
+
+    def _write_records(self, calendar_id, entries, overwrite=True):
+        # record()・complete()の本体（トランザクションは呼び出し側で開始する）
+        now = time.time()
+        verb = "INSERT OR REPLACE" if overwrite else "INSERT OR IGNORE"
+        self.connection.executemany(
+            f"{verb} INTO events "
+            "(calendar_id, fslearning_key, event_id, etag, content_hash, updated_at, field_hashes) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            [(calendar_id, key, event_id, etag, digest, now, fields[0] if fields else None)
+             for key, event_id, etag, digest, *fields in entries]
+        )
+
+    def forget(self, calendar_id, keys):
+        """指定したキーの記録を削除"""
+        with self.connection:
+            self.connection.executemany(
+                "DELETE FROM events WHERE calendar_id = ? AND fslearning_key = ?",
+                [(calendar_id, key) for key in keys]
+            )
+
+    def replace_all(self, calendar_id, entries):
+        """
+        カレンダーの記録をすべて置き換える（--verifyでリモートと照合したとき用）
+
+        【引数】
+        calendar_id: カレンダーID
+        entries: [(fslearning_key, event_id, etag, content_hash), ...] のリスト
+        """
+        self.clear(calendar_id)
+        self.record(calendar_id, entries)
+
+    def clear(self, calendar_id):
+        """カレンダーの記録をすべて削除"""
+        with self.connection:
+            self.connection.execute("DELETE FROM events WHERE calendar_id = ?", (calendar_id,))
+
+    def enqueue(self, calendar_id, mutations):
+        """
+        書き込みを送信する前にアウトボックスに記録
+
+        同じキーの書き込みがすでにあれば、新しい内容で置き換える。
+        送信済みの印（sent）と失敗回数はそのまま残す
+        （前回の作成が届いていたかもしれないことを忘れないため）
+
+        【引数】
+        calendar_id: カレンダーID
+        mutations: 書き込みのリスト（'key' と 'action' を含む、JSONに変換できる辞書）
+        """
+        now = time.time()
+        with self.connection:
+            self.connection.executemany(
+                "INSERT INTO outbox (calendar_id, fslearning_key, action, mutation, queued_at) "
+                "VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT (calendar_id, fslearning_key) DO UPDATE SET "
+                "action = excluded.action, mutation = excluded.mutation, queued_at = excluded.queued_at",
+                [(calendar_id, mutation['key'], mutation['action'],
+                  json.dumps(mutation, ensure_ascii=False, sort_keys=True), now)
+                 for mutation in mutations]
+            )
+
+    def mark_sent(self, calendar_id, keys):
+        """送信を始めた書き込みに印を付ける（作成が届いたかどうか、次回に確認が必要になる）"""
+        with self.connection:
+            self.connection.executemany(
+                "UPDATE outbox SET sent = 1 WHERE calendar_id = ? AND fslearning_key = ?",
+                [(calendar_id, key) for key in keys]
+            )
+
+    def complete(self, calendar_id, entries=(), deleted_keys=()):
+        """
+        成功した書き込みを記録し、アウトボックスから消す（1つのトランザクション）
+
+        【引数】
+        calendar_id: カレンダーID
+        entries: 作成・更新が成功したイベント（record()と同じ形式）
+        deleted_keys: 削除が成功した（またはすでになかった）キー
+        """
+        entries = list(entries)
+        deleted_keys = list(deleted_keys)
+        with self.connection:
+            self._write_records(calendar_id, entries)
+            self.connection.executemany(
+                "DELETE FROM events WHERE calendar_id = ? AND fslearning_key = ?",
+                [(calendar_id, key) for key in deleted_keys]
+            )
+            self.connection.executemany(
+                "DELETE FROM outbox WHERE calendar_id = ? AND fslearning_key = ?",
+                [(calendar_id, key) for key in [entry[0] for entry in entries] + deleted_keys]
+            )
+
+    def fail(self, calendar_id, failures, count_attempt=True):
+        """
+        失敗した書き込みのエラーを記録（アウトボックスには残すので、次回もう一度送る）
+
+        【引数】
+        calendar_id: カレンダーID
+        failures: [(fslearning_key, エラーメッセージ), ...] のリスト
+        count_attempt: Falseなら失敗回数を増やさない（接続できなかっただけの場合）
+        """
+        increment = 1 if count_attempt else 0
+        with self.connection:
+            self.connection.executemany(
+                "UPDATE outbox SET attempts = attempts + ?, last_error = ? "
+                "WHERE calendar_id = ? AND fslearning_key = ?",
+                [(increment, str(message), calendar_id, key) for key, message in failures]
+            )
+
+    def pending(self, calendar_id):
+        """
+        アウトボックスに残っている書き込みを記録した順番に読み込む
+
+        【戻り値】
+        pending: 書き込みの辞書のリスト（enqueue()で渡した内容に
+                 'sent'（True/False）・'attempts'・'last_error' を加えたもの）
+        """
+        rows = self.connection.execute(
+            "SELECT mutation, sent, attempts, last_error FROM outbox "
+            "WHERE calendar_id = ? ORDER BY queued_at, rowid",
+            (calendar_id,)
+        )
+        return [dict(json.loads(mutation), sent=bool(sent), attempts=attempts, last_error=error)
+                for mutation, sent, attempts, error in rows]
+
+    def pending_count(self, calendar_id):
+        """アウトボックスに残っている書き込みの件数"""
+        return self.connection.execute(
+            "SELECT COUNT(*) FROM outbox WHERE calendar_id = ?", (calendar_id,)
+        ).fetchone()[0]
+
+    def discard(self, calendar_id, keys):
+        """アウトボックスから書き込みを取り除く（送らないことにしたとき用）"""
+        with self.connection:
+            self.connection.executemany(
+                "DELETE FROM outbox WHERE calendar_id = ? AND fslearning_key = ?",
+                [(calendar_id, key) for key in keys]
+            )
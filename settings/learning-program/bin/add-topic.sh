@@ -26,18 +26,15 @@ if [ ! -f "settings/learning-program/data/learning.csv" ]; then
     exit 1
 fi
 
-# CSVの2行目から週番号を取得
-WEEK=$(sed -n '2p' settings/learning-program/data/learning.csv | cut -d',' -f3)
+# 現在の週のプロジェクトディレクトリを取得（learning_query.py が projects/ から探した結果）
+eval "$(python3 settings/learning-program/lib/learning_query.py env)"
 
-# プロジェクトディレクトリを特定
-PROJECT_DIR="projects/week$(printf "%02d" $WEEK)-*"
-
-if ! ls -d $PROJECT_DIR 2>/dev/null | head -n 1 > /dev/null; then
+if [ -z "$PROJECT_DIR" ]; then
     echo "⚠️  プロジェクトディレクトリが見つかりません"
     exit 1
 fi
 
-ACTUAL_PROJECT_DIR=$(ls -d $PROJECT_DIR 2>/dev/null | head -n 1)
+ACTUAL_PROJECT_DIR="$PROJECT_DIR"
 
 # knowledge/error-topicディレクトリを作成
 ERROR_TOPIC_DIR="$ACTUAL_PROJECT_DIR/knowledge/error-topic"
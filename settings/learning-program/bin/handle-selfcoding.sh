@@ -12,8 +12,8 @@ if [ ! -f "settings/learning-program/data/learning.csv" ]; then
     exit 1
 fi
 
-CURRENT_LINE=$(sed -n '2p' settings/learning-program/data/learning.csv)
-IFS=',' read -r YEAR MONTH WEEK CONTENT PHASE STATUS MEMO <<< "$CURRENT_LINE"
+# 現在の週を取得（CSVを正しく読むので、学習メモにカンマがあっても列がずれない）
+eval "$(python3 settings/learning-program/lib/learning_query.py env)"
 
 # 提案を表示
 "$SCRIPT_DIR/../../../lib/suggest-selfcoding.sh" "$WEEK"
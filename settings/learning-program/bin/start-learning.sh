@@ -12,16 +12,21 @@ echo "  フルスタック学習プログラム"
 echo "========================================="
 echo ""
 
+# Googleカレンダー上で直接動かした予定をdev-schedule.csvに取り込む
+# （カレンダー同期済みの場合のみ。前回からの差分だけを取得するので毎回実行しても軽い）
+# トークンが切れていて認証し直す必要がある場合は、入力を待たずに警告だけ表示してスキップする
+if [ -f "settings/credentials/sync-state.db" ] && [ -f "settings/credentials/token.json" ]; then
+    ./settings/calendar-sync/scripts/sync --pull 2>/dev/null | grep -E '取り込み:|競合|取り込みをスキップ' || true
+fi
+
 # learning.csvから現在の進捗を読み込む
 if [ -f "settings/learning-program/data/learning.csv" ]; then
     echo "📊 現在の学習進捗:"
     echo "-----------------------------------------"
 
-    # CSVの2行目（データ行）を読み込む
-    CURRENT_LINE=$(sed -n '2p' settings/learning-program/data/learning.csv)
-
-    # カンマで分割
-    IFS=',' read -r YEAR MONTH WEEK CONTENT PHASE STATUS MEMO <<< "$CURRENT_LINE"
+    # 現在の週・プロジェクト・次の予定をまとめて取得
+    # （CSVを正しく読むので、学習メモにカンマがあっても列がずれない）
+    eval "$(python3 settings/learning-program/lib/learning_query.py env)"
 
     echo "📅 年月: ${YEAR}年${MONTH}月 第${WEEK}週"
     echo "📝 第${WEEK}週の開発内容: $CONTENT"
@@ -35,11 +40,9 @@ if [ -f "settings/learning-program/data/learning.csv" ]; then
     echo "📚 前回の学習内容まとめ:"
     echo "-----------------------------------------"
 
-    # プロジェクトディレクトリを確認
-    PROJECT_DIR="projects/week$(printf "%02d" $WEEK)-*"
-
-    if ls -d $PROJECT_DIR 2>/dev/null | head -n 1 > /dev/null; then
-        ACTUAL_PROJECT_DIR=$(ls -d $PROJECT_DIR 2>/dev/null | head -n 1)
+    # プロジェクトディレクトリを確認（learning_query.py が projects/ から探した結果）
+    if [ -n "$PROJECT_DIR" ]; then
+        ACTUAL_PROJECT_DIR="$PROJECT_DIR"
 
         # requirements.mdが存在するか確認
         if [ -f "$ACTUAL_PROJECT_DIR/requirements.md" ]; then
@@ -75,6 +78,13 @@ if [ -f "settings/learning-program/data/learning.csv" ]; then
         echo ""
     fi
 
+    # 次の予定と全体の進捗
+    if [ -n "$NEXT_CONTENT" ]; then
+        echo "⏭️  次の予定: ${NEXT_YEAR}年${NEXT_MONTH}月 第${NEXT_WEEK}週 $NEXT_CONTENT（$NEXT_PROJECT）"
+    fi
+    echo "📈 全体の進捗: ${STATS_SCHEDULE_DONE} / ${STATS_SCHEDULE_TOTAL} 週（${STATS_SCHEDULE_PERCENT}%）"
+    echo ""
+
     echo "-----------------------------------------"
     echo "💬 Claudeに「次へ」と入力すると次の工程に進めます"
     echo "💬 「selfcoding」と入力すると自力コーディングプロジェクトを提案します"
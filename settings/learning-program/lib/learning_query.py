@@ -0,0 +1,467 @@
+#!/usr/bin/env python3
+"""
+フルスタック学習プログラム - 学習状況の問い合わせ
+
+【このスクリプトの目的】
+start-learning.sh・add-knowledge.sh・add-topic.sh・handle-selfcoding.sh が
+必要とする「現在の週」「次の予定」「第N週のプロジェクト」「進捗の集計」を、
+1回の呼び出しでまとめて返します。
+
+以前は各スクリプトが sed -n '2p' と IFS=',' で learning.csv を読んでいたため、
+- 学習メモにカンマがあると列がずれる
+- 2行目（最初の記録）しか見ない
+- projects/weekNN-* を何度も ls で探す
+という問題がありました。ここではCSVを csv モジュールで正しく読み、
+projects/ の一覧も1回だけ調べて、インデックスとしてキャッシュします。
+
+【キャッシュ】
+settings/credentials/cache/learning-index.pickle
+CSV・projects/ の更新時刻とサイズが変わったときだけ作り直します。
+
+【使い方】
+# シェルスクリプトから（変数としてまとめて受け取る）
+eval "$(python3 settings/learning-program/lib/learning_query.py env)"
+
+# 人が読む形式
+python3 settings/learning-program/lib/learning_query.py current
+python3 settings/learning-program/lib/learning_query.py next
+python3 settings/learning-program/lib/learning_query.py project-dir 1
+python3 settings/learning-program/lib/learning_query.py stats
+
+【主な変数の依存関係】
+load_index() → index
+index → current_progress() / next_scheduled() / project_dir() / completion_stats()
+"""
+
+# ============================================================
+# ライブラリのインポート
+# ============================================================
+
+import argparse  # コマンドライン引数を解析
+import csv  # CSVファイル読み込み
+import json  # --json 出力
+import os  # ディレクトリ一覧・更新時刻
+import pickle  # インデックスのキャッシュ
+import re  # プロジェクトディレクトリ名の解析
+import shlex  # シェル変数として安全に出力
+import sys  # システム終了処理
+import tempfile  # キャッシュの一時書き込み
+from pathlib import Path  # ファイルパス操作用
+
+# ============================================================
+# グローバル設定
+# ============================================================
+
+# リポジトリのルート（settings/learning-program/lib/ の3つ上）
+ROOT_DIR = Path(__file__).resolve().parent.parent.parent.parent
+
+# データファイル（settings/learning-program/data/）
+DATA_DIR = ROOT_DIR / 'settings' / 'learning-program' / 'data'
+LEARNING_CSV = DATA_DIR / 'learning.csv'
+SCHEDULE_CSV = DATA_DIR / 'dev-schedule.csv'
+SELFCODING_CSV = DATA_DIR / 'selfcoding-progress.csv'
+
+# 週ごとのプロジェクト（projects/week01-portfolio など）
+PROJECTS_DIR = ROOT_DIR / 'projects'
+PROJECT_DIR_PATTERN = re.compile(r'^week(\d+)-')
+
+# インデックスのキャッシュ（settings/credentials/cache/、.gitignore済み）
+CACHE_PATH = ROOT_DIR / 'settings' / 'credentials' / 'cache' / 'learning-index.pickle'
+
+# キャッシュの形式のバージョン（インデックスの形を変えたら上げる）
+INDEX_VERSION = 1
+
+# 完了を表すステータス
+DONE_STATUS = '完了'
+
+
+# ============================================================
+# 関数定義
+# ============================================================
+
+def read_csv_rows(csv_path):
+    """
+    CSVを読み込み、列名 → 値の辞書のリストを返す
+
+    csvモジュールで読むので、"..." で囲まれた値の中のカンマや改行も正しく扱える
+
+    【引数】
+    csv_path: CSVファイルのパス
+
+    【戻り値】
+    rows: 行のリスト（ファイルがなければ空のリスト）
+    """
+    try:
+        with open(csv_path, 'r', encoding='utf-8', newline='') as f:
+            return [row for row in csv.DictReader(f) if any(row.values())]
+    except FileNotFoundError:
+        return []
+
+
+def scan_project_dirs(projects_dir):
+    """
+    projects/ を1回だけ調べ、週番号 → プロジェクトディレクトリの対応を作る
+
+    同じ週のディレクトリが複数ある場合は、ls -d projects/weekNN-* | head -n 1 と同じく
+    名前順で最初のものを使う
+
+    【引数】
+    projects_dir: projects/ のパス
+
+    【戻り値】
+    projects: {週番号: 'projects/week01-portfolio'}（ルートからの相対パス）
+    """
+    projects = {}
+    try:
+        names = sorted(entry.name for entry in os.scandir(projects_dir) if entry.is_dir())
+    except FileNotFoundError:
+        return projects
+
+    for name in names:
+        match = PROJECT_DIR_PATTERN.match(name)
+        if match:
+            projects.setdefault(int(match.group(1)), f'{projects_dir.name}/{name}')
+    return projects
+
+
+def week_key(row, year_column):
+    """
+    行の (年, 月, 週) を比較用のタプルにする（数値でない行はNone）
+
+    【引数】
+    row: CSVの1行
+    year_column: 年の列名（learning.csv は '年'、dev-schedule.csv は '年度'）
+
+    【戻り値】
+    key: (年, 月, 週) のタプル
+    """
+    try:
+        return int(row[year_column]), int(row['月']), int(row['週'])
+    except (KeyError, TypeError, ValueError):
+        return None
+
+
+def source_signature(paths):
+    """
+    キャッシュが使えるかを判定するための、元ファイルの更新時刻とサイズ
+
+    【引数】
+    paths: 元ファイル・ディレクトリのパスのリスト
+
+    【戻り値】
+    signature: (パス, 更新時刻, サイズ) のタプル（存在しなければ (パス, None, None)）
+    """
+    signature = []
+    for path in paths:
+        try:
+            stat = os.stat(path)
+            signature.append((str(path), stat.st_mtime_ns, stat.st_size))
+        except FileNotFoundError:
+            signature.append((str(path), None, None))
+    return tuple(signature)
+
+
+def build_index():
+    """
+    3つのCSVとprojects/を読み込み、問い合わせ用のインデックスを作る
+
+    【戻り値】
+    index: {
+        'progress': learning.csvの全行,
+        'schedule': dev-schedule.csvの全行（(年, 月, 週) 順）,
+        'selfcoding': selfcoding-progress.csvの全行,
+        'projects': {週番号: プロジェクトディレクトリ}
+    }
+    """
+    schedule = [row for row in read_csv_rows(SCHEDULE_CSV) if week_key(row, '年度')]
+    schedule.sort(key=lambda row: week_key(row, '年度'))
+    return {
+        'progress': read_csv_rows(LEARNING_CSV),
+        'schedule': schedule,
+        'selfcoding': read_csv_rows(SELFCODING_CSV),
+        'projects': scan_project_dirs(PROJECTS_DIR),
+    }
+
+
+def load_index(cache_path=CACHE_PATH):
+    """
+    インデックスを読み込む（元ファイルが変わっていなければキャッシュを使う）
+
+    【処理フロー】
+    1. CSV・projects/ の更新時刻とサイズを調べる
+    2. キャッシュの記録と同じならキャッシュを返す
+    3. 違えば build_index() で作り直してキャッシュに保存
+       （保存できなくても結果はそのまま返す）
+
+    【引数】
+    cache_path: キャッシュファイルのパス（Noneならキャッシュを使わない）
+
+    【戻り値】
+    index: build_index()の戻り値
+    """
+    # ステップ1: 元ファイルの状態
+    # projects/ はディレクトリの更新時刻で、週のディレクトリの追加・削除を検知する
+    signature = (INDEX_VERSION,
+                 source_signature([LEARNING_CSV, SCHEDULE_CSV, SELFCODING_CSV, PROJECTS_DIR]))
+
+    # ステップ2: キャッシュを確認
+    if cache_path is not None:
+        try:
+            with open(cache_path, 'rb') as f:
+                cached_signature, index = pickle.load(f)
+            if cached_signature == signature:
+                return index
+        except (OSError, EOFError, pickle.UnpicklingError, ValueError, TypeError):
+            pass
+
+    # ステップ3: 作り直して保存
+    index = build_index()
+    if cache_path is not None:
+        try:
+            cache_path = Path(cache_path)
+            cache_path.parent.mkdir(parents=True, exist_ok=True)
+            fd, temp_path = tempfile.mkstemp(dir=cache_path.parent, prefix=f'.{cache_path.name}.')
+            with os.fdopen(fd, 'wb') as f:
+                pickle.dump((signature, index), f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(temp_path, cache_path)
+        except OSError:
+            pass
+    return index
+
+
+def current_progress(index):
+    """
+    現在の学習状況（learning.csvの最後の行）を返す
+
+    learning.csv には週ごとに行を追加していくので、最後の行が現在の週になる
+
+    【引数】
+    index: load_index()の戻り値
+
+    【戻り値】
+    progress: learning.csvの1行（記録がなければNone）
+    """
+    return index['progress'][-1] if index['progress'] else None
+
+
+def current_schedule_position(index):
+    """
+    現在の週がdev-schedule.csvのどこにあるかを返す
+
+    【引数】
+    index: load_index()の戻り値
+
+    【戻り値】
+    position: 現在の週より後にある最初の行の番号
+              （現在の週の行は position - 1。記録がなければ0）
+    """
+    progress = current_progress(index)
+    current = week_key(progress, '年') if progress else None
+    if current is None:
+        return 0
+    position = 0
+    for row in index['schedule']:
+        if week_key(row, '年度') > current:
+            break
+        position += 1
+    return position
+
+
+def next_scheduled(index):
+    """
+    次に予定されている学習項目を返す
+
+    【ロジック】
+    - 現在の週が完了していれば、dev-schedule.csvで現在の週より後の最初の行
+    - 完了していなければ、現在の週の行（まだ終わっていないので次も同じ）
+    - 学習を始めていなければ、最初の行
+
+    【引数】
+    index: load_index()の戻り値
+
+    【戻り値】
+    item: dev-schedule.csvの1行（予定がなければNone）
+    """
+    schedule = index['schedule']
+    position = current_schedule_position(index)
+    progress = current_progress(index)
+    if progress and progress.get('ステータス') != DONE_STATUS and position > 0:
+        current_row = schedule[position - 1]
+        if week_key(current_row, '年度') == week_key(progress, '年'):
+            return current_row
+    return schedule[position] if position < len(schedule) else None
+
+
+def project_dir(index, week):
+    """
+    第N週のプロジェクトディレクトリを返す
+
+    【引数】
+    index: load_index()の戻り値
+    week: 週番号
+
+    【戻り値】
+    path: 'projects/week01-portfolio' 形式（なければ空文字列）
+    """
+    return index['projects'].get(int(week), '')
+
+
+def completion_stats(index):
+    """
+    進捗の集計
+
+    【戻り値】
+    stats: {
+        'schedule_total': dev-schedule.csvの行数,
+        'schedule_done': 現在の週までに終えた行数（現在の週は完了していれば含める）,
+        'schedule_percent': 達成率（%、小数点以下切り捨て）,
+        'weeks_done': learning.csvで完了になっている週の数,
+        'selfcoding_total': 自力コーディングのプロジェクト数,
+        'selfcoding_done': そのうち完了した数,
+        'projects': projects/ にある週のプロジェクト数
+    }
+    """
+    schedule_total = len(index['schedule'])
+    schedule_done = current_schedule_position(index)
+    progress = current_progress(index)
+    if progress and progress.get('ステータス') != DONE_STATUS and schedule_done > 0:
+        if week_key(index['schedule'][schedule_done - 1], '年度') == week_key(progress, '年'):
+            schedule_done -= 1  # 現在の週はまだ終わっていない
+    return {
+        'schedule_total': schedule_total,
+        'schedule_done': schedule_done,
+        'schedule_percent': schedule_done * 100 // schedule_total if schedule_total else 0,
+        'weeks_done': sum(1 for row in index['progress'] if row.get('ステータス') == DONE_STATUS),
+        'selfcoding_total': len(index['selfcoding']),
+        'selfcoding_done': sum(1 for row in index['selfcoding']
+                               if row.get('ステータス') == DONE_STATUS),
+        'projects': len(index['projects']),
+    }
+
+
+def query_all(index):
+    """
+    シェルスクリプトが使う値を1つの辞書にまとめる（env コマンド用）
+
+    【戻り値】
+    values: 変数名 → 値（すべて文字列。ない値は空文字列）
+    """
+    progress = current_progress(index) or {}
+    upcoming = next_scheduled(index) or {}
+    week = progress.get('週', '')
+    values = {
+        'HAS_PROGRESS': '1' if progress else '',
+        'YEAR': progress.get('年', ''),
+        'MONTH': progress.get('月', ''),
+        'WEEK': week,
+        'CONTENT': progress.get('開発内容', ''),
+        'PHASE': progress.get('現在の開発工程', ''),
+        'STATUS': progress.get('ステータス', ''),
+        'MEMO': progress.get('学習メモ', ''),
+        'PROJECT_DIR': project_dir(index, week) if week.isdigit() else '',
+        'NEXT_YEAR': upcoming.get('年度', ''),
+        'NEXT_MONTH': upcoming.get('月', ''),
+        'NEXT_WEEK': upcoming.get('週', ''),
+        'NEXT_CONTENT': upcoming.get('学習内容', ''),
+        'NEXT_PROJECT': upcoming.get('実践課題', ''),
+    }
+    for name, value in completion_stats(index).items():
+        values[f'STATS_{name.upper()}'] = str(value)
+    return values
+
+
+def format_shell(values):
+    """
+    辞書を eval できるシェル変数の代入文にする
+
+    値は shlex.quote() で囲むので、カンマ・空白・引用符を含んでいても安全
+
+    【引数】
+    values: 変数名 → 値
+
+    【戻り値】
+    text: 'WEEK=1' のような行を改行でつないだ文字列
+    """
+    return '\n'.join(f'{name}={shlex.quote(str(value))}' for name, value in values.items())
+
+
+def print_item(label, row, year_column):
+    """学習項目を1行で表示"""
+    if not row:
+        print(f"{label}: なし")
+        return
+    print(f"{label}: {row[year_column]}年{row['月']}月 第{row['週']}週 "
+          f"{row.get('学習内容') or row.get('開発内容', '')}")
+
+
+def main():
+    """
+    メイン処理（サブコマンドに応じて問い合わせる）
+
+    【サブコマンド】
+    env: シェル変数の代入文をまとめて出力（eval "$(... env)" で使う）
+    current: 現在の週
+    next: 次に予定されている学習項目
+    project-dir WEEK: 第WEEK週のプロジェクトディレクトリ（なければ終了コード1）
+    stats: 進捗の集計
+
+    --json を付けるとJSONで出力する（env 以外）
+    """
+    parser = argparse.ArgumentParser(description='学習状況（現在の週・次の予定・進捗）を問い合わせます')
+    parser.add_argument('--json', action='store_true', help='JSONで出力する')
+    parser.add_argument('--no-cache', action='store_true', help='キャッシュを使わずにCSVを読み直す')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    subparsers.add_parser('env', help='シェル変数の代入文をまとめて出力する')
+    subparsers.add_parser('current', help='現在の週を表示する')
+    subparsers.add_parser('next', help='次に予定されている学習項目を表示する')
+    project_parser = subparsers.add_parser('project-dir', help='第N週のプロジェクトディレクトリを表示する')
+    project_parser.add_argument('week', type=int, help='週番号')
+    subparsers.add_parser('stats', help='進捗の集計を表示する')
+    args = parser.parse_args()
+
+    index = load_index(None if args.no_cache else CACHE_PATH)
+
+    if args.command == 'env':
+        print(format_shell(query_all(index)))
+        return
+
+    if args.command == 'current':
+        result = current_progress(index)
+    elif args.command == 'next':
+        result = next_scheduled(index)
+    elif args.command == 'project-dir':
+        result = project_dir(index, args.week)
+    else:
+        result = completion_stats(index)
+
+    if args.json:
+        print(json.dumps(result, ensure_ascii=False, indent=2))
+    elif args.command == 'current':
+        print_item('📅 現在の週', result, '年')
+        if result:
+            print(f"🔧 工程: {result['現在の開発工程']} / ✅ ステータス: {result['ステータス']}")
+    elif args.command == 'next':
+        print_item('⏭️  次の予定', result, '年度')
+    elif args.command == 'project-dir':
+        if result:
+            print(result)
+    else:
+        print(f"📊 スケジュール: {result['schedule_done']} / {result['schedule_total']} 週"
+              f"（{result['schedule_percent']}%）")
+        print(f"✅ 完了した週: {result['weeks_done']}")
+        print(f"💪 自力コーディング: {result['selfcoding_done']} / {result['selfcoding_total']}")
+        print(f"📁 プロジェクト: {result['projects']}")
+
+    # 見つからない場合は終了コード1（シェルスクリプトで判定できるように）
+    if result is None or result == '':
+        sys.exit(1)
+
+
+# ============================================================
+# スクリプトのエントリーポイント
+# ============================================================
+
+# このスクリプトが直接実行された場合（import されていない場合）
+# main()を実行
+if __name__ == '__main__':
+    main()